@@ -0,0 +1,105 @@
+import secrets
+import threading
+import time
+import uuid
+
+import jwt
+from fastapi import HTTPException
+
+import config
+from services.log_service import get_logger
+
+log = get_logger("auth")
+
+ALGORITHM = "HS256"
+
+if config.AUTH_SECRET:
+    SECRET = config.AUTH_SECRET
+else:
+    # Fine for one local worker; tokens stop working on restart and are not
+    # accepted by other workers
+    SECRET = secrets.token_urlsafe(32)
+    log.warning("AUTH_SECRET not set; using a random per-process signing key")
+
+
+class RevocationList:
+    """Tokens that must stop working before they expire.
+
+    Access tokens are checked without a database read, so removing an account
+    only takes effect once its tokens are listed here. Entries live as long
+    as the longest token they could cover (the refresh TTL), so the list
+    holds only recent revocations.
+    """
+
+    def __init__(self, ttl: float = config.REFRESH_TOKEN_TTL):
+        self.ttl = ttl
+
+        self._users  = {}    # user_id -> revoked at; tokens issued earlier are dead
+        self._tokens = {}    # jti -> expiry
+        self._lock   = threading.Lock()
+
+    def revoke_user(self, user_id: str):
+        with self._lock:
+            self._prune()
+            self._users[user_id] = time.time()
+
+    def revoke_token(self, jti: str, exp: float):
+        with self._lock:
+            self._prune()
+            self._tokens[jti] = exp
+
+    def is_revoked(self, claims: dict) -> bool:
+        revoked_at = self._users.get(claims["sub"])
+        if revoked_at is not None and claims["iat"] <= revoked_at:
+            return True
+        return claims["jti"] in self._tokens
+
+    def _prune(self):
+        now = time.time()
+        self._users  = {u: t for u, t in self._users.items() if now - t < self.ttl}
+        self._tokens = {j: e for j, e in self._tokens.items() if e > now}
+
+
+revocations = RevocationList()
+
+
+def _issue(user: dict, kind: str, ttl: float) -> tuple:
+    now    = time.time()
+    claims = {
+        "sub":           user["user_id"],
+        "role":          user["role"],
+        "department_id": user.get("department_id"),
+        "type":          kind,
+        "jti":           uuid.uuid4().hex,
+        "iat":           now,
+        "exp":           int(now + ttl),
+    }
+    return jwt.encode(claims, SECRET, algorithm=ALGORITHM), claims
+
+
+def issue_tokens(user: dict) -> dict:
+    """Access + refresh token pair for {"user_id", "role", "department_id"}."""
+    access, _  = _issue(user, "access", config.ACCESS_TOKEN_TTL)
+    refresh, _ = _issue(user, "refresh", config.REFRESH_TOKEN_TTL)
+    return {
+        "access_token":  access,
+        "refresh_token": refresh,
+        "token_type":    "bearer",
+        "expires_in":    int(config.ACCESS_TOKEN_TTL),
+    }
+
+
+def decode_token(token: str, kind: str = "access") -> dict:
+    """Verified claims, or 401. Pure CPU: signature, expiry and revocation list."""
+    try:
+        claims = jwt.decode(
+            token, SECRET, algorithms=[ALGORITHM], options={"require": ["sub", "exp", "iat", "jti"]},
+        )
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(status_code=401, detail="Token expired.", headers={"WWW-Authenticate": "Bearer"})
+    except jwt.InvalidTokenError:
+        raise HTTPException(status_code=401, detail="Invalid token.", headers={"WWW-Authenticate": "Bearer"})
+
+    if claims.get("type") != kind or revocations.is_revoked(claims):
+        raise HTTPException(status_code=401, detail="Invalid token.", headers={"WWW-Authenticate": "Bearer"})
+    return claims
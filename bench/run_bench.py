@@ -0,0 +1,274 @@
+"""Endpoint benchmark against the in-memory backend.
+
+Boots the FastAPI app in-process with DATA_BACKEND=memory, seeds it with
+realistic volumes and drives each scenario at a fixed concurrency:
+
+    python bench/run_bench.py --issues 100000 --departments 500 --users 50000 \\
+        --concurrency 32 --requests 2000 --latency-ms 2
+
+Per scenario it reports p50/p95/p99 latency, throughput and upstream
+round-trips per request, and writes everything to a JSON file (by default
+bench/results/<git sha>.json). Pass `--compare old.json` to print the change
+against an earlier run.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SCENARIOS = ["login", "create-issue", "dept-issues", "my-issues", "all-issues", "search"]
+SEARCH_TERMS = ["streetlight", "pothole junction", "residents", "lane", "streetlight residents", "water leak"]
+PASSWORD  = "bench-password"
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--issues",        type=int,   default=100_000)
+    p.add_argument("--departments",   type=int,   default=500)
+    p.add_argument("--users",         type=int,   default=50_000)
+    p.add_argument("--categories",    type=int,   default=20)
+    p.add_argument("--concurrency",   type=int,   default=32)
+    p.add_argument("--requests",      type=int,   default=2_000, help="requests per scenario")
+    p.add_argument("--latency-ms",    type=float, default=0.0,   help="simulated Supabase round-trip")
+    p.add_argument("--bcrypt-rounds", type=int,   default=10)
+    p.add_argument("--scenarios",     default=",".join(SCENARIOS))
+    p.add_argument("--seed",          type=int,   default=42)
+    p.add_argument("--output")
+    p.add_argument("--compare")
+    return p.parse_args()
+
+
+def configure_env(args):
+    # Must happen before anything imports config
+    os.environ.update({
+        "DATA_BACKEND":      "memory",
+        "STORAGE_BACKEND":   "local",
+        "MEMORY_LATENCY_MS": str(args.latency_ms),
+        "BCRYPT_ROUNDS":     str(args.bcrypt_rounds),
+        "HASH_MAX_QUEUE":    str(max(args.concurrency, 32)),
+        "NOTIFY_WORKERS":    "0",            # emails just queue up; no SMTP in benchmarks
+        "NOTIFY_QUEUE_SIZE": "10000000",
+        "SEARCH_INDEX_FILE": "",             # always build the index, never write a snapshot
+        "RATE_LIMIT_ENABLED": "false",       # one client hammering on purpose
+    })
+
+
+def git_sha() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+# ─── SEEDING ───────────────────────────────────────────────
+def seed(repo, args, rng: random.Random) -> dict:
+    import bcrypt
+    from models import SUBMITTED_STATUS_ID, IN_PROGRESS_STATUS_ID, RESOLVED_STATUS_ID, REJECTED_STATUS_ID
+
+    departments = [f"dept-{i}" for i in range(args.departments)]
+    categories  = [f"cat-{i}" for i in range(args.categories)]
+    repo.seed({
+        "departments": [
+            {"department_id": d, "department_name": f"Department {i}", "contact_email": f"{d}@city.example"}
+            for i, d in enumerate(departments)
+        ],
+        "categories": [{"category_id": c, "category_name": f"Category {i}"} for i, c in enumerate(categories)],
+    })
+
+    # One hash shared by every user keeps seeding fast; login still pays full bcrypt cost
+    hashed  = bcrypt.hashpw(PASSWORD.encode(), bcrypt.gensalt(args.bcrypt_rounds)).decode()
+    staff   = min(args.users // 10, args.departments * 5)
+    users   = []
+    for i in range(args.users):
+        is_staff = i < staff
+        users.append(repo.add_user({
+            "full_name":     f"User {i}",
+            "email":         f"user{i}@bench.example",
+            "password":      hashed,
+            "role_id":       "role-department" if is_staff else "role-citizen",
+            "role_name":     "department" if is_staff else "citizen",
+            "department_id": departments[i % len(departments)] if is_staff else None,
+            "is_approved":   True,
+        })["user_id"])
+    citizens = users[staff:] or users
+
+    statuses = [SUBMITTED_STATUS_ID] * 5 + [IN_PROGRESS_STATUS_ID] * 3 + [RESOLVED_STATUS_ID] * 6 + [REJECTED_STATUS_ID]
+    start    = datetime.now(timezone.utc) - timedelta(days=365)
+    step     = timedelta(days=365) / max(args.issues, 1)
+    for i in range(args.issues):
+        repo.add_issue({
+            "title":             f"Issue {i}",
+            "description":       "Streetlight out near the junction, reported by several residents.",
+            "category_id":       rng.choice(categories),
+            "department_id":     rng.choice(departments),
+            "location_id":       f"loc-{rng.randrange(10_000)}",
+            "user_id":           rng.choice(citizens),
+            "current_status_id": rng.choice(statuses),
+            "created_at":        (start + step * i).isoformat(),
+        })
+
+    return {"departments": departments, "categories": categories, "users": users, "citizens": citizens}
+
+
+# ─── SCENARIOS ─────────────────────────────────────────────
+def make_request(name: str, data: dict, rng: random.Random, state: dict):
+    """Return (method, url, kwargs) for one request of scenario `name`."""
+    if name == "login":
+        i = rng.randrange(len(data["users"]))
+        return "POST", "/login", {"json": {"email": f"user{i}@bench.example", "password": PASSWORD}}
+    if name == "create-issue":
+        return "POST", "/create-issue", {"json": {
+            "title":             "Pothole on main road",
+            "description":       "Deep pothole in the left lane, about half a metre wide.",
+            "category_id":       rng.choice(data["categories"]),
+            "department_id":     rng.choice(data["departments"]),
+            "location_id":       f"loc-{rng.randrange(10_000)}",
+            "user_id":           rng.choice(data["citizens"]),
+            "current_status_id": "ignored",
+            "remarks":           "",
+            "images":            [f"https://img.example/{rng.randrange(10**6)}.jpg" for _ in range(rng.randrange(4))],
+        }}
+    if name == "dept-issues":
+        return "GET", f"/dept/issues/{rng.choice(data['departments'])}", {"params": {"tab": "active", "limit": 50}}
+    if name == "my-issues":
+        return "GET", f"/my-issues/{rng.choice(data['citizens'])}", {"params": {"limit": 50}}
+    if name == "all-issues":
+        # Each worker keeps paging deeper through the admin view
+        params = {"cursor": state["cursor"]} if state.get("cursor") else {"limit": 50}
+        return "GET", "/admin/all-issues", {"params": params}
+    if name == "search":
+        params = {"q": rng.choice(SEARCH_TERMS)}
+        if rng.random() < 0.5:
+            params["department_id"] = rng.choice(data["departments"])
+        return "GET", "/search/issues", {"params": params}
+    raise ValueError(f"Unknown scenario '{name}'")
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[k]
+
+
+async def run_scenario(client, repo, name: str, data: dict, args, rng: random.Random) -> dict:
+    latencies = []
+    errors    = 0
+    remaining = args.requests
+
+    async def worker(worker_id: int):
+        nonlocal remaining, errors
+        state = {}
+        while remaining > 0:
+            remaining -= 1
+            method, url, kwargs = make_request(name, data, rng, state)
+            started  = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+            body = response.json() if response.headers.get("content-type", "").startswith("application/json") else {}
+            if response.status_code >= 400 or (isinstance(body, dict) and "error" in body):
+                errors += 1
+            if name == "all-issues" and isinstance(body, dict):
+                state["cursor"] = body.get("next_cursor")
+
+    trips_before = repo.round_trips
+    started      = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(args.concurrency)))
+    elapsed      = time.perf_counter() - started
+    trips        = repo.round_trips - trips_before
+
+    latencies.sort()
+    return {
+        "requests":               len(latencies),
+        "errors":                 errors,
+        "p50_ms":                 round(percentile(latencies, 50), 3),
+        "p95_ms":                 round(percentile(latencies, 95), 3),
+        "p99_ms":                 round(percentile(latencies, 99), 3),
+        "mean_ms":                round(sum(latencies) / max(len(latencies), 1), 3),
+        "throughput_rps":         round(len(latencies) / elapsed, 1),
+        "round_trips_per_request": round(trips / max(len(latencies), 1), 2),
+    }
+
+
+async def run(args) -> dict:
+    import httpx
+    import main
+    from auth import issue_tokens
+    from services.supabase_service import repo
+
+    rng = random.Random(args.seed)
+    print(f"Seeding {args.issues} issues, {args.departments} departments, {args.users} users ...")
+    t0   = time.perf_counter()
+    data = seed(repo, args, rng)
+    print(f"Seeded in {time.perf_counter() - t0:.1f}s")
+
+    results   = {}
+    transport = httpx.ASGITransport(app=main.app)
+    async with main.app.router.lifespan_context(main.app):
+        if "search" in args.scenarios:
+            t0 = time.perf_counter()
+            while not main.search_index.ready:
+                await asyncio.sleep(0.1)
+            print(f"Search index built in {time.perf_counter() - t0:.1f}s")
+        # Staff and admin routes always need a token; an admin one opens every scenario
+        token   = issue_tokens({"user_id": "bench-admin", "role": "admin"})["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers, timeout=60) as client:
+            for name in args.scenarios.split(","):
+                results[name] = await run_scenario(client, repo, name.strip(), data, args, rng)
+                r = results[name]
+                print(
+                    f"{name:<14} p50 {r['p50_ms']:>8.2f} ms  p95 {r['p95_ms']:>8.2f} ms  "
+                    f"p99 {r['p99_ms']:>8.2f} ms  {r['throughput_rps']:>8.1f} req/s  "
+                    f"{r['round_trips_per_request']:>5.2f} trips/req  {r['errors']} errors"
+                )
+    return results
+
+
+def compare(results: dict, baseline_path: str):
+    with open(baseline_path) as f:
+        baseline = json.load(f)["scenarios"]
+    print(f"\nChange vs {baseline_path}:")
+    for name, r in results.items():
+        old = baseline.get(name)
+        if not old:
+            continue
+        parts = []
+        for metric in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps", "round_trips_per_request"):
+            if old.get(metric):
+                parts.append(f"{metric} {100 * (r[metric] - old[metric]) / old[metric]:+.1f}%")
+        print(f"{name:<14} " + "  ".join(parts))
+
+
+def main():
+    args = parse_args()
+    configure_env(args)
+    results = asyncio.run(run(args))
+
+    sha    = git_sha()
+    output = args.output or os.path.join(ROOT, "bench", "results", f"{sha}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({
+            "commit":    sha,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "config":    {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+            "scenarios": results,
+        }, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import multiprocessing
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _bool(name: str, default: str) -> bool:
+    return os.getenv(name, default).strip().lower() in ("1", "true", "yes", "on")
+
+
+def _rate(name: str, default: str) -> tuple:
+    # "requests/seconds", e.g. "10/60"
+    count, period = os.getenv(name, default).split("/")
+    return int(count), float(period)
+
+
+def _set(name: str, default: str = "") -> frozenset:
+    return frozenset(v.strip() for v in os.getenv(name, default).split(",") if v.strip())
+
+
+# ─── DATA BACKEND ──────────────────────────────────────────
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+
+DATA_BACKEND         = os.getenv("DATA_BACKEND", "supabase")    # supabase | memory
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "50"))
+HTTP_TIMEOUT         = float(os.getenv("HTTP_TIMEOUT", "10"))
+MEMORY_SEED_FILE     = os.getenv("MEMORY_SEED_FILE")              # JSON tables for DATA_BACKEND=memory
+MEMORY_LATENCY_MS    = float(os.getenv("MEMORY_LATENCY_MS", "0"))  # simulated round-trip to Supabase
+
+
+# ─── SMTP / NOTIFICATIONS ──────────────────────────────────
+GMAIL_USER = os.getenv("GMAIL_USER")
+GMAIL_PASS = os.getenv("GMAIL_PASS")
+
+SMTP_HOST      = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT      = int(os.getenv("SMTP_PORT", "465"))
+SMTP_SSL       = _bool("SMTP_SSL", "true")
+SMTP_USER      = os.getenv("SMTP_USER", GMAIL_USER or "")
+SMTP_PASS      = os.getenv("SMTP_PASS", GMAIL_PASS or "")
+SMTP_SENDER    = os.getenv("SMTP_SENDER", SMTP_USER)
+SMTP_TIMEOUT   = float(os.getenv("SMTP_TIMEOUT", "10"))
+SMTP_IDLE_SECS = float(os.getenv("SMTP_IDLE_SECS", "60"))
+
+NOTIFY_WORKERS      = int(os.getenv("NOTIFY_WORKERS", "2"))
+NOTIFY_QUEUE_SIZE   = int(os.getenv("NOTIFY_QUEUE_SIZE", "1000"))
+NOTIFY_MAX_RETRIES  = int(os.getenv("NOTIFY_MAX_RETRIES", "5"))
+NOTIFY_BACKOFF_SECS = float(os.getenv("NOTIFY_BACKOFF_SECS", "2"))
+NOTIFY_BACKOFF_MAX  = float(os.getenv("NOTIFY_BACKOFF_MAX", "300"))
+NOTIFY_DEAD_LETTERS = int(os.getenv("NOTIFY_DEAD_LETTERS", "500"))
+
+# New-issue emails for these departments ("*" = all) are batched into one
+# digest per window; urgent categories are always sent straight away
+DIGEST_DEPARTMENTS       = _set("DIGEST_DEPARTMENTS")
+DIGEST_WINDOW_SECS       = float(os.getenv("DIGEST_WINDOW_SECS", "900"))
+DIGEST_MAX_ISSUES        = int(os.getenv("DIGEST_MAX_ISSUES", "50"))     # send early once a digest is this long
+DIGEST_URGENT_CATEGORIES = _set("DIGEST_URGENT_CATEGORIES")
+
+# ─── AUTH TOKENS ───────────────────────────────────────────
+AUTH_SECRET       = os.getenv("AUTH_SECRET")                           # HS256 signing key, shared by all workers
+AUTH_REQUIRED     = _bool("AUTH_REQUIRED", "false")                    # citizen routes too; staff and admin always need one
+ACCESS_TOKEN_TTL  = float(os.getenv("ACCESS_TOKEN_TTL", "900"))
+REFRESH_TOKEN_TTL = float(os.getenv("REFRESH_TOKEN_TTL", str(14 * 24 * 3600)))
+
+# ─── ADMISSION CONTROL ─────────────────────────────────────
+# Per-client limits on the expensive POST routes, as "requests/seconds"
+RATE_LIMIT_ENABLED      = _bool("RATE_LIMIT_ENABLED", "true")
+RATE_LIMIT_BACKEND      = os.getenv("RATE_LIMIT_BACKEND", "local")                   # local | redis
+RATE_LIMIT_REDIS_URL    = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+RATE_LIMIT_TRUST_PROXY  = _bool("RATE_LIMIT_TRUST_PROXY", "false")                   # key clients by X-Forwarded-For
+RATE_LIMIT_MAX_KEYS     = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))            # local buckets kept
+RATE_LIMIT_LOGIN        = _rate("RATE_LIMIT_LOGIN", "10/60")
+RATE_LIMIT_SIGNUP       = _rate("RATE_LIMIT_SIGNUP", "5/600")
+RATE_LIMIT_CREATE_ISSUE = _rate("RATE_LIMIT_CREATE_ISSUE", "20/600")
+RATE_LIMIT_UPLOAD       = _rate("RATE_LIMIT_UPLOAD", "60/600")
+ADMISSION_MAX_INFLIGHT  = int(os.getenv("ADMISSION_MAX_INFLIGHT", "64"))              # per worker; 0 = no cap
+
+# ─── IDEMPOTENCY KEYS ──────────────────────────────────────
+IDEMPOTENCY_TTL         = float(os.getenv("IDEMPOTENCY_TTL", str(24 * 3600)))    # how long a key is remembered
+IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "50000"))
+
+# ─── LISTINGS ──────────────────────────────────────────────
+PAGE_DEFAULT_LIMIT = int(os.getenv("PAGE_DEFAULT_LIMIT", "50"))
+PAGE_MAX_LIMIT     = int(os.getenv("PAGE_MAX_LIMIT", "200"))
+
+# ─── ADMIN EXPORTS ─────────────────────────────────────────
+EXPORT_SCAN_BATCH  = int(os.getenv("EXPORT_SCAN_BATCH", "1000"))     # rows per keyset read
+EXPORT_CHUNK_BYTES = int(os.getenv("EXPORT_CHUNK_BYTES", "65536"))   # response chunk size
+
+# ─── PASSWORD HASHING ──────────────────────────────────────
+BCRYPT_ROUNDS  = int(os.getenv("BCRYPT_ROUNDS", "12"))
+HASH_WORKERS   = int(os.getenv("HASH_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+HASH_MAX_QUEUE = int(os.getenv("HASH_MAX_QUEUE", "32"))
+
+# Start method for the hashing and thumbnail process pools. Never "fork":
+# the server already has threads (mail workers, scans) and locks to copy.
+POOL_START_METHOD = os.getenv(
+    "POOL_START_METHOD", "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn",
+)
+
+# ─── REFERENCE DATA CACHE ──────────────────────────────────
+REFERENCE_TTL     = float(os.getenv("REFERENCE_TTL", "300"))
+REFERENCE_MAX_AGE = int(os.getenv("REFERENCE_MAX_AGE", "60"))
+RECIPIENT_TTL     = float(os.getenv("RECIPIENT_TTL", "900"))     # department contact + staff emails
+
+# ─── ISSUE CREATION ────────────────────────────────────────
+CREATE_ISSUE_BUDGET_MS = float(os.getenv("CREATE_ISSUE_BUDGET_MS", "300"))
+
+# ─── BULK STATUS UPDATES ───────────────────────────────────
+BULK_MAX_ISSUES = int(os.getenv("BULK_MAX_ISSUES", "1000"))
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "200"))     # issues per RPC / transaction
+
+# ─── IMAGE UPLOADS ─────────────────────────────────────────
+STORAGE_BACKEND   = os.getenv("STORAGE_BACKEND", "supabase")     # supabase | local
+STORAGE_BUCKET    = os.getenv("STORAGE_BUCKET", "issue-images")
+LOCAL_STORAGE_DIR = os.getenv("LOCAL_STORAGE_DIR", "media")
+LOCAL_STORAGE_URL = os.getenv("LOCAL_STORAGE_URL", "http://localhost:8000/media")
+
+UPLOAD_MAX_BYTES  = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(64 * 1024)))
+THUMBNAIL_SIZE    = int(os.getenv("THUMBNAIL_SIZE", "320"))
+THUMBNAIL_WORKERS = int(os.getenv("THUMBNAIL_WORKERS", "1"))
+
+# ─── OBSERVABILITY ─────────────────────────────────────────
+LOG_LEVEL       = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT      = os.getenv("LOG_FORMAT", "json")                  # json | text
+LOG_HOT_PATHS   = _bool("LOG_HOT_PATHS", "true")                   # per-request logs on listing endpoints
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.1"))       # share of hot-path logs kept
+METRICS_ENABLED = _bool("METRICS_ENABLED", "true")
+
+# ─── DEPARTMENT DASHBOARD ──────────────────────────────────
+DASHBOARD_RECONCILE_SECS = float(os.getenv("DASHBOARD_RECONCILE_SECS", "600"))
+DASHBOARD_SCAN_BATCH     = int(os.getenv("DASHBOARD_SCAN_BATCH", "1000"))
+
+# ─── SLA / RESOLUTION TIMES ────────────────────────────────
+# SLA_CATEGORY_HOURS overrides the default per category: "category_id=hours,..."
+SLA_DEFAULT_HOURS   = float(os.getenv("SLA_DEFAULT_HOURS", "72"))
+SLA_CATEGORY_HOURS  = {k.strip(): float(v) for k, v in (p.split("=", 1) for p in _set("SLA_CATEGORY_HOURS"))}
+SLA_SKETCH_ACCURACY = float(os.getenv("SLA_SKETCH_ACCURACY", "0.01"))   # relative error of p50/p90
+SLA_SCAN_BATCH      = int(os.getenv("SLA_SCAN_BATCH", "1000"))
+SLA_MAX_BREACHES    = int(os.getenv("SLA_MAX_BREACHES", "500"))        # breaching issues listed per request
+
+# ─── ISSUE HOTSPOTS ────────────────────────────────────────
+HOTSPOT_MIN_ZOOM       = int(os.getenv("HOTSPOT_MIN_ZOOM", "8"))     # map zooms kept precomputed
+HOTSPOT_MAX_ZOOM       = int(os.getenv("HOTSPOT_MAX_ZOOM", "18"))
+HOTSPOT_RECONCILE_SECS = float(os.getenv("HOTSPOT_RECONCILE_SECS", "600"))
+HOTSPOT_SCAN_BATCH     = int(os.getenv("HOTSPOT_SCAN_BATCH", "1000"))
+
+# ─── LIVE EVENTS ───────────────────────────────────────────
+EVENTS_BACKEND        = os.getenv("EVENTS_BACKEND", "local")               # local | redis
+EVENTS_REDIS_URL      = os.getenv("EVENTS_REDIS_URL", "redis://localhost:6379/0")
+EVENTS_CHANNEL        = os.getenv("EVENTS_CHANNEL", "r2r:issue-events")
+EVENTS_REPLAY_SIZE    = int(os.getenv("EVENTS_REPLAY_SIZE", "1000"))        # recent events kept for Last-Event-ID
+EVENTS_CLIENT_QUEUE   = int(os.getenv("EVENTS_CLIENT_QUEUE", "100"))        # per-stream backlog before cut-off
+EVENTS_HEARTBEAT_SECS = float(os.getenv("EVENTS_HEARTBEAT_SECS", "15"))
+EVENTS_RETRY_MS       = int(os.getenv("EVENTS_RETRY_MS", "3000"))           # browser reconnect delay
+
+# ─── ISSUE SEARCH ──────────────────────────────────────────
+SEARCH_INDEX_FILE      = os.getenv("SEARCH_INDEX_FILE", "search_index.pkl")  # empty = never persisted
+SEARCH_MAX_POSTINGS    = int(os.getenv("SEARCH_MAX_POSTINGS", "40000"))     # per-query scoring budget
+SEARCH_MAX_SCAN        = int(os.getenv("SEARCH_MAX_SCAN", "200000"))    # postings a filtered query may read
+SEARCH_SCAN_BATCH      = int(os.getenv("SEARCH_SCAN_BATCH", "1000"))
+SEARCH_CATCHUP_OVERLAP = float(os.getenv("SEARCH_CATCHUP_OVERLAP", "300"))  # secs re-read before the snapshot
+SEARCH_MAX_LIMIT       = int(os.getenv("SEARCH_MAX_LIMIT", "100"))
+
+# ─── DUPLICATE DETECTION ───────────────────────────────────
+DUPLICATE_MODE         = os.getenv("DUPLICATE_MODE", "flag")          # off | flag | merge
+DUPLICATE_THRESHOLD    = float(os.getenv("DUPLICATE_THRESHOLD", "0.6"))  # estimated Jaccard similarity
+DUPLICATE_PERMUTATIONS = int(os.getenv("DUPLICATE_PERMUTATIONS", "64"))
+DUPLICATE_BANDS        = int(os.getenv("DUPLICATE_BANDS", "16"))
+DUPLICATE_WINDOW_DAYS  = float(os.getenv("DUPLICATE_WINDOW_DAYS", "30"))
+DUPLICATE_MAX_ENTRIES  = int(os.getenv("DUPLICATE_MAX_ENTRIES", "100000"))
+DUPLICATE_BUCKET_CAP   = int(os.getenv("DUPLICATE_BUCKET_CAP", "32"))
+DUPLICATE_SCAN_BATCH   = int(os.getenv("DUPLICATE_SCAN_BATCH", "1000"))
@@ -1,10 +1,9 @@
 from supabase import create_client
-import os
-from dotenv import load_dotenv
+import config
 
-load_dotenv()
-
-supabase = create_client(
-    os.getenv("SUPABASE_URL"),
-    os.getenv("SUPABASE_KEY")
+# Only Supabase Storage still goes through this client; table access lives in
+# services/supabase_service.py. Left unset when running without Supabase.
+supabase = (
+    create_client(config.SUPABASE_URL, config.SUPABASE_KEY)
+    if config.SUPABASE_URL and config.SUPABASE_KEY else None
 )
@@ -0,0 +1,98 @@
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Query
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+import config
+from auth import decode_token
+
+_bearer = HTTPBearer(auto_error=False)
+
+
+def _claims(token: Optional[str], required: bool) -> Optional[dict]:
+    if token is None:
+        if required:
+            raise HTTPException(status_code=401, detail="Not authenticated.", headers={"WWW-Authenticate": "Bearer"})
+        return None
+    return decode_token(token)
+
+
+# Everything here is async so FastAPI doesn't hand these cheap checks to its
+# threadpool, and none of them touch the database.
+async def current_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(_bearer)) -> Optional[dict]:
+    """Claims of the caller's access token, for citizen routes.
+
+    None when no token was sent and AUTH_REQUIRED is off, so existing clients
+    keep working while the frontend moves to tokens. A token that is sent is
+    always verified.
+    """
+    return _claims(credentials.credentials if credentials else None, config.AUTH_REQUIRED)
+
+
+async def authenticated_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(_bearer)) -> dict:
+    """Claims of the caller's access token; staff and admin routes always need one."""
+    return _claims(credentials.credentials if credentials else None, True)
+
+
+# Browsers' EventSource can't send an Authorization header, so the event
+# streams also take `?access_token=`. The header wins when both are present.
+async def stream_user(
+    credentials:  Optional[HTTPAuthorizationCredentials] = Depends(_bearer),
+    access_token: Optional[str] = Query(None),
+) -> Optional[dict]:
+    """`current_user` for event streams."""
+    return _claims(credentials.credentials if credentials else access_token, config.AUTH_REQUIRED)
+
+
+async def authenticated_stream_user(
+    credentials:  Optional[HTTPAuthorizationCredentials] = Depends(_bearer),
+    access_token: Optional[str] = Query(None),
+) -> dict:
+    """`authenticated_user` for event streams."""
+    return _claims(credentials.credentials if credentials else access_token, True)
+
+
+def require_role(*roles: str, source=authenticated_user):
+    async def check(user: dict = Depends(source)) -> dict:
+        if user["role"] not in roles:
+            raise HTTPException(status_code=403, detail="Not allowed for this role.")
+        return user
+    return check
+
+
+admin_only   = require_role("admin")
+staff_only   = require_role("department", "admin")
+stream_staff = require_role("department", "admin", source=authenticated_stream_user)
+
+
+def check_department(user: dict, department_id: str):
+    if user["role"] != "admin" and user.get("department_id") != department_id:
+        raise HTTPException(status_code=403, detail="Not allowed for this department.")
+
+
+async def department_access(department_id: str, user: dict = Depends(staff_only)) -> dict:
+    """For /dept/... routes with a `department_id` path parameter."""
+    check_department(user, department_id)
+    return user
+
+
+def check_self(user: Optional[dict], user_id: str):
+    if user is not None and user["role"] != "admin" and user["sub"] != user_id:
+        raise HTTPException(status_code=403, detail="Not allowed for this user.")
+
+
+async def self_access(user_id: str, user: Optional[dict] = Depends(current_user)) -> Optional[dict]:
+    """For routes with a `user_id` path parameter: that user, or an admin."""
+    check_self(user, user_id)
+    return user
+
+
+# Same checks for the event streams, with the token allowed in the query
+async def department_stream_access(department_id: str, user: dict = Depends(stream_staff)) -> dict:
+    check_department(user, department_id)
+    return user
+
+
+async def self_stream_access(user_id: str, user: Optional[dict] = Depends(stream_user)) -> Optional[dict]:
+    check_self(user, user_id)
+    return user
@@ -1,18 +1,82 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, File, UploadFile, HTTPException, Header, Query, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from supabase import create_client
-from dotenv import load_dotenv
-import bcrypt
+from fastapi.staticfiles import StaticFiles
+import asyncio
+from datetime import datetime
 import os
-import uuid
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from schemas import IssueCreate, UserCreate, UserLogin, DepartmentSignup
-
-load_dotenv()
-
-app = FastAPI()
+import time
+from typing import List, Optional
+import config
+from schemas import IssueCreate, UserCreate, UserLogin, DepartmentSignup, BulkStatusUpdate, TokenRefresh
+from auth import issue_tokens, decode_token, revocations
+from dependencies import (
+    current_user, admin_only, staff_only, department_access, self_access, check_department,
+    department_stream_access, self_stream_access,
+)
+from models import IssueFilter, SUBMITTED_STATUS_ID, RESOLVED_STATUS_ID, REJECTED_STATUS_ID
+from services.lookup_cache import (
+    attach_status, status_name, cached_response,
+    issue_statuses, categories, departments, roles, department_recipients, REFERENCE_CACHES,
+)
+from services.notification_service import notifier
+from services.password_service import hasher
+from services.storage_service import UploadSizeGuard, uploader
+from services.pagination import select_columns, decode_cursor, page
+from services.supabase_service import repo
+from services.log_service import setup_logging, get_logger, hot_log
+from services.metrics import MetricsMiddleware, registry
+from services.dashboard_service import dashboard
+from services.event_bus import bus
+from services.search_service import index as search_index
+from services.duplicate_service import detector
+from services.hotspot_service import hotspots
+from services.digest_service import digests
+from services.sla_service import sla
+from services.rate_limit import AdmissionMiddleware, admission
+from services.idempotency import idempotency, fingerprint
+from services import email_templates, export_service
+
+setup_logging()
+log = get_logger("api")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await repo.start()
+    await bus.start()
+    notifier.start()
+    hasher.start()
+    uploader.start()
+    reconciler = asyncio.create_task(dashboard.run_periodically())
+    gridder    = asyncio.create_task(hotspots.run_periodically())
+    digester   = asyncio.create_task(digests.run())
+    sla_stats  = asyncio.create_task(sla.run())
+    indexer    = asyncio.create_task(search_index.run())
+    warmer     = asyncio.create_task(detector.warm())
+    yield
+    warmer.cancel()
+    indexer.cancel()
+    gridder.cancel()
+    reconciler.cancel()
+    search_index.close()
+    sla_stats.cancel()
+    digester.cancel()
+    await digests.close()
+    uploader.stop()
+    hasher.stop()
+    notifier.stop()
+    await admission.close()
+    await bus.close()
+    await repo.close()
+
+
+app = FastAPI(lifespan=lifespan)
+
+app.add_middleware(UploadSizeGuard)
+app.add_middleware(AdmissionMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,65 +86,44 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-url = os.getenv("SUPABASE_URL")
-key = os.getenv("SUPABASE_KEY")
-supabase = create_client(url, key)
-
-GMAIL_USER = os.getenv("GMAIL_USER")
-GMAIL_PASS = os.getenv("GMAIL_PASS")
-
-# Hard-coded status IDs from your database
-SUBMITTED_STATUS_ID = "85b1cf02-9dde-43e2-82ad-0b3da3fcc6ac"
-IN_PROGRESS_STATUS_ID = "88566c51-6593-4085-8486-88ac7fb15e1f"
-RESOLVED_STATUS_ID = "b86fdd31-d162-41b0-8dc0-823e7f3596b3"
-REJECTED_STATUS_ID = "5ade587e-e51a-4fd1-aa87-411d9268b3a4"
-
-
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+if config.STORAGE_BACKEND == "local":
+    os.makedirs(config.LOCAL_STORAGE_DIR, exist_ok=True)
+    app.mount("/media", StaticFiles(directory=config.LOCAL_STORAGE_DIR), name="media")
 
-def verify_password(password: str, hashed: str) -> bool:
-    return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
 
 def send_email(to_emails: list, subject: str, html: str):
-    try:
-        msg = MIMEMultipart("alternative")
-        msg["Subject"] = subject
-        msg["From"]    = GMAIL_USER
-        msg["To"]      = ", ".join(to_emails)
-        msg.attach(MIMEText(html, "html"))
-
-        with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
-            server.login(GMAIL_USER, GMAIL_PASS)
-            server.sendmail(GMAIL_USER, to_emails, msg.as_string())
-
-        print(f"✅ Email sent to {to_emails}")
-    except Exception as e:
-        print(f"❌ Email failed: {e}")
+    # Queued for the background SMTP workers; never blocks the request
+    if not notifier.enqueue(to_emails, subject, html):
+        log.error("email not queued", extra={"to": to_emails, "subject": subject})
 
 
 # ─────────────────────────────────────────
 @app.get("/")
-def home():
+async def home():
     return {"ok": True}
 
 
+# ─── PROMETHEUS METRICS ────────────────────────────────────
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
 # ─── CITIZEN SIGNUP ───────────────────────────────────────
 @app.post("/signup")
-def signup(user: UserCreate):
+async def signup(user: UserCreate):
     try:
-        existing = supabase.table("app_user").select("user_id").eq("email", user.email).execute()
-        if existing.data:
+        if await repo.email_exists(user.email):
             raise HTTPException(status_code=400, detail="Email already registered.")
 
-        role = supabase.table("role").select("role_id").eq("role_name", "citizen").execute()
-        if not role.data:
+        role = await roles.get("citizen")
+        if not role:
             raise HTTPException(status_code=500, detail="Citizen role not found.")
-        role_id = role.data[0]["role_id"]
+        role_id = role["role_id"]
 
-        hashed = hash_password(user.password)
+        hashed = await hasher.hash(user.password)
 
-        res = supabase.table("app_user").insert({
+        new_user = await repo.insert_user({
             "full_name":   user.full_name,
             "email":       user.email,
             "phone":       user.phone if user.phone else None,
@@ -88,9 +131,8 @@ def signup(user: UserCreate):
             "role_id":     role_id,
             "role_name":   "citizen",
             "is_approved": True,
-        }).execute()
+        })
 
-        new_user = res.data[0]
         return {
             "ok":      True,
             "user_id": new_user["user_id"],
@@ -102,26 +144,25 @@ def signup(user: UserCreate):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Signup error: {e}")
+        log.exception("signup failed")
         return {"error": str(e)}
 
 
 # ─── DEPARTMENT SIGNUP ─────────────────────────────────────
 @app.post("/dept-signup")
-def dept_signup(user: DepartmentSignup):
+async def dept_signup(user: DepartmentSignup):
     try:
-        existing = supabase.table("app_user").select("user_id").eq("email", user.email).execute()
-        if existing.data:
+        if await repo.email_exists(user.email):
             raise HTTPException(status_code=400, detail="Email already registered.")
 
-        role = supabase.table("role").select("role_id").eq("role_name", "department").execute()
-        if not role.data:
+        role = await roles.get("department")
+        if not role:
             raise HTTPException(status_code=500, detail="Department role not found.")
-        role_id = role.data[0]["role_id"]
+        role_id = role["role_id"]
 
-        hashed = hash_password(user.password)
+        hashed = await hasher.hash(user.password)
 
-        supabase.table("app_user").insert({
+        await repo.insert_user({
             "full_name":     user.full_name,
             "email":         user.email,
             "password":      hashed,
@@ -129,30 +170,36 @@ def dept_signup(user: DepartmentSignup):
             "role_name":     "department",
             "department_id": user.department_id,
             "is_approved":   False,
-        }).execute()
+        })
 
         return {"ok": True, "message": "Signup request sent. Wait for admin approval."}
 
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Dept signup error: {e}")
+        log.exception("dept signup failed")
         return {"error": str(e)}
 
 
 # ─── UNIFIED LOGIN ─────────────────────────────────────────
 @app.post("/login")
-def login(user: UserLogin):
+async def login(user: UserLogin):
     try:
-        res = supabase.table("app_user").select("*, role(role_name)").eq("email", user.email).execute()
-        if not res.data:
+        db_user = await repo.get_user_by_email(user.email)
+        if not db_user:
             raise HTTPException(status_code=404, detail="No account found with this email.")
 
-        db_user = res.data[0]
-
-        if not verify_password(user.password, db_user["password"]):
+        if not await hasher.verify(user.password, db_user["password"]):
             raise HTTPException(status_code=401, detail="Incorrect password.")
 
+        # Upgrade hashes made with an older work factor while we have the plaintext
+        if hasher.needs_rehash(db_user["password"]):
+            try:
+                rehashed = await hasher.hash(user.password)
+                await repo.update_user(db_user["user_id"], {"password": rehashed})
+            except Exception as rehash_err:
+                log.warning("rehash failed", extra={"user_id": db_user["user_id"], "error": str(rehash_err)})
+
         role_name = db_user["role"]["role_name"]
         if role_name == "department" and not db_user["is_approved"]:
             raise HTTPException(status_code=403, detail="Account not approved yet. Contact admin.")
@@ -164,382 +211,773 @@ def login(user: UserLogin):
             "email":         db_user["email"],
             "role":          role_name,
             "department_id": db_user.get("department_id"),
+            **issue_tokens({
+                "user_id":       db_user["user_id"],
+                "role":          role_name,
+                "department_id": db_user.get("department_id"),
+            }),
         }
 
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Login error: {e}")
+        log.exception("login failed")
+        return {"error": str(e)}
+
+
+# ─── TOKEN REFRESH / LOGOUT ────────────────────────────────
+@app.post("/auth/refresh")
+async def refresh_tokens(body: TokenRefresh):
+    try:
+        claims = decode_token(body.refresh_token, kind="refresh")
+
+        # Once per access-token lifetime, so role and department changes get
+        # picked up here rather than on every request
+        db_user = await repo.get_user(claims["sub"])
+        if not db_user:
+            raise HTTPException(status_code=401, detail="Invalid token.", headers={"WWW-Authenticate": "Bearer"})
+
+        # Refresh tokens are single-use
+        revocations.revoke_token(claims["jti"], claims["exp"])
+        return {"ok": True, **issue_tokens({
+            "user_id":       db_user["user_id"],
+            "role":          db_user.get("role_name") or claims["role"],
+            "department_id": db_user.get("department_id"),
+        })}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        log.exception("token refresh failed")
         return {"error": str(e)}
 
+@app.post("/auth/logout")
+async def logout(body: TokenRefresh):
+    claims = decode_token(body.refresh_token, kind="refresh")
+    revocations.revoke_token(claims["jti"], claims["exp"])
+    return {"ok": True}
+
 
 # ─── ADMIN: PENDING APPROVALS ──────────────────────────────
-@app.get("/admin/pending-approvals")
-def pending_approvals():
+@app.get("/admin/pending-approvals", dependencies=[Depends(admin_only)])
+async def pending_approvals():
     try:
-        res = supabase.table("app_user").select(
-            "user_id, full_name, email, department_id, created_at, role(role_name)"
-        ).eq("is_approved", False).execute()
-        return res.data
+        return await repo.pending_users()
     except Exception as e:
-        print(f"Pending approvals error: {e}")
+        log.exception("pending approvals failed")
         return {"error": str(e)}
 
 
 # ─── ADMIN: APPROVE ────────────────────────────────────────
-@app.post("/admin/approve/{user_id}")
-def approve_user(user_id: str):
+@app.post("/admin/approve/{user_id}", dependencies=[Depends(admin_only)])
+async def approve_user(user_id: str):
     try:
-        supabase.table("app_user").update(
-            {"is_approved": True}
-        ).eq("user_id", user_id).execute()
+        user = await repo.update_user(user_id, {"is_approved": True})
+        if user and user.get("department_id"):
+            department_recipients.invalidate(user["department_id"])
         return {"ok": True, "message": "User approved."}
     except Exception as e:
-        print(f"Approve error: {e}")
+        log.exception("approve failed")
         return {"error": str(e)}
 
 
 # ─── ADMIN: REJECT ─────────────────────────────────────────
-@app.delete("/admin/reject/{user_id}")
-def reject_user(user_id: str):
+@app.delete("/admin/reject/{user_id}", dependencies=[Depends(admin_only)])
+async def reject_user(user_id: str):
     try:
-        supabase.table("app_user").delete().eq("user_id", user_id).execute()
+        user = await repo.delete_user(user_id)
+        # Outstanding tokens are checked without a database read
+        revocations.revoke_user(user_id)
+        if user and user.get("department_id"):
+            department_recipients.invalidate(user["department_id"])
         return {"ok": True, "message": "User rejected and removed."}
     except Exception as e:
-        print(f"Reject error: {e}")
+        log.exception("reject failed")
         return {"error": str(e)}
 
 
+# ─── ADMIN: NOTIFICATION DEAD LETTERS ──────────────────────
+@app.get("/admin/notifications/dead-letters", dependencies=[Depends(admin_only)])
+async def dead_letters():
+    return {"queue_depth": notifier.queue_depth(), "dead_letters": notifier.dead_letters()}
+
+@app.post("/admin/notifications/retry", dependencies=[Depends(admin_only)])
+async def retry_dead_letters():
+    return {"ok": True, "requeued": notifier.requeue_dead_letters()}
+
+
 # ─── ADMIN: ALL ISSUES ─────────────────────────────────────
-@app.get("/admin/all-issues")
-def all_issues():
+async def list_page(filter: IssueFilter, columns: str, limit: Optional[int], cursor: Optional[str]) -> tuple:
+    """(response, issues) for a listing route.
+
+    Paging is opt-in: with `limit` or `cursor` the response is
+    {"issues", "next_cursor"}; without either it is the bare array of every
+    match these routes have always returned, read in keyset batches.
+    """
+    if limit is None and cursor is None:
+        issues = [row async for row in repo.iter_issues(filter, columns)]
+        result = issues
+    else:
+        limit  = limit or config.PAGE_DEFAULT_LIMIT
+        rows   = await repo.list_issues(filter, columns, decode_cursor(cursor) if cursor else None, limit + 1)
+        result = page(rows, limit)
+        issues = result["issues"]
+
+    # Status names come from the shared cache, not one query per issue
+    await attach_status(issues)
+    return result, issues
+
+@app.get("/admin/all-issues", dependencies=[Depends(admin_only)])
+async def all_issues(
+    limit:  Optional[int] = Query(None, ge=1, le=config.PAGE_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+):
     try:
-        res = supabase.table("issue").select(
-            "issue_id, title, description, created_at, user_id, current_status_id"
-        ).order("created_at", desc=True).execute()
-        
-        issues = res.data
-        
-        # Manually fetch status for each issue
-        for issue in issues:
-            if issue.get("current_status_id"):
-                status_res = supabase.table("issue_status").select(
-                    "status_name"
-                ).eq("status_id", issue["current_status_id"]).execute()
-                
-                if status_res.data:
-                    issue["issue_status"] = {"status_name": status_res.data[0]["status_name"]}
-                else:
-                    issue["issue_status"] = {"status_name": "Unknown"}
-            else:
-                issue["issue_status"] = {"status_name": "Unknown"}
-        
-        return issues
-        
+        columns   = select_columns(fields, ["title", "description", "user_id"])
+        result, _ = await list_page(IssueFilter(), columns, limit, cursor)
+        return result
+
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Admin all issues error: {e}")
+        log.exception("admin all issues failed")
         return {"error": str(e)}
 
 
+# ─── ADMIN: EXPORT ISSUES / HISTORY ────────────────────────
+# Streamed straight from keyset reads, so memory use doesn't grow with the
+# table. created_from is inclusive, created_to exclusive (ISO timestamps).
+def export_response(kind: str, rows, fields: list, fmt: str) -> StreamingResponse:
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.gmtime())
+    return StreamingResponse(
+        export_service.encode(rows, fields, fmt, kind),
+        media_type=export_service.FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{kind}-{stamp}.{fmt}"'},
+    )
+
+def check_range(created_from: Optional[str], created_to: Optional[str]):
+    # Checked up front: once streaming starts the status code is already sent
+    for value in (created_from, created_to):
+        if value:
+            try:
+                datetime.fromisoformat(value.replace("Z", "+00:00"))
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"Invalid timestamp '{value}'.")
+
+@app.get("/admin/export/issues", dependencies=[Depends(admin_only)])
+async def export_issues(
+    format:       str = Query("csv", pattern="^(csv|ndjson)$"),
+    created_from: Optional[str] = None,
+    created_to:   Optional[str] = None,
+):
+    check_range(created_from, created_to)
+    rows = export_service.issue_rows(created_from, created_to)
+    return export_response("issues", rows, export_service.ISSUE_FIELDS, format)
+
+@app.get("/admin/export/history", dependencies=[Depends(admin_only)])
+async def export_history(
+    format:       str = Query("csv", pattern="^(csv|ndjson)$"),
+    created_from: Optional[str] = None,
+    created_to:   Optional[str] = None,
+):
+    check_range(created_from, created_to)
+    rows = export_service.history_rows(created_from, created_to)
+    return export_response("history", rows, export_service.HISTORY_FIELDS, format)
+
+
 # ─── CITIZEN: GET MY ISSUES ────────────────────────────────
-@app.get("/my-issues/{user_id}")
-def my_issues(user_id: str):
+@app.get("/my-issues/{user_id}", dependencies=[Depends(self_access)])
+async def my_issues(
+    user_id: str,
+    limit:   Optional[int] = Query(None, ge=1, le=config.PAGE_MAX_LIMIT),
+    cursor:  Optional[str] = None,
+    fields:  Optional[str] = None,
+):
     try:
-        print(f"📥 Fetching issues for user_id: {user_id}")
-        
-        res = supabase.table("issue").select(
-            "issue_id, title, description, created_at, current_status_id"
-        ).eq("user_id", user_id).order("created_at", desc=True).execute()
-        
-        print(f"✅ Found {len(res.data)} issues")
-        
-        issues = res.data
-        
-        # Manually fetch status for each issue
-        for issue in issues:
-            if issue.get("current_status_id"):
-                status_res = supabase.table("issue_status").select(
-                    "status_name"
-                ).eq("status_id", issue["current_status_id"]).execute()
-                
-                if status_res.data:
-                    status_name = status_res.data[0]["status_name"]
-                    issue["issue_status"] = {"status_name": status_name}
-                    print(f"  Issue '{issue['title']}' → Status: {status_name}")
-                else:
-                    issue["issue_status"] = {"status_name": "Unknown"}
-                    print(f"  Issue '{issue['title']}' → Status: Unknown (no match)")
-            else:
-                issue["issue_status"] = {"status_name": "Unknown"}
-                print(f"  Issue '{issue['title']}' → No current_status_id")
-        
-        return issues
-        
+        columns        = select_columns(fields, ["title", "description"])
+        result, issues = await list_page(IssueFilter(user_id=user_id), columns, limit, cursor)
+
+        hot_log.info("my issues", extra={"user_id": user_id, "count": len(issues)})
+        return result
+
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"❌ My issues error: {e}")
+        log.exception("my issues failed")
         return {"error": str(e)}
 
 
 # ─── DEPARTMENT: GET ISSUES BY TAB ─────────────────────────
-@app.get("/dept/issues/{department_id}")
-def dept_issues(department_id: str, tab: str = "active"):
+@app.get("/dept/issues/{department_id}", dependencies=[Depends(department_access)])
+async def dept_issues(
+    department_id: str,
+    tab:    str = "active",
+    limit:  Optional[int] = Query(None, ge=1, le=config.PAGE_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+):
     try:
-        print(f"📥 Fetching issues for department: {department_id}, tab: {tab}")
-
-        query = supabase.table("issue").select(
-            "issue_id, title, description, created_at, user_id, current_status_id"
-        ).eq("department_id", department_id)
+        columns = select_columns(fields, ["title", "description", "user_id"])
+        filter  = IssueFilter(department_id=department_id)
 
         if tab == "resolved":
-            query = query.eq("current_status_id", RESOLVED_STATUS_ID)
+            filter.status_in = [RESOLVED_STATUS_ID]
         elif tab == "rejected":
-            query = query.eq("current_status_id", REJECTED_STATUS_ID)
+            filter.status_in = [REJECTED_STATUS_ID]
         else:
             # Active = everything except resolved and rejected
-            query = query.not_.in_("current_status_id", [RESOLVED_STATUS_ID, REJECTED_STATUS_ID])
-
-        res = query.order("created_at", desc=True).execute()
-        
-        issues = res.data
-        
-        # Manually fetch status for each issue
-        for issue in issues:
-            if issue.get("current_status_id"):
-                status_res = supabase.table("issue_status").select(
-                    "status_name"
-                ).eq("status_id", issue["current_status_id"]).execute()
-                
-                if status_res.data:
-                    issue["issue_status"] = {"status_name": status_res.data[0]["status_name"]}
-                else:
-                    issue["issue_status"] = {"status_name": "Unknown"}
-            else:
-                issue["issue_status"] = {"status_name": "Unknown"}
-        
-        print(f"✅ Returning {len(issues)} issues for tab '{tab}'")
-        return issues
+            filter.status_not_in = [RESOLVED_STATUS_ID, REJECTED_STATUS_ID]
+
+        result, issues = await list_page(filter, columns, limit, cursor)
+
+        hot_log.info("dept issues", extra={"department_id": department_id, "tab": tab, "count": len(issues)})
+        return result
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        log.exception("dept issues failed")
+        return {"error": str(e)}
 
+
+# ─── DEPARTMENT: DASHBOARD SUMMARY ─────────────────────────
+@app.get("/dept/summary/{department_id}", dependencies=[Depends(department_access)])
+async def dept_summary(department_id: str):
+    if not dashboard.ready():
+        raise HTTPException(
+            status_code=503, detail="Dashboard counters are still loading.", headers={"Retry-After": "5"},
+        )
+    try:
+        summary       = dashboard.summary(department_id)
+        status_rows   = await issue_statuses.rows()
+        category_rows = await categories.rows()
+
+        summary["by_status"] = [
+            {"status_id": s, "status_name": (status_rows.get(s) or {}).get("status_name", "Unknown"), "count": n}
+            for s, n in summary["by_status"].items()
+        ]
+        summary["by_category"] = [
+            {"category_id": c, "category_name": (category_rows.get(c) or {}).get("category_name", "Unknown"), "count": n}
+            for c, n in summary["by_category"].items()
+        ]
+        return summary
     except Exception as e:
-        print(f"❌ Dept issues error: {e}")
+        log.exception("dept summary failed")
         return {"error": str(e)}
 
 
+# ─── DEPARTMENT: SLA / RESOLUTION TIMES ───────────────────
+@app.get("/dept/sla/{department_id}", dependencies=[Depends(department_access)])
+async def dept_sla(department_id: str, limit: int = Query(50, ge=1, le=config.SLA_MAX_BREACHES)):
+    if not sla.ready():
+        raise HTTPException(
+            status_code=503, detail="SLA statistics are still loading.", headers={"Retry-After": "5"},
+        )
+    try:
+        report        = sla.report(department_id, limit)
+        status_rows   = await issue_statuses.rows()
+        category_rows = await categories.rows()
+
+        status_label   = lambda s: (status_rows.get(s) or {}).get("status_name", "Unknown")
+        category_label = lambda c: (category_rows.get(c) or {}).get("category_name", "Unknown")
+        for entry in report["by_category"]:
+            entry["category_name"] = category_label(entry["category_id"])
+            for stats in entry["time_in_status"]:
+                stats["status_name"] = status_label(stats["status_id"])
+        for issue in report["breaching"]["issues"]:
+            issue["category_name"] = category_label(issue["category_id"])
+            issue["status_name"]   = status_label(issue["current_status_id"])
+        return report
+    except Exception as e:
+        log.exception("dept sla failed")
+        return {"error": str(e)}
+
+
+# ─── SEARCH ISSUES ─────────────────────────────────────────
+@app.get("/search/issues")
+async def search_issues(
+    response:      Response,
+    q:             str = Query(..., min_length=1),
+    department_id: Optional[str] = None,
+    status_id:     Optional[str] = None,
+    category_id:   Optional[str] = None,
+    created_from:  Optional[str] = None,
+    created_to:    Optional[str] = None,
+    limit:         int = Query(20, ge=1, le=config.SEARCH_MAX_LIMIT),
+    fields:        Optional[str] = None,
+    user:          dict = Depends(staff_only),
+):
+    # Department staff only ever search their own department
+    if user["role"] != "admin" and department_id is None:
+        department_id = user.get("department_id")
+    check_department(user, department_id)
+
+    if not search_index.ready:
+        raise HTTPException(
+            status_code=503, detail="Search index is still loading.", headers={"Retry-After": "5"},
+        )
+    try:
+        columns = select_columns(fields, ["title", "description", "category_id", "department_id"])
+        started = time.perf_counter()
+        # Scoring is pure CPU; keep it off the event loop
+        hits    = await asyncio.to_thread(search_index.search, q, IssueFilter(
+            department_id=department_id,
+            category_id=category_id,
+            status_in=[status_id] if status_id else [],
+            created_from=created_from,
+            created_to=created_to,
+        ), limit)
+        search_ms = (time.perf_counter() - started) * 1000
+
+        # Ranking comes from the index; the rows themselves from one query
+        rows   = {r["issue_id"]: r for r in await repo.get_issues([issue_id for issue_id, _ in hits], columns)}
+        issues = [{**rows[issue_id], "score": score} for issue_id, score in hits if issue_id in rows]
+        await attach_status(issues)
+
+        response.headers["Server-Timing"] = f"search;dur={search_ms:.1f}"
+        hot_log.info("search issues", extra={"q": q, "hits": len(issues), "search_ms": round(search_ms, 2)})
+        return {"issues": issues}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        log.exception("search issues failed")
+        return {"error": str(e)}
+
+
+# ─── ANALYTICS: ISSUE HOTSPOTS ─────────────────────────────
+# Counts per Web Mercator tile (x, y at `zoom`) for map heatmaps; `bbox` is
+# "west,south,east,north" in degrees to limit the answer to the viewport.
+@app.get("/analytics/hotspots")
+async def issue_hotspots(
+    response:    Response,
+    zoom:        int = Query(..., ge=config.HOTSPOT_MIN_ZOOM, le=config.HOTSPOT_MAX_ZOOM),
+    status_id:   Optional[List[str]] = Query(None),
+    category_id: Optional[List[str]] = Query(None),
+    bbox:        Optional[str] = None,
+):
+    if not hotspots.ready():
+        raise HTTPException(
+            status_code=503, detail="Hotspot grid is still loading.", headers={"Retry-After": "5"},
+        )
+    bounds = None
+    if bbox:
+        try:
+            bounds = tuple(float(v) for v in bbox.split(","))
+        except ValueError:
+            bounds = ()
+        if len(bounds) != 4:
+            raise HTTPException(status_code=400, detail="bbox must be 'west,south,east,north'.")
+    try:
+        started = time.perf_counter()
+        result  = hotspots.cells(zoom, status_id or (), category_id or (), bounds)
+        grid_ms = (time.perf_counter() - started) * 1000
+
+        response.headers["Server-Timing"] = f"grid;dur={grid_ms:.1f}"
+        hot_log.info("issue hotspots", extra={"zoom": zoom, "cells": len(result["cells"]), "grid_ms": round(grid_ms, 2)})
+        return result
+
+    except Exception as e:
+        log.exception("issue hotspots failed")
+        return {"error": str(e)}
+
+
+# ─── LIVE UPDATES (SERVER-SENT EVENTS) ─────────────────────
+# EventSource sends Last-Event-ID itself on reconnect; `last_event_id` lets a
+# fresh page resume from an id it stored. It can't set an Authorization
+# header either, so these routes also accept `?access_token=`
+def event_stream(topic: str, header_id: Optional[str], query_id: Optional[str]) -> StreamingResponse:
+    return StreamingResponse(
+        bus.stream([topic], header_id or query_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/dept/events/{department_id}", dependencies=[Depends(department_stream_access)])
+async def dept_events(
+    department_id: str,
+    last_event_id: Optional[str] = None,
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+):
+    return event_stream(f"department:{department_id}", last_event_id_header, last_event_id)
+
+@app.get("/my-events/{user_id}", dependencies=[Depends(self_stream_access)])
+async def my_events(
+    user_id: str,
+    last_event_id: Optional[str] = None,
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+):
+    return event_stream(f"user:{user_id}", last_event_id_header, last_event_id)
+
+
 # ─── DEPARTMENT: UPDATE ISSUE STATUS ──────────────────────
 @app.post("/dept/update-status/{issue_id}")
-def update_issue_status(issue_id: str, body: dict):
+async def update_issue_status(issue_id: str, body: dict, user: dict = Depends(staff_only)):
     try:
-        print(f"📝 Updating issue {issue_id} to status_id: {body['status_id']}")
-        
-        supabase.table("issue").update({
-            "current_status_id": body["status_id"],
-        }).eq("issue_id", issue_id).execute()
-
-        supabase.table("issue_history").insert({
-            "issue_id":   issue_id,
-            "status_id":  body["status_id"],
-            "updated_by": body.get("updated_by"),
-            "remarks":    body.get("remarks", "Status updated by department"),
-        }).execute()
+        # Update and history row in one call; the updated row comes back with
+        # its previous status, so no re-read is needed. Department staff can
+        # only move their own department's issues; the RPC checks that under
+        # the row lock
+        issue_row = await repo.change_issue_status(
+            issue_id,
+            body["status_id"],
+            updated_by=user["sub"],
+            remarks=body.get("remarks", "Status updated by department"),
+            department_id=None if user["role"] == "admin" else user.get("department_id"),
+        )
+        if not issue_row:
+            raise HTTPException(status_code=404, detail="Issue not found.")
+
+        dashboard.on_status_changed(issue_row, issue_row["previous_status_id"])
+        hotspots.on_status_changed(issue_row, issue_row["previous_status_id"])
+        sla.on_status_changed(issue_row, issue_row["previous_status_id"])
+        search_index.set_status(issue_id, issue_row["current_status_id"])
+        detector.on_status_changed(issue_row)
+        await bus.publish_issue("issue.status_changed", issue_row)
 
         # ── Email citizen about status update ──
         try:
-            issue_row = supabase.table("issue").select(
-                "title, user_id"
-            ).eq("issue_id", issue_id).execute()
-
-            if issue_row.data and issue_row.data[0]["user_id"]:
-                citizen = supabase.table("app_user").select(
-                    "email, full_name"
-                ).eq("user_id", issue_row.data[0]["user_id"]).execute()
-
-                if citizen.data:
-                    status_row = supabase.table("issue_status").select(
-                        "status_name"
-                    ).eq("status_id", body["status_id"]).execute()
-
-                    status_name   = status_row.data[0]["status_name"] if status_row.data else "Updated"
-                    citizen_email = citizen.data[0]["email"]
-                    citizen_name  = citizen.data[0]["full_name"]
-                    issue_title   = issue_row.data[0]["title"]
-
-                    html = f"""
-                        <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-                            <h2 style="color: #3b82f6;">📋 Issue Status Updated</h2>
-                            <p>Hi <strong>{citizen_name}</strong>,</p>
-                            <p>Your issue <strong>"{issue_title}"</strong> has been updated to <strong>{status_name}</strong>.</p>
-                            <br/>
-                            <a href="http://localhost:3000/dashboard"
-                               style="background:#3b82f6; color:white; padding:10px 24px;
-                                      text-decoration:none; border-radius:6px; display:inline-block;">
-                                View Dashboard →
-                            </a>
-                            <br/><br/>
-                            <small style="color:#999;">Report2Resolve — Civic Issue Reporting System</small>
-                        </div>
-                    """
-                    send_email([citizen_email], f"Issue Update: {issue_title}", html)
-        except Exception as notify_err:
-            print(f"Citizen notify error: {notify_err}")
-
-        print(f"✅ Issue {issue_id} updated successfully")
+            if issue_row["user_id"]:
+                citizen = await repo.get_user(issue_row["user_id"])
+
+                if citizen:
+                    new_status    = await status_name(body["status_id"], default="Updated")
+                    citizen_email = citizen["email"]
+                    citizen_name  = citizen["full_name"]
+                    issue_title   = issue_row["title"]
+
+                    subject, html = email_templates.status_update(citizen_name, [issue_title], new_status)
+                    send_email([citizen_email], subject, html)
+        except Exception:
+            log.exception("citizen notify failed", extra={"issue_id": issue_id})
+
+        log.info("issue status updated", extra={"issue_id": issue_id, "status_id": body["status_id"]})
         return {"ok": True}
 
+    except HTTPException:
+        raise
+    except Exception as e:
+        log.exception("update status failed")
+        return {"error": str(e)}
+
+
+# ─── DEPARTMENT: BULK UPDATE ISSUE STATUS ──────────────────
+@app.post("/dept/bulk-update-status")
+async def bulk_update_issue_status(body: BulkStatusUpdate, user: dict = Depends(staff_only)):
+    check_department(user, body.department_id)
+    try:
+        issue_ids = list(body.issue_ids)
+        if body.filter:
+            f = body.filter
+            matches = repo.iter_issues(
+                IssueFilter(
+                    department_id=body.department_id,
+                    category_id=f.category_id,
+                    status_in=f.status_ids or None,
+                    created_from=f.created_from,
+                    created_to=f.created_to,
+                ),
+                "issue_id, created_at",
+                batch=config.BULK_CHUNK_SIZE,
+            )
+            async for row in matches:
+                issue_ids.append(row["issue_id"])
+                if len(issue_ids) > config.BULK_MAX_ISSUES:
+                    break
+            await matches.aclose()
+
+        issue_ids = list(dict.fromkeys(issue_ids))
+        if not issue_ids:
+            raise HTTPException(status_code=400, detail="No issues to update.")
+        if len(issue_ids) > config.BULK_MAX_ISSUES:
+            raise HTTPException(
+                status_code=400, detail=f"At most {config.BULK_MAX_ISSUES} issues can be updated at once.",
+            )
+
+        # One transaction per chunk: the update and every history row together
+        results = {}
+        updated = []
+        for start in range(0, len(issue_ids), config.BULK_CHUNK_SIZE):
+            chunk = issue_ids[start:start + config.BULK_CHUNK_SIZE]
+            try:
+                rows = await repo.change_issue_statuses(
+                    chunk, body.status_id, body.department_id, user["sub"], body.remarks,
+                )
+            except Exception as e:
+                log.exception("bulk status chunk failed", extra={"issues": len(chunk)})
+                for issue_id in chunk:
+                    results[issue_id] = {"issue_id": issue_id, "ok": False, "error": str(e)}
+                continue
+
+            for row in rows:
+                results[row["issue_id"]] = {"issue_id": row["issue_id"], "ok": True}
+                dashboard.on_status_changed(row, row["previous_status_id"])
+                hotspots.on_status_changed(row, row["previous_status_id"])
+                sla.on_status_changed(row, row["previous_status_id"])
+                search_index.set_status(row["issue_id"], row["current_status_id"])
+                detector.on_status_changed(row)
+                await bus.publish_issue("issue.status_changed", row)
+            updated += rows
+
+        for issue_id in issue_ids:
+            results.setdefault(issue_id, {"issue_id": issue_id, "ok": False, "error": "Issue not found in this department."})
+
+        # ── One combined email per citizen ──
+        try:
+            by_citizen = {}
+            for row in updated:
+                if row.get("user_id"):
+                    by_citizen.setdefault(row["user_id"], []).append(row)
+
+            if by_citizen:
+                new_status = await status_name(body.status_id, default="Updated")
+                citizens   = list(by_citizen)
+                # Same chunking as the update itself, so the id filter keeps the URL short
+                for start in range(0, len(citizens), config.BULK_CHUNK_SIZE):
+                    for citizen in await repo.get_users(citizens[start:start + config.BULK_CHUNK_SIZE]):
+                        issues = by_citizen[citizen["user_id"]]
+                        subject, html = email_templates.status_update(
+                            citizen["full_name"], [row["title"] for row in issues], new_status,
+                        )
+                        send_email([citizen["email"]], subject, html)
+        except Exception:
+            log.exception("bulk citizen notify failed", extra={"issues": len(updated)})
+
+        log.info("bulk status update", extra={
+            "department_id": body.department_id, "status_id": body.status_id,
+            "requested": len(issue_ids), "updated": len(updated),
+        })
+        return {
+            "ok":      True,
+            "updated": len(updated),
+            "failed":  len(issue_ids) - len(updated),
+            "results": [results[issue_id] for issue_id in issue_ids],
+        }
+
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"❌ Update status error: {e}")
+        log.exception("bulk update status failed")
         return {"error": str(e)}
 
 
 # ─── GET ALL STATUSES ──────────────────────────────────────
 @app.get("/statuses")
-def get_statuses():
+async def get_statuses(request: Request):
     try:
-        res = supabase.table("issue_status").select("status_id, status_name").execute()
-        return res.data
+        return await cached_response(request, issue_statuses)
     except Exception as e:
-        print(f"Get statuses error: {e}")
+        log.exception("get statuses failed")
         return {"error": str(e)}
 
 
 # ─── CATEGORIES & DEPARTMENTS ──────────────────────────────
 @app.get("/categories")
-def get_categories():
+async def get_categories(request: Request):
     try:
-        res = supabase.table("categories").select("category_id, category_name").execute()
-        return res.data
+        return await cached_response(request, categories)
     except Exception as e:
-        print(f"Get categories error: {e}")
+        log.exception("get categories failed")
         return {"error": str(e)}
 
 @app.get("/departments")
-def get_departments():
+async def get_departments(request: Request):
     try:
-        res = supabase.table("departments").select("department_id, department_name").execute()
-        return res.data
+        return await cached_response(request, departments)
     except Exception as e:
-        print(f"Get departments error: {e}")
+        log.exception("get departments failed")
         return {"error": str(e)}
 
 
+# ─── ADMIN: INVALIDATE REFERENCE CACHES ────────────────────
+@app.post("/admin/cache/invalidate", dependencies=[Depends(admin_only)])
+async def invalidate_caches(name: Optional[str] = None):
+    if name and name not in REFERENCE_CACHES:
+        raise HTTPException(status_code=404, detail=f"Unknown cache '{name}'.")
+    names = [name] if name else list(REFERENCE_CACHES)
+    if name == "departments":
+        # Department edits change contact emails too
+        names.append("recipients")
+    for cache_name in names:
+        REFERENCE_CACHES[cache_name].invalidate()
+    return {"ok": True, "invalidated": names}
+
+
+# ─── IDEMPOTENCY KEYS ──────────────────────────────────────
+# Clients send a fresh Idempotency-Key per logical request and reuse it on
+# retries; a retry gets the first response back instead of a second write.
+# Keys are per caller: the token subject, else the user the body names, else
+# the client address.
+def caller_of(request: Request, user: Optional[dict], user_id: Optional[str] = None) -> str:
+    if user is not None:
+        return f"user:{user['sub']}"
+    if user_id:
+        return f"user:{user_id}"
+    return f"ip:{request.client.host if request.client else ''}"
+
+async def idempotent(route: str, caller: str, key: Optional[str], request_fingerprint: str, response: Response, handler):
+    result, replayed = await idempotency.run(route, caller, key, request_fingerprint, handler)
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
+
+
 # ─── UPLOAD IMAGE ──────────────────────────────────────────
 @app.post("/upload-image")
-async def upload_image(file: UploadFile = File(...)):
+async def upload_image(
+    request:         Request,
+    response:        Response,
+    file:            UploadFile = File(...),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    user:            Optional[dict] = Depends(current_user),
+):
+    # Spooled first so the content hash is part of the fingerprint: another
+    # file under the same key is a 422, not a replay of the first one
+    path, sha = await uploader.spool(file)
     try:
-        file_bytes = await file.read()
-        file_name  = f"{uuid.uuid4()}-{file.filename}"
-        supabase.storage.from_("issue-images").upload(
-            file_name, file_bytes, {"content-type": file.content_type}
+        return await idempotent(
+            "upload-image", caller_of(request, user), idempotency_key,
+            fingerprint(file.filename, file.content_type, sha), response,
+            lambda: _upload_image(path, sha, file.content_type),
         )
-        public_url = supabase.storage.from_("issue-images").get_public_url(file_name)
-        return {"url": public_url}
+    finally:
+        os.unlink(path)
+
+async def _upload_image(path: str, sha: str, content_type: str):
+    try:
+        return await uploader.store(path, sha, content_type)
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Upload image error: {e}")
+        log.exception("upload image failed")
         return {"error": str(e)}
 
 
 # ─── CREATE ISSUE (ALWAYS STARTS AS "SUBMITTED") ──────────────────────────────────────
 @app.post("/create-issue")
-def create_issue(issue: IssueCreate):
+async def create_issue(
+    issue:           IssueCreate,
+    request:         Request,
+    response:        Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    user:            Optional[dict] = Depends(current_user),
+):
+    return await idempotent(
+        "create-issue", caller_of(request, user, issue.user_id), idempotency_key,
+        fingerprint(issue.model_dump_json()), response,
+        lambda: _create_issue(issue, response),
+    )
+
+async def _create_issue(issue: IssueCreate, response: Response):
     try:
-        print(f"📝 Creating new issue: {issue.title}")
-        print(f"🔵 Setting initial status to: Submitted ({SUBMITTED_STATUS_ID})")
-        
-        # ALWAYS use "Submitted" status for new issues
-        issue_data = supabase.table("issue").insert({
-            "title":             issue.title,
-            "description":       issue.description,
-            "category_id":       issue.category_id,
-            "department_id":     issue.department_id,
-            "location_id":       issue.location_id,
-            "user_id":           issue.user_id,
-            "current_status_id": SUBMITTED_STATUS_ID,  # 🔥 ALWAYS "Submitted"
-        }).execute()
-
-        issue_id = issue_data.data[0]["issue_id"]
-
-        # Record in history with "Submitted" status
-        supabase.table("issue_history").insert({
-            "issue_id":   issue_id,
-            "status_id":  SUBMITTED_STATUS_ID,  # 🔥 ALWAYS "Submitted"
-            "updated_by": None,
-            "remarks":    "Issue submitted by citizen",
-        }).execute()
-
-        # Save images
-        for img_url in issue.images:
-            supabase.table("issue_image").insert({
-                "issue_id":  issue_id,
-                "image_url": img_url,
-            }).execute()
+        # ── Probable repeat of a recent open issue at the same place? ──
+        signature = duplicate_of = None
+        remarks   = "Issue submitted by citizen"
+        if config.DUPLICATE_MODE != "off":
+            signature    = detector.signature(issue.title, issue.description)
+            duplicate_of = detector.find(
+                {"category_id": issue.category_id, "department_id": issue.department_id, "location_id": issue.location_id},
+                signature,
+            )
+
+        if duplicate_of and config.DUPLICATE_MODE == "merge":
+            original_id, similarity = duplicate_of
+            original = await repo.add_issue_note(
+                original_id,
+                f"Duplicate report merged (similarity {similarity}): {issue.title}",
+                images=issue.images,
+                updated_by=issue.user_id,
+            )
+            if original:
+                log.info("duplicate report merged", extra={"issue_id": original_id, "similarity": similarity})
+                return {"ok": True, "issue_id": original_id, "merged": True, "duplicate_of": original_id, "similarity": similarity}
+            # The original is gone; file this report as a new issue
+            detector.remove(original_id)
+            duplicate_of = None
+
+        if duplicate_of:
+            remarks = f"Issue submitted by citizen; possible duplicate of {duplicate_of[0]}"
+
+        # Issue, "Submitted" history row and images are written in one
+        # transaction by sql/002_create_issue_with_history.sql
+        started = time.perf_counter()
+        created = await repo.create_issue(
+            {
+                "title":             issue.title,
+                "description":       issue.description,
+                "category_id":       issue.category_id,
+                "department_id":     issue.department_id,
+                "location_id":       issue.location_id,
+                "user_id":           issue.user_id,
+                "current_status_id": SUBMITTED_STATUS_ID,  # 🔥 ALWAYS "Submitted"
+            },
+            images=issue.images,
+            remarks=remarks,
+        )
+        db_ms = (time.perf_counter() - started) * 1000
 
-        # ── Send Email to Department ──
+        issue_id = created["issue_id"]
+
+        # The issue is committed from here on; a failure below must not
+        # turn into an error response, or a retry would file it twice
         try:
-            dept = supabase.table("departments").select(
-                "department_name, contact_email"
-            ).eq("department_id", issue.department_id).execute()
-
-            dept_name  = dept.data[0]["department_name"]
-            dept_email = dept.data[0]["contact_email"]
-
-            staff = supabase.table("app_user").select(
-                "email"
-            ).eq("department_id", issue.department_id).eq("is_approved", True).execute()
-
-            recipients = [dept_email]
-            for s in staff.data:
-                if s["email"] not in recipients:
-                    recipients.append(s["email"])
-
-            if issue.user_id:
-                citizen_res = supabase.table("app_user").select(
-                    "full_name, email"
-                ).eq("user_id", issue.user_id).execute()
-                if citizen_res.data:
-                    submitter_label = f"{citizen_res.data[0]['full_name']} ({citizen_res.data[0]['email']})"
+            dashboard.on_created(created)
+            hotspots.on_created(created)
+            sla.on_created(created)
+            search_index.add(created)
+            if signature is not None:
+                detector.add(created, signature)
+            await bus.publish_issue("issue.created", created)
+        except Exception:
+            log.exception("post-create updates failed", extra={"issue_id": issue_id})
+
+        if duplicate_of:
+            try:
+                await repo.add_issue_note(duplicate_of[0], f"Possible duplicate reported: {issue_id}")
+            except Exception:
+                log.exception("duplicate link failed", extra={"issue_id": issue_id, "duplicate_of": duplicate_of[0]})
+
+        response.headers["Server-Timing"] = (
+            f"db;dur={db_ms:.1f}, budget;dur={config.CREATE_ISSUE_BUDGET_MS:.0f}"
+        )
+        if db_ms > config.CREATE_ISSUE_BUDGET_MS:
+            log.warning("create issue over latency budget", extra={
+                "db_ms": round(db_ms, 1), "budget_ms": config.CREATE_ISSUE_BUDGET_MS,
+            })
+
+        # ── Send Email to Department ──
+        # Probable duplicates are linked to the original instead; its
+        # department has already been told
+        if not duplicate_of:
+            try:
+                if issue.user_id:
+                    citizen = await repo.get_user(issue.user_id)
+                    if citizen:
+                        submitter_label = f"{citizen['full_name']} ({citizen['email']})"
+                    else:
+                        submitter_label = "Registered User"
+                else:
+                    submitter_label = "Guest (not logged in)"
+
+                notice = {"title": issue.title, "description": issue.description, "submitter": submitter_label}
+                if digests.holds(issue.department_id, issue.category_id):
+                    digests.add(issue.department_id, notice)
                 else:
-                    submitter_label = "Registered User"
-            else:
-                submitter_label = "Guest (not logged in)"
-
-            html = f"""
-                <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-                    <h2 style="color: #3b82f6;">🔔 New Issue Reported</h2>
-                    <p>A new issue has been assigned to <strong>{dept_name}</strong>.</p>
-
-                    <table style="width:100%; border-collapse:collapse; margin-top:10px;">
-                        <tr style="background:#f0f4ff;">
-                            <td style="padding:10px; border:1px solid #ddd; width:30%"><strong>Submitted By</strong></td>
-                            <td style="padding:10px; border:1px solid #ddd;">{submitter_label}</td>
-                        </tr>
-                        <tr>
-                            <td style="padding:10px; border:1px solid #ddd;"><strong>Title</strong></td>
-                            <td style="padding:10px; border:1px solid #ddd;">{issue.title}</td>
-                        </tr>
-                        <tr style="background:#f0f4ff;">
-                            <td style="padding:10px; border:1px solid #ddd;"><strong>Description</strong></td>
-                            <td style="padding:10px; border:1px solid #ddd;">{issue.description}</td>
-                        </tr>
-                    </table>
-
-                    <br/>
-                    <p>Please login to your department portal to view and update this issue.</p>
-                    <a href="http://localhost:3000/auth"
-                       style="background:#3b82f6; color:white; padding:10px 24px;
-                              text-decoration:none; border-radius:6px; display:inline-block;">
-                        View Issue →
-                    </a>
-                    <br/><br/>
-                    <small style="color:#999;">Report2Resolve — Civic Issue Reporting System</small>
-                </div>
-            """
-
-            send_email(recipients, f"New Issue: {issue.title}", html)
-
-        except Exception as email_err:
-            print(f"Email error: {email_err}")
-
-        print(f"✅ Issue created successfully with 'Submitted' status: {issue_id}")
+                    dept = await department_recipients.get(issue.department_id)
+                    if not dept:
+                        raise LookupError(f"Unknown department '{issue.department_id}'")
+                    subject, html = email_templates.new_issue(dept["department_name"], notice)
+                    send_email(dept["recipients"], subject, html)
+
+            except Exception:
+                log.exception("department notify failed", extra={"issue_id": issue_id})
+
+        log.info("issue created", extra={"issue_id": issue_id, "department_id": issue.department_id})
+        if duplicate_of:
+            return {"ok": True, "issue_id": issue_id, "duplicate_of": duplicate_of[0], "similarity": duplicate_of[1]}
         return {"ok": True, "issue_id": issue_id}
 
     except Exception as e:
-        print(f"❌ Create issue error: {e}")
+        log.exception("create issue failed")
         return {"error": str(e)}
\ No newline at end of file
@@ -0,0 +1,70 @@
+from dataclasses import dataclass, field
+from typing import List, Optional, TypedDict
+
+# Hard-coded status IDs from your database
+SUBMITTED_STATUS_ID   = "85b1cf02-9dde-43e2-82ad-0b3da3fcc6ac"
+IN_PROGRESS_STATUS_ID = "88566c51-6593-4085-8486-88ac7fb15e1f"
+RESOLVED_STATUS_ID    = "b86fdd31-d162-41b0-8dc0-823e7f3596b3"
+REJECTED_STATUS_ID    = "5ade587e-e51a-4fd1-aa87-411d9268b3a4"
+
+CLOSED_STATUS_IDS = [RESOLVED_STATUS_ID, REJECTED_STATUS_ID]
+
+
+# ─── ROW SHAPES ────────────────────────────────────────────
+class Role(TypedDict, total=False):
+    role_id:   str
+    role_name: str
+
+class User(TypedDict, total=False):
+    user_id:       str
+    full_name:     str
+    email:         str
+    phone:         Optional[str]
+    password:      str
+    role_id:       str
+    role_name:     str
+    department_id: Optional[str]
+    is_approved:   bool
+    created_at:    str
+    role:          Role
+
+class Department(TypedDict, total=False):
+    department_id:   str
+    department_name: str
+    contact_email:   str
+
+class Location(TypedDict, total=False):
+    location_id: str
+    latitude:    float
+    longitude:   float
+
+class Issue(TypedDict, total=False):
+    issue_id:          str
+    title:             str
+    description:       str
+    category_id:       str
+    department_id:     str
+    location_id:       str
+    user_id:           Optional[str]
+    current_status_id: str
+    created_at:        str
+
+class IssueHistory(TypedDict, total=False):
+    history_id: str
+    issue_id:   str
+    status_id:  str
+    updated_by: Optional[str]
+    remarks:    str
+    created_at: str
+
+
+# ─── QUERIES ───────────────────────────────────────────────
+@dataclass
+class IssueFilter:
+    department_id: Optional[str] = None
+    user_id:       Optional[str] = None
+    category_id:   Optional[str] = None
+    status_in:     List[str]     = field(default_factory=list)
+    status_not_in: List[str]     = field(default_factory=list)
+    created_from:  Optional[str] = None    # inclusive, ISO timestamp
+    created_to:    Optional[str] = None    # exclusive, ISO timestamp
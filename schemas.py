@@ -26,4 +26,20 @@ class IssueCreate(BaseModel):
     user_id: Optional[str] = None
     current_status_id: str
     remarks: str
-    images: List[str] = []
\ No newline at end of file
+    images: List[str] = []
+
+class BulkIssueFilter(BaseModel):
+    category_id: Optional[str] = None
+    status_ids: List[str] = []        # current status must be one of these
+    created_from: Optional[str] = None
+    created_to: Optional[str] = None
+
+class BulkStatusUpdate(BaseModel):
+    department_id: str
+    status_id: str
+    issue_ids: List[str] = []
+    filter: Optional[BulkIssueFilter] = None    # matching issues are added to issue_ids
+    remarks: str = "Status updated by department"
+
+class TokenRefresh(BaseModel):
+    refresh_token: str
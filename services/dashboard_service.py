@@ -0,0 +1,188 @@
+import asyncio
+import heapq
+from collections import Counter
+from datetime import datetime, timezone
+
+import config
+from models import IssueFilter, RESOLVED_STATUS_ID, REJECTED_STATUS_ID, CLOSED_STATUS_IDS
+from services.log_service import get_logger
+from services.supabase_service import repo
+
+log = get_logger("dashboard")
+
+SCAN_COLUMNS = "issue_id, created_at, department_id, category_id, current_status_id"
+
+
+def apply_missed(events: list, seen_status: dict, add, move):
+    """Replay write events that raced a full scan on top of its results.
+
+    `events` are ("created", issue, None) / ("moved", issue, old_status) in
+    the order they happened, and `seen_status` the status the scan read for
+    every issue those events touched. An event may or may not be reflected
+    in what the scan read. Issues the scan saw skip their creation and every
+    status change up to the one that produced the status it read;
+    everything else is applied.
+    """
+    skip_until = {}
+    for i, (kind, issue, _) in enumerate(events):
+        seen = seen_status.get(issue["issue_id"])
+        if kind == "moved" and seen == issue["current_status_id"]:
+            skip_until[issue["issue_id"]] = i
+
+    for i, (kind, issue, old_status) in enumerate(events):
+        if kind == "created":
+            if issue["issue_id"] not in seen_status:
+                add(issue)
+        elif i > skip_until.get(issue["issue_id"], -1):
+            move(issue, old_status)
+
+
+class DepartmentTally:
+    """Running counts for one department.
+
+    Only open issues are remembered individually (for the oldest-open age);
+    everything else is plain counters.
+    """
+
+    def __init__(self):
+        self.by_status   = Counter()
+        self.by_category = Counter()
+        self.open        = {}    # issue_id -> created_at
+        self._oldest     = []    # heap of (created_at, issue_id); stale entries skipped lazily
+
+    def add(self, issue: dict):
+        status = issue.get("current_status_id")
+        self.by_status[status] += 1
+        self.by_category[issue.get("category_id")] += 1
+        if status not in CLOSED_STATUS_IDS:
+            self._open(issue["issue_id"], issue["created_at"])
+
+    def move(self, issue: dict, old_status: str):
+        new_status = issue.get("current_status_id")
+        if old_status == new_status:
+            return
+        self.by_status[old_status] -= 1
+        self.by_status[new_status] += 1
+        if new_status in CLOSED_STATUS_IDS:
+            self.open.pop(issue["issue_id"], None)
+        elif old_status in CLOSED_STATUS_IDS:
+            self._open(issue["issue_id"], issue["created_at"])
+
+    def _open(self, issue_id: str, created_at: str):
+        self.open[issue_id] = created_at
+        heapq.heappush(self._oldest, (created_at, issue_id))
+
+    def oldest_open(self):
+        while self._oldest:
+            created_at, issue_id = self._oldest[0]
+            if self.open.get(issue_id) == created_at:
+                return issue_id, created_at
+            heapq.heappop(self._oldest)
+        return None
+
+
+class DashboardCounters:
+    """Per-department issue counts kept up to date by the write endpoints.
+
+    `create_issue` and `update_issue_status` call `on_created` / `on_status_changed`,
+    so reading a summary never touches the issue table. `reconcile()` rebuilds
+    everything with one keyset scan to repair drift (e.g. writes made by other
+    workers or directly in Supabase); events that arrive during the scan are
+    replayed on top of the fresh counts.
+    """
+
+    def __init__(self):
+        self._depts        = {}
+        self._replay       = None    # events seen while a reconcile scan is running
+        self._touched      = set()   # issue ids those events refer to
+        self.reconciled_at = None
+
+    def _tally(self, department_id: str) -> DepartmentTally:
+        tally = self._depts.get(department_id)
+        if tally is None:
+            tally = self._depts[department_id] = DepartmentTally()
+        return tally
+
+    # ── events from the write path ──
+    def on_created(self, issue: dict):
+        self._tally(issue.get("department_id")).add(issue)
+        if self._replay is not None:
+            self._replay.append(("created", issue, None))
+            self._touched.add(issue["issue_id"])
+
+    def on_status_changed(self, issue: dict, old_status: str):
+        self._tally(issue.get("department_id")).move(issue, old_status)
+        if self._replay is not None:
+            self._replay.append(("moved", issue, old_status))
+            self._touched.add(issue["issue_id"])
+
+    # ── reads ──
+    def ready(self) -> bool:
+        return self.reconciled_at is not None
+
+    def summary(self, department_id: str) -> dict:
+        tally     = self._depts.get(department_id) or DepartmentTally()
+        by_status = {s: n for s, n in tally.by_status.items() if n}
+        resolved  = by_status.get(RESOLVED_STATUS_ID, 0)
+        rejected  = by_status.get(REJECTED_STATUS_ID, 0)
+        total     = sum(by_status.values())
+
+        oldest = tally.oldest_open()
+        if oldest:
+            issue_id, created_at = oldest
+            age    = datetime.now(timezone.utc) - datetime.fromisoformat(created_at)
+            oldest = {"issue_id": issue_id, "created_at": created_at, "age_seconds": int(age.total_seconds())}
+
+        return {
+            "department_id":     department_id,
+            "total":             total,
+            "tabs":              {"active": total - resolved - rejected, "resolved": resolved, "rejected": rejected},
+            "by_status":         by_status,
+            "by_category":       {c: n for c, n in tally.by_category.items() if n},
+            "oldest_open_issue": oldest,
+            "reconciled_at":     self.reconciled_at,
+        }
+
+    # ── reconciliation ──
+    async def reconcile(self):
+        self._replay  = []
+        self._touched = set()
+        seen_status   = {}    # status the scan read, only for issues touched mid-scan
+        fresh         = {}
+        try:
+            async for issue in repo.iter_issues(IssueFilter(), SCAN_COLUMNS, batch=config.DASHBOARD_SCAN_BATCH):
+                tally = fresh.get(issue["department_id"])
+                if tally is None:
+                    tally = fresh[issue["department_id"]] = DepartmentTally()
+                tally.add(issue)
+                if issue["issue_id"] in self._touched:
+                    seen_status[issue["issue_id"]] = issue["current_status_id"]
+        except BaseException:
+            self._replay = None
+            raise
+
+        events, self._replay = self._replay, None
+        self._depts = fresh
+        self._apply_missed(events, seen_status)
+        self.reconciled_at = datetime.now(timezone.utc).isoformat()
+
+    def _apply_missed(self, events: list, seen_status: dict):
+        apply_missed(
+            events, seen_status,
+            add=lambda issue: self._tally(issue.get("department_id")).add(issue),
+            move=lambda issue, old_status: self._tally(issue.get("department_id")).move(issue, old_status),
+        )
+
+    async def run_periodically(self, interval: float = config.DASHBOARD_RECONCILE_SECS):
+        while True:
+            try:
+                await self.reconcile()
+                log.info("dashboard counters reconciled", extra={"departments": len(self._depts)})
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.exception("dashboard reconcile failed")
+            await asyncio.sleep(interval)
+
+
+dashboard = DashboardCounters()
@@ -0,0 +1,99 @@
+import asyncio
+import time
+
+import config
+from services.email_templates import new_issue_digest
+from services.log_service import get_logger
+from services.lookup_cache import department_recipients
+from services.metrics import registry
+from services.notification_service import notifier
+
+log = get_logger("digests")
+
+
+class DigestQueue:
+    """New-issue notifications held per department and sent as one email.
+
+    The first issue a department receives opens a `window`-second digest;
+    everything reported until it closes goes out together, so each
+    recipient gets one message per window instead of one per issue. A digest
+    that reaches `max_issues` is sent early. Recipients are resolved when the
+    digest is sent, so staff approved during the window are included.
+
+    Only departments in `departments` ("*" for all) are batched, and issues
+    in `urgent_categories` always bypass the digest.
+    """
+
+    def __init__(
+        self,
+        departments:       frozenset = config.DIGEST_DEPARTMENTS,
+        window:            float     = config.DIGEST_WINDOW_SECS,
+        max_issues:        int       = config.DIGEST_MAX_ISSUES,
+        urgent_categories: frozenset = config.DIGEST_URGENT_CATEGORIES,
+    ):
+        self.departments       = departments
+        self.window            = window
+        self.max_issues        = max_issues
+        self.urgent_categories = urgent_categories
+
+        self._pending = {}    # department_id -> [due_at (monotonic), [issue, ...]]
+        self._wake    = asyncio.Event()
+
+    def holds(self, department_id: str, category_id: str) -> bool:
+        """Whether a new issue for this department and category waits for the digest."""
+        if self.window <= 0 or category_id in self.urgent_categories:
+            return False
+        return "*" in self.departments or department_id in self.departments
+
+    def add(self, department_id: str, issue: dict):
+        """Queue {"title", "description", "submitter"} for the department's next digest."""
+        entry = self._pending.get(department_id)
+        if entry is None:
+            entry = self._pending[department_id] = [time.monotonic() + self.window, []]
+            self._wake.set()
+        entry[1].append(issue)
+        if len(entry[1]) >= self.max_issues:
+            entry[0] = 0.0
+            self._wake.set()
+
+    def pending_count(self) -> int:
+        return sum(len(issues) for _, issues in self._pending.values())
+
+    async def _send(self, department_id: str):
+        _, issues = self._pending.pop(department_id)
+        try:
+            dept = await department_recipients.get(department_id)
+            if not dept:
+                raise LookupError(f"Unknown department '{department_id}'")
+            subject, html = new_issue_digest(dept["department_name"], issues)
+            if not notifier.enqueue(dept["recipients"], subject, html):
+                log.error("digest not queued", extra={"department_id": department_id, "issues": len(issues)})
+                return
+            log.info("digest queued", extra={"department_id": department_id, "issues": len(issues)})
+        except Exception:
+            log.exception("digest failed", extra={"department_id": department_id, "issues": len(issues)})
+
+    async def run(self):
+        while True:
+            self._wake.clear()
+            now = time.monotonic()
+            for department_id in [d for d, (due_at, _) in self._pending.items() if due_at <= now]:
+                await self._send(department_id)
+            if not self._pending:
+                await self._wake.wait()
+                continue
+            next_due = min(due_at for due_at, _ in self._pending.values())
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=max(0.0, next_due - time.monotonic()))
+            except asyncio.TimeoutError:
+                pass
+
+    async def close(self):
+        """Send every open digest now; called on shutdown before the mail workers stop."""
+        for department_id in list(self._pending):
+            await self._send(department_id)
+
+
+digests = DigestQueue()
+
+registry.gauge("notification_digest_pending", "New-issue notifications waiting for their department digest.", digests.pending_count)
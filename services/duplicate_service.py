@@ -0,0 +1,174 @@
+import asyncio
+import hashlib
+import heapq
+import random
+import time
+from array import array
+from datetime import datetime, timedelta, timezone
+
+import config
+from models import IssueFilter, CLOSED_STATUS_IDS
+from services.log_service import get_logger
+from services.search_service import tokenize
+from services.supabase_service import repo
+
+log = get_logger("duplicates")
+
+WARM_COLUMNS = "issue_id, title, description, category_id, department_id, location_id, current_status_id, created_at"
+
+_PRIME = (1 << 61) - 1
+
+
+def _shingles(title: str, description: str) -> set:
+    # Words and word pairs: reports are short, so single words carry most
+    # of the signal and pairs keep word order from being ignored entirely
+    words = tokenize(f"{title} {description}")
+    return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+def _hash(shingle: str) -> int:
+    return int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class DuplicateDetector:
+    """MinHash/LSH index of recent open issues, for spotting repeat reports.
+
+    Each issue gets a `permutations`-long MinHash signature of its title and
+    description shingles, split into `bands`. Issues whose band matches in
+    the same (category, department, location) scope are candidates, and the
+    best candidate whose estimated Jaccard similarity reaches `threshold` is
+    the duplicate. Buckets hold at most `bucket_cap` issues, so a lookup
+    costs the same however many issues are indexed.
+
+    Only open issues from the last `window_days` are kept, capped at
+    `max_entries`; closing an issue or letting it age out removes it.
+    """
+
+    def __init__(
+        self,
+        threshold:    float = config.DUPLICATE_THRESHOLD,
+        permutations: int   = config.DUPLICATE_PERMUTATIONS,
+        bands:        int   = config.DUPLICATE_BANDS,
+        window_days:  float = config.DUPLICATE_WINDOW_DAYS,
+        max_entries:  int   = config.DUPLICATE_MAX_ENTRIES,
+        bucket_cap:   int   = config.DUPLICATE_BUCKET_CAP,
+    ):
+        if permutations % bands:
+            raise ValueError("DUPLICATE_PERMUTATIONS must be a multiple of DUPLICATE_BANDS")
+        self.threshold   = threshold
+        self.bands       = bands
+        self.rows        = permutations // bands
+        self.window      = window_days * 86400
+        self.max_entries = max_entries
+        self.bucket_cap  = bucket_cap
+
+        rng = random.Random(4099)    # fixed, so signatures are comparable across restarts
+        self._perms = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(permutations)]
+
+        self._entries = {}    # issue_id -> (signature, bucket keys)
+        self._buckets = {}    # (scope, band, band hash) -> [issue_id, ...]
+        self._ages    = []    # heap of (created ts, issue_id); stale entries skipped lazily
+
+    # ── signatures ──
+    def signature(self, title: str, description: str) -> array:
+        hashes = [_hash(s) for s in _shingles(title, description)] or [0]
+        return array("Q", (min((a * h + b) % _PRIME for h in hashes) for a, b in self._perms))
+
+    def _bucket_keys(self, scope: tuple, sig: array) -> list:
+        r = self.rows
+        return [(scope, band, hash(tuple(sig[band * r:(band + 1) * r]))) for band in range(self.bands)]
+
+    @staticmethod
+    def scope(issue: dict) -> tuple:
+        return issue.get("category_id"), issue.get("department_id"), issue.get("location_id")
+
+    # ── lookups ──
+    def find(self, issue: dict, sig: array):
+        """(original issue_id, similarity) of the best match, or None."""
+        self._evict()
+        best, best_sim = None, self.threshold
+        seen = set()
+        for key in self._bucket_keys(self.scope(issue), sig):
+            for other in self._buckets.get(key, ()):
+                if other in seen:
+                    continue
+                seen.add(other)
+                other_sig = self._entries[other][0]
+                sim = sum(x == y for x, y in zip(sig, other_sig)) / len(sig)
+                if sim >= best_sim:
+                    best, best_sim = other, sim
+        return (best, round(best_sim, 3)) if best else None
+
+    # ── writes ──
+    def add(self, issue: dict, sig: array = None):
+        issue_id = issue["issue_id"]
+        if issue_id in self._entries or issue.get("current_status_id") in CLOSED_STATUS_IDS:
+            return
+        created = _timestamp(issue.get("created_at"))
+        if time.time() - created > self.window:
+            return
+
+        if sig is None:
+            sig = self.signature(issue.get("title"), issue.get("description"))
+        keys = self._bucket_keys(self.scope(issue), sig)
+        for key in keys:
+            bucket = self._buckets.setdefault(key, [])
+            if len(bucket) >= self.bucket_cap:
+                # Newest reports are the likeliest to be repeated
+                bucket.pop(0)
+            bucket.append(issue_id)
+        self._entries[issue_id] = (sig, keys)
+        heapq.heappush(self._ages, (created, issue_id))
+        self._evict()
+
+    def remove(self, issue_id: str):
+        entry = self._entries.pop(issue_id, None)
+        if entry is None:
+            return
+        for key in entry[1]:
+            bucket = self._buckets.get(key)
+            if bucket and issue_id in bucket:
+                bucket.remove(issue_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def on_status_changed(self, issue: dict):
+        if issue.get("current_status_id") in CLOSED_STATUS_IDS:
+            self.remove(issue["issue_id"])
+
+    def _evict(self):
+        cutoff = time.time() - self.window
+        while self._ages and (self._ages[0][0] < cutoff or len(self._entries) > self.max_entries):
+            _, issue_id = heapq.heappop(self._ages)
+            self.remove(issue_id)
+        # Removed-by-status entries leave heap items behind; don't let them pile up
+        if len(self._ages) > 2 * max(len(self._entries), 1024):
+            self._ages = [(t, i) for t, i in self._ages if i in self._entries]
+            heapq.heapify(self._ages)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ── startup ──
+    async def warm(self):
+        """Index the open issues of the last window, so restarts don't forget them."""
+        since = (datetime.now(timezone.utc) - timedelta(seconds=self.window)).isoformat()
+        rows  = repo.iter_issues(
+            IssueFilter(created_from=since, status_not_in=CLOSED_STATUS_IDS), WARM_COLUMNS, batch=config.DUPLICATE_SCAN_BATCH,
+        )
+        try:
+            async for issue in rows:
+                self.add(issue)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            log.exception("duplicate index warm-up failed")
+            return
+        log.info("duplicate index warmed", extra={"issues": len(self)})
+
+
+def _timestamp(ts: str) -> float:
+    return datetime.fromisoformat(ts.replace("Z", "+00:00")).timestamp() if ts else time.time()
+
+
+detector = DuplicateDetector()
@@ -0,0 +1,126 @@
+from html import escape
+from string import Template
+
+# Parsed once at import; rendering is one substitution per template. Every
+# value is HTML-escaped, since titles and descriptions come from citizens.
+
+PORTAL_URL    = "http://localhost:3000/auth"
+DASHBOARD_URL = "http://localhost:3000/dashboard"
+
+_LAYOUT = Template("""
+    <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
+        <h2 style="color: #3b82f6;">$heading</h2>
+        $body
+        <br/>
+        <a href="$link_url"
+           style="background:#3b82f6; color:white; padding:10px 24px;
+                  text-decoration:none; border-radius:6px; display:inline-block;">
+            $link_text
+        </a>
+        <br/><br/>
+        <small style="color:#999;">Report2Resolve — Civic Issue Reporting System</small>
+    </div>
+""")
+
+_NEW_ISSUE = Template("""
+        <p>A new issue has been assigned to <strong>$department</strong>.</p>
+
+        <table style="width:100%; border-collapse:collapse; margin-top:10px;">
+            <tr style="background:#f0f4ff;">
+                <td style="padding:10px; border:1px solid #ddd; width:30%"><strong>Submitted By</strong></td>
+                <td style="padding:10px; border:1px solid #ddd;">$submitter</td>
+            </tr>
+            <tr>
+                <td style="padding:10px; border:1px solid #ddd;"><strong>Title</strong></td>
+                <td style="padding:10px; border:1px solid #ddd;">$title</td>
+            </tr>
+            <tr style="background:#f0f4ff;">
+                <td style="padding:10px; border:1px solid #ddd;"><strong>Description</strong></td>
+                <td style="padding:10px; border:1px solid #ddd;">$description</td>
+            </tr>
+        </table>
+
+        <br/>
+        <p>Please login to your department portal to view and update this issue.</p>
+""")
+
+_DIGEST = Template("""
+        <p><strong>$count</strong> new issues have been assigned to <strong>$department</strong>.</p>
+
+        <table style="width:100%; border-collapse:collapse; margin-top:10px;">
+            <tr style="background:#f0f4ff;">
+                <td style="padding:8px; border:1px solid #ddd;"><strong>Title</strong></td>
+                <td style="padding:8px; border:1px solid #ddd;"><strong>Submitted By</strong></td>
+                <td style="padding:8px; border:1px solid #ddd;"><strong>Description</strong></td>
+            </tr>$rows
+        </table>
+
+        <br/>
+        <p>Please login to your department portal to view and update these issues.</p>
+""")
+
+_DIGEST_ROW = Template("""
+            <tr>
+                <td style="padding:8px; border:1px solid #ddd;">$title</td>
+                <td style="padding:8px; border:1px solid #ddd;">$submitter</td>
+                <td style="padding:8px; border:1px solid #ddd;">$description</td>
+            </tr>""")
+
+_STATUS_ONE = Template("""
+        <p>Hi <strong>$name</strong>,</p>
+        <p>Your issue <strong>"$title"</strong> has been updated to <strong>$status</strong>.</p>
+""")
+
+_STATUS_MANY = Template("""
+        <p>Hi <strong>$name</strong>,</p>
+        <p>The following issues have been updated to <strong>$status</strong>:</p>
+        <ul>$items</ul>
+""")
+
+
+def _render(heading: str, body: str, link_url: str, link_text: str) -> str:
+    return _LAYOUT.substitute(heading=heading, body=body, link_url=link_url, link_text=link_text)
+
+
+def new_issue(department_name: str, issue: dict) -> tuple:
+    """(subject, html) telling a department about one new issue.
+
+    `issue` holds "title", "description" and "submitter" (a display label).
+    """
+    body = _NEW_ISSUE.substitute(
+        department=escape(department_name),
+        submitter=escape(issue["submitter"]),
+        title=escape(issue["title"]),
+        description=escape(issue["description"]),
+    )
+    return f"New Issue: {issue['title']}", _render("🔔 New Issue Reported", body, PORTAL_URL, "View Issue →")
+
+
+def new_issue_digest(department_name: str, issues: list) -> tuple:
+    """(subject, html) listing the issues a department received in one digest window."""
+    if len(issues) == 1:
+        return new_issue(department_name, issues[0])
+    rows = "".join(
+        _DIGEST_ROW.substitute(
+            title=escape(i["title"]), submitter=escape(i["submitter"]), description=escape(i["description"]),
+        )
+        for i in issues
+    )
+    body = _DIGEST.substitute(count=len(issues), department=escape(department_name), rows=rows)
+    return (
+        f"{len(issues)} new issues for {department_name}",
+        _render("🔔 New Issues Reported", body, PORTAL_URL, "View Issues →"),
+    )
+
+
+def status_update(citizen_name: str, titles: list, new_status: str) -> tuple:
+    """(subject, html) telling a citizen that one or more of their issues moved to `new_status`."""
+    if len(titles) == 1:
+        subject = f"Issue Update: {titles[0]}"
+        body    = _STATUS_ONE.substitute(name=escape(citizen_name), title=escape(titles[0]), status=escape(new_status))
+    else:
+        subject = f"{len(titles)} of your issues are now {new_status}"
+        body    = _STATUS_MANY.substitute(
+            name=escape(citizen_name), status=escape(new_status), items="".join(f"<li>{escape(t)}</li>" for t in titles),
+        )
+    return subject, _render("📋 Issue Status Updated", body, DASHBOARD_URL, "View Dashboard →")
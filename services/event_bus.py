@@ -0,0 +1,245 @@
+import asyncio
+import itertools
+import json
+import os
+import time
+from collections import deque
+
+import config
+from services.log_service import get_logger
+from services.metrics import registry
+
+log = get_logger("events")
+
+dropped_subscribers = registry.counter(
+    "event_subscribers_dropped_total", "Live-update streams cut off for falling behind.",
+)
+
+# What subscribers see of an issue; descriptions stay out of the stream
+EVENT_FIELDS = (
+    "issue_id", "title", "department_id", "category_id", "location_id",
+    "user_id", "current_status_id", "previous_status_id", "created_at",
+)
+
+_CLOSED = object()    # pushed to every subscriber when the bus shuts down
+
+
+def issue_topics(issue: dict) -> list:
+    topics = []
+    if issue.get("department_id"):
+        topics.append(f"department:{issue['department_id']}")
+    if issue.get("user_id"):
+        topics.append(f"user:{issue['user_id']}")
+    return topics
+
+
+# ─── BACKENDS ──────────────────────────────────────────────
+class LocalBackend:
+    """Single worker: published events go straight to this process's subscribers."""
+
+    async def start(self, deliver):
+        self._deliver = deliver
+
+    async def publish(self, event: dict):
+        self._deliver(event)
+
+    async def close(self):
+        pass
+
+
+class RedisBackend:
+    """Fans events out across workers through a Redis pub/sub channel.
+
+    Every worker, the publisher included, receives events from the channel,
+    so all of them see the same sequence and keep the same replay buffer.
+    """
+
+    def __init__(self, url: str = config.EVENTS_REDIS_URL, channel: str = config.EVENTS_CHANNEL):
+        self.url     = url
+        self.channel = channel
+        self._redis  = None
+        self._task   = None
+
+    async def start(self, deliver):
+        import redis.asyncio as redis
+
+        self._redis  = redis.from_url(self.url)
+        pubsub       = self._redis.pubsub()
+        await pubsub.subscribe(self.channel)
+        self._task   = asyncio.create_task(self._listen(pubsub, deliver))
+
+    async def _listen(self, pubsub, deliver):
+        async for message in pubsub.listen():
+            if message["type"] != "message":
+                continue
+            try:
+                deliver(json.loads(message["data"]))
+            except Exception:
+                log.exception("bad event on channel", extra={"channel": self.channel})
+
+    async def publish(self, event: dict):
+        await self._redis.publish(self.channel, json.dumps(event, default=str))
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+
+def make_backend(kind: str = config.EVENTS_BACKEND):
+    if kind == "local":
+        return LocalBackend()
+    if kind == "redis":
+        return RedisBackend()
+    raise ValueError(f"Unknown EVENTS_BACKEND '{kind}'")
+
+
+# ─── BUS ───────────────────────────────────────────────────
+class Subscription:
+    def __init__(self, topics: list, max_queue: int):
+        self.topics     = topics
+        self.queue      = asyncio.Queue(max_queue)
+        self.overflowed = False
+
+    def offer(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class EventBus:
+    """In-process pub/sub for issue events, keyed by topic.
+
+    Publishing never waits on subscribers: each one has a bounded queue, and
+    a client that falls behind is cut off rather than slowing everyone else.
+    Its browser reconnects with Last-Event-ID and catches up from the replay
+    buffer of the most recent `replay_size` events.
+    """
+
+    def __init__(
+        self,
+        backend=None,
+        replay_size: int = config.EVENTS_REPLAY_SIZE,
+        max_queue:   int = config.EVENTS_CLIENT_QUEUE,
+    ):
+        self.backend   = backend or make_backend()
+        self.max_queue = max_queue
+
+        self._recent   = deque(maxlen=replay_size)
+        self._topics   = {}    # topic -> set of Subscription
+        self._ids      = itertools.count(1)
+        self._prefix   = f"{os.getpid():x}"
+
+    async def start(self):
+        await self.backend.start(self._deliver)
+
+    async def close(self):
+        await self.backend.close()
+        for subs in self._topics.values():
+            for sub in subs:
+                sub.offer(_CLOSED)
+
+    # ── publishing ──
+    async def publish(self, kind: str, data: dict, topics: list):
+        event = {
+            # Unique across workers; only ever compared for equality
+            "id":     f"{int(time.time() * 1000):x}-{self._prefix}-{next(self._ids)}",
+            "type":   kind,
+            "topics": topics,
+            "data":   data,
+        }
+        try:
+            await self.backend.publish(event)
+        except Exception:
+            log.exception("event publish failed", extra={"type": kind})
+
+    async def publish_issue(self, kind: str, issue: dict):
+        data = {f: issue[f] for f in EVENT_FIELDS if f in issue}
+        await self.publish(kind, data, issue_topics(issue))
+
+    def _deliver(self, event: dict):
+        self._recent.append(event)
+        seen = set()
+        for topic in event["topics"]:
+            for sub in list(self._topics.get(topic, ())):
+                if sub in seen:
+                    continue
+                seen.add(sub)
+                sub.offer(event)
+                if sub.overflowed:
+                    dropped_subscribers.inc()
+                    self.unsubscribe(sub)
+
+    # ── subscribing ──
+    def subscribe(self, topics: list, last_event_id: str = None) -> tuple:
+        """Return (subscription, missed events, resync).
+
+        `resync` is True when `last_event_id` has already left the replay
+        buffer, so the client has to reload its list instead.
+        """
+        sub = Subscription(topics, self.max_queue)
+        for topic in topics:
+            self._topics.setdefault(topic, set()).add(sub)
+
+        missed, resync = [], False
+        if last_event_id:
+            ids = [e["id"] for e in self._recent]
+            if last_event_id in ids:
+                wanted = set(topics)
+                start  = ids.index(last_event_id) + 1
+                missed = [e for e in list(self._recent)[start:] if wanted.intersection(e["topics"])]
+            else:
+                resync = True
+        return sub, missed, resync
+
+    def unsubscribe(self, sub: Subscription):
+        for topic in sub.topics:
+            subs = self._topics.get(topic)
+            if subs is None:
+                continue
+            subs.discard(sub)
+            if not subs:
+                del self._topics[topic]
+
+    def subscriber_count(self) -> int:
+        return len({sub for subs in self._topics.values() for sub in subs})
+
+    # ── SSE framing ──
+    async def stream(self, topics: list, last_event_id: str = None):
+        """Server-Sent Events for `topics`, starting after `last_event_id`."""
+        sub, missed, resync = self.subscribe(topics, last_event_id)
+        try:
+            yield f"retry: {config.EVENTS_RETRY_MS}\n\n"
+            if resync:
+                yield "event: resync\ndata: {}\n\n"
+            for event in missed:
+                yield _frame(event)
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(sub.queue.get(), config.EVENTS_HEARTBEAT_SECS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if event is _CLOSED:
+                    return
+                yield _frame(event)
+                # Cut off after flushing what was queued; the client resumes
+                # from the last id it got
+                if sub.overflowed and sub.queue.empty():
+                    return
+        finally:
+            self.unsubscribe(sub)
+
+
+def _frame(event: dict) -> str:
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+
+
+bus = EventBus()
+
+registry.gauge("event_subscribers", "Open live-update streams.", bus.subscriber_count)
@@ -0,0 +1,90 @@
+import csv
+import io
+import json
+
+import config
+from models import IssueFilter
+from services.log_service import get_logger
+from services.lookup_cache import issue_statuses, categories, departments
+from services.supabase_service import repo
+
+log = get_logger("export")
+
+ISSUE_COLUMNS = (
+    "issue_id, title, description, created_at, user_id, "
+    "current_status_id, category_id, department_id, location_id"
+)
+ISSUE_FIELDS = [
+    "issue_id", "created_at", "title", "description", "user_id",
+    "current_status_id", "status_name", "department_id", "department_name",
+    "category_id", "category_name", "location_id",
+]
+
+HISTORY_COLUMNS = "history_id, issue_id, status_id, updated_by, remarks, created_at"
+HISTORY_FIELDS  = ["history_id", "issue_id", "created_at", "status_id", "status_name", "updated_by", "remarks"]
+
+FORMATS = {
+    "csv":    "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+async def _name(cache, key, column: str):
+    if key is None:
+        return None
+    row = await cache.get(key)
+    return row[column] if row else None
+
+
+async def issue_rows(created_from: str = None, created_to: str = None):
+    """Every issue in the range, newest first, with status/department/category names."""
+    rows = repo.iter_issues(
+        IssueFilter(created_from=created_from, created_to=created_to), ISSUE_COLUMNS, batch=config.EXPORT_SCAN_BATCH,
+    )
+    async for issue in rows:
+        issue["status_name"]     = await _name(issue_statuses, issue.get("current_status_id"), "status_name")
+        issue["department_name"] = await _name(departments, issue.get("department_id"), "department_name")
+        issue["category_name"]   = await _name(categories, issue.get("category_id"), "category_name")
+        yield issue
+
+
+async def history_rows(created_from: str = None, created_to: str = None):
+    """Every history row in the range, oldest first, with its status name."""
+    rows = repo.iter_history(HISTORY_COLUMNS, created_from, created_to, batch=config.EXPORT_SCAN_BATCH)
+    async for row in rows:
+        row["status_name"] = await _name(issue_statuses, row.get("status_id"), "status_name")
+        yield row
+
+
+async def encode(rows, fields: list, fmt: str, what: str):
+    """Render rows as CSV or NDJSON, yielding chunks of about EXPORT_CHUNK_BYTES.
+
+    Only one chunk and one keyset page are held at a time. A failure part way
+    through is logged and re-raised, so the client sees a broken transfer
+    rather than a file that merely looks short.
+    """
+    buffer = io.StringIO()
+    if fmt == "csv":
+        writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore")
+        writer.writeheader()
+        write = writer.writerow
+    else:
+        def write(row):
+            buffer.write(json.dumps({f: row.get(f) for f in fields}, ensure_ascii=False, separators=(",", ":")))
+            buffer.write("\n")
+
+    count = 0
+    try:
+        async for row in rows:
+            write(row)
+            count += 1
+            if buffer.tell() >= config.EXPORT_CHUNK_BYTES:
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+    except Exception:
+        log.exception("export failed", extra={"export": what, "rows": count})
+        raise
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+    log.info("export finished", extra={"export": what, "format": fmt, "rows": count})
@@ -0,0 +1,267 @@
+import asyncio
+import math
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+import config
+from models import IssueFilter
+from services.dashboard_service import apply_missed
+from services.log_service import get_logger
+from services.supabase_service import repo
+
+log = get_logger("hotspots")
+
+SCAN_COLUMNS = "issue_id, created_at, location_id, category_id, current_status_id"
+
+MAX_LATITUDE   = 85.05112878    # Web Mercator stops here
+LOCATION_BATCH = 200            # location ids per lookup, to keep the URL short
+
+
+def tile_of(latitude: float, longitude: float, zoom: int) -> tuple:
+    """(x, y) of the Web Mercator map tile holding a point at `zoom`."""
+    n   = 1 << zoom
+    lat = math.radians(max(-MAX_LATITUDE, min(MAX_LATITUDE, latitude)))
+    x   = int((longitude + 180.0) / 360.0 * n)
+    y   = int((1.0 - math.asinh(math.tan(lat)) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+class HotspotGrid:
+    """Issue counts per map tile, precomputed for every zoom in range.
+
+    Issues only carry a `location_id`, so counts are first kept per location
+    and (status, category); each located count is then added to the tile
+    holding its location at every zoom from `min_zoom` to `max_zoom`, along
+    with coordinate sums for the cell's centroid. A query walks the
+    non-empty tiles of one zoom, so its cost depends on how spread out the
+    issues are, not on how many there are.
+
+    `create_issue` and the status endpoints keep the counts current, like
+    the dashboard counters, without waiting on the database: the first
+    issue at a location we have no coordinates for is counted as unlocated
+    while that one location row is fetched in the background, and moves
+    onto the map when it arrives. `reconcile()` recounts everything with one
+    keyset scan to repair drift, fetches coordinates for the locations that
+    have issues, and rebuilds the tiles. Locations without coordinates stay
+    unlocated until then.
+    """
+
+    def __init__(self, min_zoom: int = config.HOTSPOT_MIN_ZOOM, max_zoom: int = config.HOTSPOT_MAX_ZOOM):
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+
+        self._by_location   = {}     # location_id -> Counter[(status, category)]
+        self._coords        = {}     # location_id -> (latitude, longitude, x, y at max_zoom)
+        self._cells         = {z: {} for z in range(min_zoom, max_zoom + 1)}  # zoom -> {(x, y): {key: [n, lat sum, lng sum]}}
+        self._unlocated     = set()  # counted locations with no coordinates
+        self._looked_up     = set()  # fetched without coordinates; retried by the next reconcile
+        self._lookups       = {}     # location_id -> task fetching its row
+        self._replay        = None   # events seen while a reconcile scan is running
+        self._touched       = set()
+        self.reconciled_at  = None
+
+    # ── counts ──
+    def _count(self, location_id: str, key: tuple, delta: int):
+        counts = self._by_location.get(location_id)
+        if counts is None:
+            counts = self._by_location[location_id] = Counter()
+        counts[key] += delta
+        if counts[key] <= 0:
+            del counts[key]
+            if not counts:
+                del self._by_location[location_id]
+
+    def _place(self, location_id: str, key: tuple, delta: int):
+        coords = self._coords.get(location_id)
+        if coords is None:
+            if location_id in self._by_location:
+                self._unlocated.add(location_id)
+            else:
+                self._unlocated.discard(location_id)
+            return
+        lat, lng, x, y = coords
+        for zoom, cells in self._cells.items():
+            shift = self.max_zoom - zoom
+            tile  = (x >> shift, y >> shift)
+            cell  = cells.get(tile)
+            if cell is None:
+                cell = cells[tile] = {}
+            entry = cell.get(key)
+            if entry is None:
+                entry = cell[key] = [0, 0.0, 0.0]
+            entry[0] += delta
+            entry[1] += delta * lat
+            entry[2] += delta * lng
+            if entry[0] <= 0:
+                del cell[key]
+                if not cell:
+                    del cells[tile]
+
+    def _bump(self, location_id: str, key: tuple, delta: int):
+        self._count(location_id, key, delta)
+        self._place(location_id, key, delta)
+
+    def _regrid(self, coords: dict):
+        # Place every count again, e.g. after coordinates changed
+        self._coords    = coords
+        self._cells     = {z: {} for z in self._cells}
+        self._unlocated = set()
+        for location_id, counts in self._by_location.items():
+            for key, n in counts.items():
+                self._place(location_id, key, n)
+
+    def _coords_of(self, row) -> tuple:
+        lat, lng = (row or {}).get("latitude"), (row or {}).get("longitude")
+        if lat is None or lng is None:
+            return None
+        lat, lng = float(lat), float(lng)
+        return (lat, lng, *tile_of(lat, lng, self.max_zoom))
+
+    async def _locate(self, location_id: str):
+        try:
+            coords = self._coords_of(await repo.get_location(location_id))
+            if coords is None:
+                self._looked_up.add(location_id)
+            elif location_id not in self._coords:
+                # Counts made while we waited were held as unlocated
+                self._coords[location_id] = coords
+                self._unlocated.discard(location_id)
+                for key, n in self._by_location.get(location_id, {}).items():
+                    self._place(location_id, key, n)
+        except Exception:
+            log.exception("location lookup failed", extra={"location_id": location_id})
+        finally:
+            self._lookups.pop(location_id, None)
+
+    # ── events from the write path ──
+    def on_created(self, issue: dict):
+        location_id = issue.get("location_id")
+        self._bump(location_id, (issue.get("current_status_id"), issue.get("category_id")), 1)
+        if (
+            location_id is not None and location_id not in self._coords
+            and location_id not in self._looked_up and location_id not in self._lookups
+        ):
+            self._lookups[location_id] = asyncio.create_task(self._locate(location_id))
+        if self._replay is not None:
+            self._replay.append(("created", issue, None))
+            self._touched.add(issue["issue_id"])
+
+    def on_status_changed(self, issue: dict, old_status: str):
+        if old_status == issue.get("current_status_id"):
+            return
+        location_id, category = issue.get("location_id"), issue.get("category_id")
+        self._bump(location_id, (old_status, category), -1)
+        self._bump(location_id, (issue.get("current_status_id"), category), 1)
+        if self._replay is not None:
+            self._replay.append(("moved", issue, old_status))
+            self._touched.add(issue["issue_id"])
+
+    # ── reads ──
+    def ready(self) -> bool:
+        return self.reconciled_at is not None
+
+    def cells(self, zoom: int, statuses=(), categories=(), bounds: tuple = None) -> dict:
+        """Matching issue counts per tile at `zoom`, biggest first.
+
+        `bounds` is (west, south, east, north) in degrees; only tiles that
+        overlap it are returned.
+        """
+        statuses, categories = set(statuses), set(categories)
+        if bounds:
+            west, south, east, north = bounds
+            x_min, y_min = tile_of(north, west, zoom)
+            x_max, y_max = tile_of(south, east, zoom)
+
+        out = []
+        for (x, y), cell in self._cells.get(zoom, {}).items():
+            if bounds and not (x_min <= x <= x_max and y_min <= y <= y_max):
+                continue
+            n = lat = lng = 0
+            for (status, category), entry in cell.items():
+                if (statuses and status not in statuses) or (categories and category not in categories):
+                    continue
+                n   += entry[0]
+                lat += entry[1]
+                lng += entry[2]
+            if n:
+                out.append({"x": x, "y": y, "count": n, "latitude": round(lat / n, 6), "longitude": round(lng / n, 6)})
+        out.sort(key=lambda c: -c["count"])
+
+        unlocated = sum(
+            n
+            for location_id in self._unlocated
+            for (status, category), n in self._by_location.get(location_id, {}).items()
+            if (not statuses or status in statuses) and (not categories or category in categories)
+        )
+        return {
+            "zoom":          zoom,
+            "cells":         out,
+            "total":         sum(c["count"] for c in out),
+            "unlocated":     unlocated,
+            "reconciled_at": self.reconciled_at,
+        }
+
+    # ── reconciliation ──
+    async def reconcile(self):
+        self._replay  = []
+        self._touched = set()
+        seen_status   = {}
+        fresh         = {}
+        try:
+            async for issue in repo.iter_issues(IssueFilter(), SCAN_COLUMNS, batch=config.HOTSPOT_SCAN_BATCH):
+                counts = fresh.get(issue["location_id"])
+                if counts is None:
+                    counts = fresh[issue["location_id"]] = Counter()
+                counts[(issue["current_status_id"], issue["category_id"])] += 1
+                if issue["issue_id"] in self._touched:
+                    seen_status[issue["issue_id"]] = issue["current_status_id"]
+
+            coords, scanned = {}, [i for i in fresh if i is not None]
+            for start in range(0, len(scanned), LOCATION_BATCH):
+                for row in await repo.get_locations(scanned[start:start + LOCATION_BATCH]):
+                    located = self._coords_of(row)
+                    if located is not None:
+                        coords[row["location_id"]] = located
+        except BaseException:
+            self._replay = None
+            raise
+
+        events, self._replay = self._replay, None
+        self._by_location = fresh
+        apply_missed(
+            events, seen_status,
+            add=lambda issue: self._count(
+                issue.get("location_id"), (issue.get("current_status_id"), issue.get("category_id")), 1,
+            ),
+            move=lambda issue, old_status: (
+                self._count(issue.get("location_id"), (old_status, issue.get("category_id")), -1),
+                self._count(issue.get("location_id"), (issue.get("current_status_id"), issue.get("category_id")), 1),
+            ),
+        )
+        # Locations first used during the scan were looked up on their own
+        scanned = set(scanned)
+        for location_id in self._by_location:
+            if location_id not in scanned and location_id in self._coords:
+                coords[location_id] = self._coords[location_id]
+        self._looked_up = {i for i in scanned if i not in coords}
+        self._regrid(coords)
+        self.reconciled_at = datetime.now(timezone.utc).isoformat()
+
+    async def run_periodically(self, interval: float = config.HOTSPOT_RECONCILE_SECS):
+        while True:
+            try:
+                started = time.perf_counter()
+                await self.reconcile()
+                log.info("hotspot grid reconciled", extra={
+                    "locations": len(self._by_location), "unlocated": len(self._unlocated),
+                    "secs": round(time.perf_counter() - started, 2),
+                })
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.exception("hotspot reconcile failed")
+            await asyncio.sleep(interval)
+
+
+hotspots = HotspotGrid()
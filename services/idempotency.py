@@ -0,0 +1,102 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+
+from fastapi import HTTPException
+
+import config
+from services.log_service import get_logger
+from services.metrics import registry
+
+log = get_logger("idempotency")
+
+replays = registry.counter("idempotent_replays_total", "Retried requests answered from the idempotency cache.", ("route",))
+
+MAX_KEY_LENGTH = 255
+
+
+def fingerprint(*parts) -> str:
+    return hashlib.sha256("\x1f".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+
+class IdempotencyCache:
+    """First successful response per (route, caller, Idempotency-Key), for replaying retries.
+
+    A retry with a key we have seen gets the stored response and the handler
+    does not run again. A retry that arrives while the first request is
+    still running waits for it on a per-key lock instead of racing it.
+    Error responses are not stored, so the next attempt runs normally.
+    Keys are scoped to the caller, so two clients that happen to pick the
+    same key never see each other's responses.
+
+    At most `max_entries` responses are kept, each for `ttl` seconds. Keys
+    are remembered per worker, so a retry that lands on another worker is
+    not deduplicated.
+    """
+
+    def __init__(self, ttl: float = config.IDEMPOTENCY_TTL, max_entries: int = config.IDEMPOTENCY_MAX_ENTRIES):
+        self.ttl         = ttl
+        self.max_entries = max_entries
+
+        self._done  = OrderedDict()    # (route, caller, key) -> (stored at, request fingerprint, response)
+        self._locks = {}               # (route, caller, key) -> [lock, requests using it]
+
+    def _lookup(self, slot: tuple, request_fingerprint: str):
+        entry = self._done.get(slot)
+        if entry is None:
+            return None
+        stored_at, stored_fingerprint, result = entry
+        if time.monotonic() - stored_at > self.ttl:
+            del self._done[slot]
+            return None
+        if stored_fingerprint != request_fingerprint:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request.")
+        return result
+
+    def _store(self, slot: tuple, request_fingerprint: str, result):
+        now = time.monotonic()
+        # Entries share one TTL, so the oldest expire first
+        while self._done and (len(self._done) >= self.max_entries or now - next(iter(self._done.values()))[0] > self.ttl):
+            self._done.popitem(last=False)
+        self._done[slot] = (now, request_fingerprint, result)
+
+    async def run(self, route: str, caller: str, key: str, request_fingerprint: str, handler):
+        """(response, replayed) for `handler()` under `key`; without a key it just runs."""
+        if not key:
+            return await handler(), False
+        if len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(status_code=400, detail="Idempotency-Key is too long.")
+
+        slot   = (route, caller, key)
+        result = self._lookup(slot, request_fingerprint)
+        if result is not None:
+            replays.inc(route)
+            return result, True
+
+        holder = self._locks.get(slot)
+        if holder is None:
+            holder = self._locks[slot] = [asyncio.Lock(), 0]
+        holder[1] += 1
+        try:
+            async with holder[0]:
+                result = self._lookup(slot, request_fingerprint)
+                if result is not None:
+                    replays.inc(route)
+                    return result, True
+                result = await handler()
+                if isinstance(result, dict) and "error" not in result:
+                    self._store(slot, request_fingerprint, result)
+                return result, False
+        finally:
+            holder[1] -= 1
+            if not holder[1]:
+                del self._locks[slot]
+
+    def __len__(self) -> int:
+        return len(self._done)
+
+
+idempotency = IdempotencyCache()
+
+registry.gauge("idempotency_cache_entries", "Responses held for Idempotency-Key replays.", idempotency.__len__)
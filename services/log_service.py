@@ -0,0 +1,61 @@
+import json
+import logging
+import random
+import sys
+
+import config
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts":     round(record.created, 3),
+            "level":  record.levelname.lower(),
+            "logger": record.name,
+            "msg":    record.getMessage(),
+        }
+        entry.update({k: v for k, v in vars(record).items() if k not in _RESERVED})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SampleFilter(logging.Filter):
+    """Keeps roughly `rate` of records below WARNING; warnings and errors always pass."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= logging.WARNING or random.random() < self.rate
+
+
+def setup_logging():
+    handler = logging.StreamHandler(sys.stderr)
+    if config.LOG_FORMAT == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    root = logging.getLogger("r2r")
+    root.handlers = [handler]
+    root.setLevel(config.LOG_LEVEL.upper())
+    root.propagate = False
+
+    # Per-request logs on hot endpoints are sampled, or dropped entirely
+    hot = logging.getLogger("r2r.hot")
+    hot.filters = [SampleFilter(config.LOG_SAMPLE_RATE)]
+    hot.disabled = not config.LOG_HOT_PATHS
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(f"r2r.{name}")
+
+
+# Logger for code that runs on every list/dashboard request
+hot_log = logging.getLogger("r2r.hot")
+
@@ -0,0 +1,177 @@
+import asyncio
+import hashlib
+import json
+import time
+
+from fastapi import Request, Response
+
+import config
+from services.supabase_service import repo
+
+
+class LookupCache:
+    """Process-local copy of a small reference table, keyed by one column.
+
+    The whole table is loaded with one query and kept until it is older than
+    `ttl` seconds or `invalidate()` is called. A lookup for a key we don't know
+    yet triggers one reload (rate-limited by `min_reload`), so rows added in
+    Supabase show up without waiting for the TTL.
+
+    Each load also renders the rows to JSON once and derives a strong ETag
+    from the bytes, so HTTP handlers can answer without re-serialising.
+    """
+
+    def __init__(self, table: str, key: str, columns: str, ttl: float = config.REFERENCE_TTL, min_reload: float = 5):
+        self.table      = table
+        self.key        = key
+        self.columns    = columns
+        self.ttl        = ttl
+        self.min_reload = min_reload
+
+        self._rows      = {}
+        self._snapshot  = (b"[]", None)    # (json body, etag)
+        self._loaded_at = None
+        self._lock      = asyncio.Lock()
+
+    async def _load(self):
+        rows = await repo.list_table(self.table, self.columns)
+        rows = sorted(rows, key=lambda r: str(r[self.key]))
+        body = json.dumps(rows, separators=(",", ":"), sort_keys=True).encode("utf-8")
+
+        self._rows      = {row[self.key]: row for row in rows}
+        self._snapshot  = (body, f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+        self._loaded_at = time.monotonic()
+
+    def _is_stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl
+
+    async def _ensure_fresh(self):
+        if self._is_stale():
+            async with self._lock:
+                if self._is_stale():
+                    await self._load()
+
+    async def rows(self) -> dict:
+        await self._ensure_fresh()
+        return self._rows
+
+    async def snapshot(self) -> tuple:
+        await self._ensure_fresh()
+        return self._snapshot
+
+    async def reload_for(self, missing) -> dict:
+        """Reload once if any of `missing` isn't cached and we haven't just reloaded."""
+        rows = await self.rows()
+        if not any(m not in rows for m in missing):
+            return rows
+        async with self._lock:
+            recently = self._loaded_at is not None and time.monotonic() - self._loaded_at < self.min_reload
+            if not recently and any(m not in self._rows for m in missing):
+                await self._load()
+        return self._rows
+
+    async def get(self, key_value):
+        return (await self.reload_for([key_value])).get(key_value)
+
+    def invalidate(self):
+        self._loaded_at = None
+
+
+class DepartmentRecipients:
+    """Who gets new-issue emails for each department, cached per department.
+
+    An entry holds the department name and its recipients: the contact
+    address plus every approved staff member, deduplicated in order. It is
+    built with two queries on first use and kept for `ttl` seconds or until
+    `invalidate()`; approving or removing staff invalidates just that
+    department. A load that overlaps an invalidation is not stored, so a
+    stale recipient list can't outlive the change that invalidated it.
+    """
+
+    def __init__(self, ttl: float = config.RECIPIENT_TTL):
+        self.ttl = ttl
+
+        self._entries     = {}    # department_id -> (loaded_at, entry)
+        self._generations = {}    # department_id -> bumped on every invalidation
+        self._generation  = 0     # bumped when everything is invalidated
+
+    async def get(self, department_id: str):
+        """{"department_name", "recipients"} or None for an unknown department."""
+        cached = self._entries.get(department_id)
+        if cached and time.monotonic() - cached[0] <= self.ttl:
+            return cached[1]
+
+        generation = (self._generation, self._generations.get(department_id, 0))
+        dept = await repo.get_department(department_id)
+        if not dept:
+            return None
+        staff = await repo.department_staff_emails(department_id)
+
+        emails = [dept.get("contact_email"), *staff]
+        entry  = {
+            "department_name": dept["department_name"],
+            "recipients":      list(dict.fromkeys(e for e in emails if e)),
+        }
+        if generation == (self._generation, self._generations.get(department_id, 0)):
+            self._entries[department_id] = (time.monotonic(), entry)
+        return entry
+
+    def invalidate(self, department_id: str = None):
+        if department_id is None:
+            self._generation += 1
+            self._entries.clear()
+        else:
+            self._generations[department_id] = self._generations.get(department_id, 0) + 1
+            self._entries.pop(department_id, None)
+
+
+issue_statuses = LookupCache("issue_status", "status_id", "status_id, status_name")
+categories     = LookupCache("categories", "category_id", "category_id, category_name")
+departments    = LookupCache("departments", "department_id", "department_id, department_name")
+roles          = LookupCache("role", "role_name", "role_id, role_name")
+
+department_recipients = DepartmentRecipients()
+
+REFERENCE_CACHES = {
+    "statuses":    issue_statuses,
+    "categories":  categories,
+    "departments": departments,
+    "roles":       roles,
+    "recipients":  department_recipients,
+}
+
+
+async def status_name(status_id, default: str = "Unknown") -> str:
+    if not status_id:
+        return default
+    row = await issue_statuses.get(status_id)
+    return row["status_name"] if row else default
+
+
+async def attach_status(issues: list) -> list:
+    """Fill `issue_status.status_name` on every issue with at most one query."""
+    status_ids = {i["current_status_id"] for i in issues if i.get("current_status_id")}
+    rows       = await issue_statuses.reload_for(status_ids)
+
+    for issue in issues:
+        row = rows.get(issue.get("current_status_id"))
+        issue["issue_status"] = {"status_name": row["status_name"] if row else "Unknown"}
+
+    return issues
+
+
+async def cached_response(request: Request, cache: LookupCache) -> Response:
+    """Serve a cached table with ETag/Cache-Control, or 304 if the client is current."""
+    body, etag = await cache.snapshot()
+    headers    = {
+        "ETag":          etag,
+        "Cache-Control": f"public, max-age={config.REFERENCE_MAX_AGE}, must-revalidate",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+        if etag in tags or "*" in tags:
+            return Response(status_code=304, headers=headers)
+
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,174 @@
+import bisect
+import contextvars
+import threading
+import time
+
+import config
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS   = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{str(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name    = name
+        self.help    = help
+        self.labels  = labels
+        self._values = {}
+        self._lock   = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for values, total in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labels, values)} {total}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name    = name
+        self.help    = help
+        self.labels  = labels
+        self.buckets = buckets
+        self._series = {}    # label values -> [bucket counts..., sum, count]
+        self._lock   = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            if i < len(self.buckets):
+                series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for values, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, n in zip(self.buckets, series):
+                    cumulative += n
+                    labels = _labels(self.labels + ("le",), values + (bound,))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _labels(self.labels + ("le",), values + ("+Inf",))
+                lines.append(f"{self.name}_bucket{labels} {series[-1]}")
+                lines.append(f"{self.name}_sum{_labels(self.labels, values)} {series[-2]}")
+                lines.append(f"{self.name}_count{_labels(self.labels, values)} {series[-1]}")
+        return lines
+
+
+class Gauge:
+    """Value read from `fn` at scrape time."""
+
+    def __init__(self, name: str, help: str, fn):
+        self.name = name
+        self.help = help
+        self.fn   = fn
+
+    def render(self) -> list:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge", f"{self.name} {self.fn()}"]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, *args, **kwargs) -> Counter:
+        return self._add(Counter(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        return self._add(Histogram(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs) -> Gauge:
+        return self._add(Gauge(*args, **kwargs))
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.counter(
+    "http_requests_total", "HTTP requests by route, method and status.", ("route", "method", "status"),
+)
+http_latency = registry.histogram(
+    "http_request_duration_seconds", "Request latency by route.", ("route", "method"),
+)
+upstream_calls = registry.histogram(
+    "upstream_calls_per_request", "Supabase round-trips made while serving one request.",
+    ("route",), buckets=COUNT_BUCKETS,
+)
+upstream_bytes = registry.counter(
+    "upstream_response_bytes_total", "Bytes received from Supabase, by route.", ("route",),
+)
+smtp_send = registry.histogram(
+    "smtp_send_duration_seconds", "Time to hand one message to the SMTP server.", ("outcome",),
+)
+
+
+# ─── PER-REQUEST UPSTREAM ACCOUNTING ───────────────────────
+# The middleware puts a [calls, bytes] list here; repositories add to it
+_upstream = contextvars.ContextVar("upstream", default=None)
+
+
+def record_upstream(nbytes: int = 0):
+    stats = _upstream.get()
+    if stats is not None:
+        stats[0] += 1
+        stats[1] += nbytes
+
+
+class MetricsMiddleware:
+    """Records latency, status and upstream usage for every HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not config.METRICS_ENABLED:
+            return await self.app(scope, receive, send)
+
+        status = 500
+        stats  = [0, 0]
+        token  = _upstream.set(stats)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _upstream.reset(token)
+            route  = getattr(scope.get("route"), "path", "unmatched")
+            method = scope["method"]
+            http_latency.observe(time.perf_counter() - started, route, method)
+            http_requests.inc(route, method, status)
+            upstream_calls.observe(stats[0], route)
+            if stats[1]:
+                upstream_bytes.inc(route, amount=stats[1])
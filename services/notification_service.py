@@ -0,0 +1,285 @@
+import heapq
+import queue
+import smtplib
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+import config
+from services.log_service import get_logger
+from services.metrics import registry, smtp_send
+
+log = get_logger("notifications")
+
+
+@dataclass
+class EmailMessage:
+    to:          list
+    subject:     str
+    html:        str
+    id:          str   = field(default_factory=lambda: str(uuid.uuid4()))
+    attempts:    int   = 0
+    last_error:  str   = None
+    enqueued_at: float = field(default_factory=time.time)
+
+    def as_mime(self, sender: str) -> str:
+        msg = MIMEMultipart("alternative")
+        msg["Subject"] = self.subject
+        msg["From"]    = sender
+        msg["To"]      = ", ".join(self.to)
+        msg.attach(MIMEText(self.html, "html"))
+        return msg.as_string()
+
+
+class SMTPConnection:
+    """One authenticated SMTP session, reused across sends by a single worker."""
+
+    def __init__(self, host, port, use_ssl, username, password, timeout, idle_secs):
+        self.host      = host
+        self.port      = port
+        self.use_ssl   = use_ssl
+        self.username  = username
+        self.password  = password
+        self.timeout   = timeout
+        self.idle_secs = idle_secs
+
+        self._server    = None
+        self._last_used = 0.0
+
+    def _connect(self):
+        if self.use_ssl:
+            server = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout)
+        else:
+            server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.username:
+            server.login(self.username, self.password)
+        self._server = server
+
+    def send(self, sender: str, to: list, payload: str):
+        if self._server is None:
+            self._connect()
+        try:
+            self._server.sendmail(sender, to, payload)
+        except smtplib.SMTPServerDisconnected:
+            # The server dropped our idle session; reconnect once and resend
+            self.close()
+            self._connect()
+            self._server.sendmail(sender, to, payload)
+        self._last_used = time.monotonic()
+
+    def close_if_idle(self):
+        if self._server is not None and time.monotonic() - self._last_used > self.idle_secs:
+            self.close()
+
+    def close(self):
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except Exception:
+            pass
+        self._server = None
+
+
+class NotificationService:
+    """Queue of outgoing emails drained by background workers.
+
+    `enqueue` never touches the network, so request handlers return as soon as
+    the message is queued. Each worker holds its own SMTP session (smtplib is
+    not thread-safe) and keeps it open between sends. A failed send is retried
+    with exponential backoff; after `max_retries` it goes to the dead-letter
+    store, where an admin can inspect or requeue it.
+    """
+
+    def __init__(
+        self,
+        host:         str   = config.SMTP_HOST,
+        port:         int   = config.SMTP_PORT,
+        use_ssl:      bool  = config.SMTP_SSL,
+        username:     str   = config.SMTP_USER,
+        password:     str   = config.SMTP_PASS,
+        sender:       str   = config.SMTP_SENDER,
+        timeout:      float = config.SMTP_TIMEOUT,
+        idle_secs:    float = config.SMTP_IDLE_SECS,
+        workers:      int   = config.NOTIFY_WORKERS,
+        queue_size:   int   = config.NOTIFY_QUEUE_SIZE,
+        max_retries:  int   = config.NOTIFY_MAX_RETRIES,
+        backoff_secs: float = config.NOTIFY_BACKOFF_SECS,
+        backoff_max:  float = config.NOTIFY_BACKOFF_MAX,
+        dead_letters: int   = config.NOTIFY_DEAD_LETTERS,
+    ):
+        self.smtp_args    = (host, port, use_ssl, username, password, timeout, idle_secs)
+        self.sender       = sender
+        self.workers      = workers
+        self.max_retries  = max_retries
+        self.backoff_secs = backoff_secs
+        self.backoff_max  = backoff_max
+
+        self._queue      = queue.Queue(maxsize=queue_size)
+        self._retries    = []    # heap of (due_at, seq, message)
+        self._retry_cond = threading.Condition()
+        self._retry_seq  = 0
+        self._dead       = deque(maxlen=dead_letters)
+        self._dead_lock  = threading.Lock()
+        self._threads    = []
+        self._stopping   = threading.Event()
+
+        self.stats       = {"sent": 0, "retried": 0, "dead": 0}
+        self._stats_lock = threading.Lock()    # bumped from every worker thread
+
+    # ── public API ──
+    def enqueue(self, to: list, subject: str, html: str) -> bool:
+        to = [addr for addr in dict.fromkeys(to) if addr]
+        if not to:
+            return False
+        message = EmailMessage(to=to, subject=subject, html=html)
+        try:
+            self._queue.put_nowait(message)
+            return True
+        except queue.Full:
+            self._bury(message, "queue full")
+            return False
+
+    def queue_depth(self) -> int:
+        with self._retry_cond:
+            return self._queue.qsize() + len(self._retries)
+
+    def dead_letters(self) -> list:
+        with self._dead_lock:
+            return [
+                {
+                    "id":          m.id,
+                    "to":          m.to,
+                    "subject":     m.subject,
+                    "attempts":    m.attempts,
+                    "last_error":  m.last_error,
+                    "enqueued_at": m.enqueued_at,
+                }
+                for m in self._dead
+            ]
+
+    def dead_count(self) -> int:
+        return len(self._dead)
+
+    def requeue_dead_letters(self) -> int:
+        with self._dead_lock:
+            messages = list(self._dead)
+            self._dead.clear()
+        requeued = 0
+        for m in messages:
+            m.attempts   = 0
+            m.last_error = None
+            try:
+                self._queue.put_nowait(m)
+                requeued += 1
+            except queue.Full:
+                self._bury(m, "queue full")
+        return requeued
+
+    # ── lifecycle ──
+    def start(self):
+        if self._threads:
+            return
+        self._stopping.clear()
+        for n in range(self.workers):
+            t = threading.Thread(target=self._worker, name=f"notify-{n}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        t = threading.Thread(target=self._retry_loop, name="notify-retry", daemon=True)
+        t.start()
+        self._threads.append(t)
+
+    def stop(self, timeout: float = 5):
+        """Stop workers after the queue drains or `timeout` seconds pass."""
+        deadline = time.monotonic() + timeout
+        while not self._queue.empty() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self._stopping.set()
+        with self._retry_cond:
+            self._retry_cond.notify_all()
+        for t in self._threads:
+            t.join(max(0.0, deadline - time.monotonic()))
+        self._threads = []
+
+    # ── internals ──
+    def _worker(self):
+        conn = SMTPConnection(*self.smtp_args)
+        try:
+            while not self._stopping.is_set():
+                try:
+                    message = self._queue.get(timeout=1)
+                except queue.Empty:
+                    conn.close_if_idle()
+                    continue
+                try:
+                    self._deliver(conn, message)
+                finally:
+                    self._queue.task_done()
+        finally:
+            conn.close()
+
+    def _deliver(self, conn: SMTPConnection, message: EmailMessage):
+        message.attempts += 1
+        started = time.perf_counter()
+        try:
+            conn.send(self.sender, message.to, message.as_mime(self.sender))
+            smtp_send.observe(time.perf_counter() - started, "ok")
+            self._count("sent")
+            log.info("email sent", extra={"to": message.to, "attempt": message.attempts})
+        except Exception as e:
+            smtp_send.observe(time.perf_counter() - started, "error")
+            conn.close()
+            message.last_error = str(e)
+            if message.attempts > self.max_retries:
+                self._bury(message, message.last_error)
+            else:
+                self._schedule_retry(message)
+
+    def _schedule_retry(self, message: EmailMessage):
+        delay = min(self.backoff_max, self.backoff_secs * 2 ** (message.attempts - 1))
+        with self._retry_cond:
+            self._retry_seq += 1
+            heapq.heappush(self._retries, (time.monotonic() + delay, self._retry_seq, message))
+            self._retry_cond.notify()
+        self._count("retried")
+        log.warning("email failed, will retry", extra={
+            "to": message.to, "error": message.last_error, "attempt": message.attempts, "retry_in": delay,
+        })
+
+    def _retry_loop(self):
+        with self._retry_cond:
+            while not self._stopping.is_set():
+                if not self._retries:
+                    self._retry_cond.wait()
+                    continue
+                due_at, _, message = self._retries[0]
+                wait = due_at - time.monotonic()
+                if wait > 0:
+                    self._retry_cond.wait(wait)
+                    continue
+                heapq.heappop(self._retries)
+                try:
+                    self._queue.put_nowait(message)
+                except queue.Full:
+                    self._bury(message, "queue full")
+
+    def _count(self, stat: str):
+        with self._stats_lock:
+            self.stats[stat] += 1
+
+    def _bury(self, message: EmailMessage, reason: str):
+        message.last_error = reason
+        with self._dead_lock:
+            self._dead.append(message)
+        self._count("dead")
+        log.error("email moved to dead letters", extra={"to": message.to, "reason": reason})
+
+
+notifier = NotificationService()
+
+registry.gauge("notification_queue_depth", "Emails waiting to be sent or retried.", notifier.queue_depth)
+registry.gauge("notification_dead_letters", "Emails in the dead-letter store.", notifier.dead_count)
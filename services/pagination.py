@@ -0,0 +1,60 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+
+from fastapi import HTTPException
+
+# Columns a list view may ask for with `fields=`
+ISSUE_FIELDS = {
+    "issue_id", "title", "description", "created_at", "user_id",
+    "current_status_id", "category_id", "department_id", "location_id",
+}
+
+# Always selected: the cursor is built from created_at/issue_id and the
+# status name is resolved from current_status_id
+REQUIRED_FIELDS = ["issue_id", "created_at", "current_status_id"]
+
+
+def encode_cursor(row: dict) -> str:
+    raw = json.dumps([row["created_at"], row["issue_id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """(created_at, issue_id) from a `next_cursor`.
+
+    Both values are checked to be an ISO timestamp and a UUID: they are
+    quoted straight into the PostgREST keyset filter.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, issue_id = json.loads(base64.urlsafe_b64decode(padded))
+        datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+        return created_at, str(uuid.UUID(issue_id))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+
+def select_columns(fields: str, default: list) -> str:
+    """Build the select list from a comma separated `fields=` value."""
+    if fields:
+        requested = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown   = [f for f in requested if f not in ISSUE_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    else:
+        requested = default
+
+    columns = REQUIRED_FIELDS + [f for f in requested if f not in REQUIRED_FIELDS]
+    return ", ".join(columns)
+
+
+def page(rows: list, limit: int) -> dict:
+    """`rows` is a fetch of `limit + 1`; the extra row only says whether there is a next page."""
+    has_more = len(rows) > limit
+    rows     = rows[:limit]
+    return {
+        "issues":      rows,
+        "next_cursor": encode_cursor(rows[-1]) if has_more and rows else None,
+    }
@@ -0,0 +1,83 @@
+import asyncio
+
+import bcrypt
+from fastapi import HTTPException
+
+import config
+from services.metrics import registry
+from services.process_pool import process_pool
+
+
+# Run inside the worker processes, so they must stay module-level functions
+def _hash(password: str, rounds: int) -> str:
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds)).decode("utf-8")
+
+def _check(password: str, hashed: str) -> bool:
+    return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
+
+
+class PasswordHasher:
+    """bcrypt in a dedicated process pool with a bounded backlog.
+
+    At most `workers` hashes run at once, each in its own process, so they
+    neither hold the GIL nor tie up FastAPI's threadpool. Up to `max_queue`
+    more wait for a free process; beyond that callers get a 503 straight away
+    instead of piling up behind the pool.
+    """
+
+    def __init__(
+        self,
+        workers:   int = config.HASH_WORKERS,
+        max_queue: int = config.HASH_MAX_QUEUE,
+        rounds:    int = config.BCRYPT_ROUNDS,
+    ):
+        self.workers   = workers
+        self.max_queue = max_queue
+        self.rounds    = rounds
+
+        self._pool    = None
+        self._pending = 0   # only touched from the event loop
+
+    def start(self):
+        if self._pool is None:
+            self._pool = process_pool(self.workers)
+
+    def stop(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def _run(self, fn, *args):
+        if self._pending >= self.workers + self.max_queue:
+            raise HTTPException(
+                status_code=503,
+                detail="Server is busy, please try again shortly.",
+                headers={"Retry-After": "1"},
+            )
+        self.start()
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+        finally:
+            self._pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash, password, self.rounds)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._run(_check, password, hashed)
+
+    def needs_rehash(self, hashed: str) -> bool:
+        # bcrypt hashes look like $2b$<cost>$<salt+digest>
+        try:
+            return int(hashed.split("$")[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    def pending(self) -> int:
+        return self._pending
+
+
+hasher = PasswordHasher()
+
+registry.gauge("password_hash_pending", "Hash/verify calls running or queued.", hasher.pending)
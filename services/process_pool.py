@@ -0,0 +1,24 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import config
+
+# Modules whose functions run in the pools. A forkserver imports them once,
+# so each worker forks from a warm interpreter instead of importing them itself.
+WORKER_MODULES = ["services.password_service", "services.storage_service"]
+
+
+def process_pool(workers: int) -> ProcessPoolExecutor:
+    """A pool whose workers are never forked from the threaded server process.
+
+    Forking copies whatever locks the mail workers and background scans hold
+    at that instant. All `workers` processes are started now, so the first
+    requests don't wait for them.
+    """
+    context = multiprocessing.get_context(config.POOL_START_METHOD)
+    if config.POOL_START_METHOD == "forkserver":
+        context.set_forkserver_preload(WORKER_MODULES)
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+    for _ in range(workers):
+        pool.submit(int)
+    return pool
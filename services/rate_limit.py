@@ -0,0 +1,192 @@
+import math
+import time
+
+from starlette.responses import JSONResponse
+
+import config
+from services.log_service import get_logger
+from services.metrics import registry
+
+log = get_logger("admission")
+
+rejected = registry.counter(
+    "admission_rejected_total", "Requests turned away by rate limits or load shedding.", ("route", "reason"),
+)
+
+
+# ─── BUCKET STORES ─────────────────────────────────────────
+class LocalBucketStore:
+    """Token buckets in this process's memory; each worker limits on its own."""
+
+    def __init__(self, max_keys: int = config.RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets = {}    # key -> [tokens, updated_at, seconds until full]
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        """Spend one token: 0 if there was one, else seconds until there is."""
+        now    = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_keys:
+                self._prune(now)
+            bucket = self._buckets[key] = [burst, now, burst / rate]
+        bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+        bucket[1] = now
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0.0
+        return (1 - bucket[0]) / rate
+
+    def _prune(self, now: float):
+        # A bucket that has refilled completely is the same as no bucket
+        self._buckets = {k: b for k, b in self._buckets.items() if now - b[1] < b[2]}
+
+    async def close(self):
+        pass
+
+
+_TAKE_SCRIPT = """
+local rate, burst = tonumber(ARGV[1]), tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1e6
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = math.min(burst, (tonumber(state[1]) or burst) + (now - (tonumber(state[2]) or now)) * rate)
+local wait = 0
+if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000))
+return tostring(wait)
+"""
+
+
+class RedisBucketStore:
+    """Token buckets shared by every worker, updated atomically in Redis.
+
+    Each check is one script call using Redis's clock, so workers agree on
+    time. If Redis is unreachable requests are let through: losing rate
+    limiting for a while beats refusing every login.
+    """
+
+    def __init__(self, url: str = config.RATE_LIMIT_REDIS_URL, prefix: str = "r2r:rate:"):
+        self.url     = url
+        self.prefix  = prefix
+        self._redis  = None
+        self._script = None
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        if self._redis is None:
+            import redis.asyncio as redis
+
+            self._redis  = redis.from_url(self.url)
+            self._script = self._redis.register_script(_TAKE_SCRIPT)
+        try:
+            return float(await self._script(keys=[self.prefix + key], args=[rate, burst]))
+        except Exception:
+            log.exception("rate limit store unavailable; allowing request")
+            return 0.0
+
+    async def close(self):
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+
+def make_store(kind: str = config.RATE_LIMIT_BACKEND):
+    if kind == "local":
+        return LocalBucketStore()
+    if kind == "redis":
+        return RedisBucketStore()
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND '{kind}'")
+
+
+# ─── MIDDLEWARE ────────────────────────────────────────────
+# Expensive POST routes -> (requests, per seconds) allowed per client
+LIMITS = {
+    "/login":        config.RATE_LIMIT_LOGIN,
+    "/signup":       config.RATE_LIMIT_SIGNUP,
+    "/dept-signup":  config.RATE_LIMIT_SIGNUP,
+    "/create-issue": config.RATE_LIMIT_CREATE_ISSUE,
+    "/upload-image": config.RATE_LIMIT_UPLOAD,
+}
+
+
+class AdmissionControl:
+    """Rate limits and load shedding for the expensive endpoints.
+
+    Each client gets a token bucket per route in `limits` (burst = the
+    request count, refilled evenly over the period); an empty bucket is a
+    429 with Retry-After. Separately, at most `max_inflight` of these
+    requests run at once in this worker; the next one gets a 503 straight
+    away instead of queueing behind bcrypt, SMTP or uploads.
+    """
+
+    def __init__(
+        self,
+        store=None,
+        limits:       dict = LIMITS,
+        max_inflight: int  = config.ADMISSION_MAX_INFLIGHT,
+    ):
+        self.store        = store or make_store()
+        self.limits       = {path: (n / period, float(n)) for path, (n, period) in limits.items()}
+        self.max_inflight = max_inflight
+        self.inflight     = 0    # only touched from the event loop
+
+    def covers(self, path: str) -> bool:
+        return config.RATE_LIMIT_ENABLED and path in self.limits
+
+    async def admit(self, path: str, client: str):
+        """None if the request may run (call `release()` after), else (status, detail, retry_after)."""
+        rate, burst = self.limits[path]
+        wait        = await self.store.take(f"{path}:{client}", rate, burst)
+        if wait > 0:
+            rejected.inc(path, "rate")
+            return 429, "Too many requests, please slow down.", wait
+        if self.max_inflight and self.inflight >= self.max_inflight:
+            rejected.inc(path, "busy")
+            return 503, "Server is busy, please try again shortly.", 1
+        self.inflight += 1
+        return None
+
+    def release(self):
+        self.inflight -= 1
+
+    async def close(self):
+        await self.store.close()
+
+
+admission = AdmissionControl()
+
+registry.gauge("admission_inflight", "Expensive requests running in this worker.", lambda: admission.inflight)
+
+
+class AdmissionMiddleware:
+    """Applies `admission` to POSTs on the limited routes, before their body is read."""
+
+    def __init__(self, app, control: AdmissionControl = admission, trust_proxy: bool = config.RATE_LIMIT_TRUST_PROXY):
+        self.app         = app
+        self.control     = control
+        self.trust_proxy = trust_proxy
+
+    def client(self, scope) -> str:
+        if self.trust_proxy:
+            for name, value in scope.get("headers", ()):
+                if name == b"x-forwarded-for":
+                    return value.decode("latin-1").split(",")[0].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or not self.control.covers(scope["path"]):
+            return await self.app(scope, receive, send)
+
+        refused = await self.control.admit(scope["path"], self.client(scope))
+        if refused:
+            status, detail, retry_after = refused
+            response = JSONResponse(
+                {"detail": detail}, status_code=status, headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
+            return await response(scope, receive, send)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.control.release()
@@ -0,0 +1,399 @@
+import asyncio
+import heapq
+import math
+import os
+import pickle
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+
+import config
+from models import IssueFilter
+from services.log_service import get_logger
+from services.supabase_service import repo
+
+log = get_logger("search")
+
+INDEX_COLUMNS  = "issue_id, title, description, department_id, category_id, current_status_id, created_at"
+FORMAT_VERSION = 2
+
+K1, B       = 1.2, 0.75
+TITLE_BOOST = 2    # title tokens count this many times
+
+_WORD = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset("""
+    a an and are as at be been but by for from has have in is it its near of on or
+    our the their there this to was were will with we i my me very please not no
+""".split())
+
+
+def tokenize(text: str) -> list:
+    tokens = []
+    for word in _WORD.findall((text or "").lower()):
+        if len(word) < 2 or word in STOPWORDS:
+            continue
+        # Cheap plural folding so "potholes" finds "pothole"
+        if len(word) > 4 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+
+def _epoch(ts: str) -> float:
+    return datetime.fromisoformat(ts.replace("Z", "+00:00")).timestamp() if ts else 0.0
+
+
+def _cut(lists: list, want: int) -> list:
+    """How far to read each of several Postings so they give the `want` best together."""
+    sizes = [len(p.neg) for p in lists]
+    if sum(sizes) <= want:
+        return sizes
+    if len(lists) == 1:
+        return [want]
+
+    # Bisect on the (negated) weight: fewer than `want` postings are <= lo,
+    # at least `want` are <= hi
+    lo = min(p.neg[0] for p in lists if p.neg) - 1.0
+    hi = max(p.neg[-1] for p in lists if p.neg)
+    for _ in range(40):
+        mid = (lo + hi) / 2
+        if sum(bisect_right(p.neg, mid) for p in lists) >= want:
+            hi = mid
+        else:
+            lo = mid
+    ends  = [bisect_right(p.neg, lo) for p in lists]
+    short = want - sum(ends)
+    # Postings tied at the cut-off fill the rest, in list order
+    for i, p in enumerate(lists):
+        take     = min(short, bisect_right(p.neg, hi) - ends[i])
+        ends[i] += take
+        short   -= take
+    return ends
+
+
+class Postings:
+    """One term's documents, highest BM25 weight first.
+
+    Weights are stored negated so the arrays stay ascending for `bisect`.
+    Flat typed arrays keep a posting at 9 bytes.
+    """
+
+    __slots__ = ("neg", "docs", "tfs")
+
+    def __init__(self):
+        self.neg  = array("f")
+        self.docs = array("I")
+        self.tfs  = array("B")
+
+    def add(self, weight: float, doc: int, tf: int, keep_sorted: bool = True):
+        i = bisect_right(self.neg, -weight) if keep_sorted else len(self.neg)
+        self.neg.insert(i, -weight)
+        self.docs.insert(i, doc)
+        self.tfs.insert(i, min(tf, 255))
+
+
+class SearchIndex:
+    """BM25 inverted index over issue titles and descriptions, held in memory.
+
+    Each term's postings are split by department and kept in descending
+    weight order, and a query scores at most `max_postings` of them in
+    total, best first. That bound keeps query cost flat as the table grows:
+    rare terms are read in full, and only the long, low-weight tail of very
+    common terms is skipped. A department filter reads only that
+    department's lists. Other filters are checked while the postings are
+    read, so only matching documents count against the budget; a selective
+    filter reads further down, up to `max_scan` postings per query.
+
+    `search` is meant to run in a worker thread. Writes come from the event
+    loop, and the postings arrays are only changed or copied under `_lock`.
+
+    Per-document filter columns live in parallel arrays indexed by an
+    internal doc number. `create_issue` adds documents as they are written
+    and status changes update them in place. The index is saved to
+    `path` on shutdown and after a full build; on startup it is loaded and
+    caught up from the issue and history tables, and only rebuilt from
+    scratch when no usable snapshot exists.
+    """
+
+    def __init__(
+        self,
+        path:         str = config.SEARCH_INDEX_FILE,
+        max_postings: int = config.SEARCH_MAX_POSTINGS,
+        max_scan:     int = config.SEARCH_MAX_SCAN,
+    ):
+        self.path         = path
+        self.max_postings = max_postings
+        self.max_scan     = max_scan
+        self.ready        = False
+        self._lock        = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._postings = {}             # term -> {department code -> Postings}
+        self._docs     = {}             # issue_id -> doc number
+        self._ids      = []             # doc number -> issue_id
+        self._dept     = array("I")
+        self._category = array("I")
+        self._status   = array("I")
+        self._created  = array("d")
+        self._length   = array("I")
+        self._codes    = {"department": {}, "category": {}, "status": {}}
+
+        self._total_length   = 0
+        self.indexed_until   = ""       # newest created_at indexed
+        self.saved_at        = None
+        self._pending_status = {}       # status changes for issues a running build hasn't reached
+        self._bulk           = False    # full build: append now, sort once at the end
+
+    def _code(self, kind: str, value) -> int:
+        codes = self._codes[kind]
+        code  = codes.get(value)
+        if code is None:
+            code = codes[value] = len(codes)
+        return code
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    # ── writes ──
+    def add(self, issue: dict):
+        issue_id = issue["issue_id"]
+        if issue_id in self._docs:
+            return
+        doc = len(self._ids)
+        self._docs[issue_id] = doc
+        self._ids.append(issue_id)
+
+        status = self._pending_status.pop(issue_id, issue.get("current_status_id"))
+        dept   = self._code("department", issue.get("department_id"))
+        self._dept.append(dept)
+        self._category.append(self._code("category", issue.get("category_id")))
+        self._status.append(self._code("status", status))
+        self._created.append(_epoch(issue.get("created_at")))
+        self.indexed_until = max(self.indexed_until, issue.get("created_at") or "")
+
+        tfs = {}
+        for token in tokenize(issue.get("title")) * TITLE_BOOST + tokenize(issue.get("description")):
+            tfs[token] = tfs.get(token, 0) + 1
+        length = sum(tfs.values())
+        self._length.append(length)
+        self._total_length += length
+
+        norm = K1 * (1 - B + B * length / self._avg_length())
+        with self._lock:
+            for term, tf in tfs.items():
+                parts    = self._postings.setdefault(term, {})
+                postings = parts.get(dept)
+                if postings is None:
+                    postings = parts[dept] = Postings()
+                postings.add(tf * (K1 + 1) / (tf + norm), doc, tf, keep_sorted=not self._bulk)
+
+    def set_status(self, issue_id: str, status_id: str):
+        doc = self._docs.get(issue_id)
+        if doc is None:
+            if not self.ready:
+                self._pending_status[issue_id] = status_id
+            return
+        self._status[doc] = self._code("status", status_id)
+
+    def _avg_length(self) -> float:
+        # Documents can tokenize to nothing; keep the norm away from zero
+        return self._total_length / len(self._ids) if self._total_length else 1.0
+
+    def _reweight(self):
+        # Weights are fixed when a document is added, against the average
+        # length at that time; after a bulk build that average has moved a lot
+        avg    = self._avg_length()
+        length = self._length
+        for p in (p for parts in self._postings.values() for p in parts.values()):
+            neg   = [-tf * (K1 + 1) / (tf + K1 * (1 - B + B * length[doc] / avg)) for doc, tf in zip(p.docs, p.tfs)]
+            order = sorted(range(len(neg)), key=neg.__getitem__)
+            p.neg  = array("f", [neg[i] for i in order])
+            p.docs = array("I", [p.docs[i] for i in order])
+            p.tfs  = array("B", [p.tfs[i] for i in order])
+
+    # ── queries ──
+    def search(self, query: str, filter: IssueFilter, limit: int) -> list:
+        """[(issue_id, score)] best first."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or not self._ids:
+            return []
+
+        if not self._can_match(filter):
+            return []
+        dept = self._codes["department"][filter.department_id] if filter.department_id else None
+        rest = replace(filter, department_id=None)
+        rest = rest if any((rest.category_id, rest.status_in, rest.created_from, rest.created_to)) else None
+
+        n      = len(self._ids)
+        budget = self.max_postings // len(terms)
+        scan   = max(budget, self.max_scan // len(terms))
+        scores = {}
+        get    = scores.get
+        for term in terms:
+            parts = self._postings.get(term)
+            if not parts:
+                continue
+            lists = list(parts.values())
+            df    = sum(len(p.docs) for p in lists)
+            idf   = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            if dept is not None:
+                lists = [parts[dept]] if dept in parts else []
+
+            # Read the best postings across the lists; with filters left to
+            # check, keep reading twice as far until `budget` documents
+            # matched or `scan` postings were read
+            read   = [0] * len(lists)
+            found  = 0
+            want   = budget
+            total  = min(scan, sum(len(p.docs) for p in lists))
+            while True:
+                with self._lock:
+                    ends   = _cut(lists, want)
+                    slices = [(p.docs[a:b], p.neg[a:b]) for p, a, b in zip(lists, read, ends) if b > a]
+                read = ends
+                for docs, neg in slices:
+                    if rest is None:
+                        for w, doc in zip(neg, docs):
+                            scores[doc] = get(doc, 0.0) - w * idf
+                        continue
+                    keep = self._matching(docs, rest)
+                    for i in keep:
+                        doc = docs[i]
+                        scores[doc] = get(doc, 0.0) - neg[i] * idf
+                    found += len(keep)
+                if rest is None or found >= budget or want >= total:
+                    break
+                want = min(total, want * 2)
+
+        best = heapq.nlargest(limit, scores, key=scores.__getitem__)
+        return [(self._ids[doc], round(scores[doc], 4)) for doc in best]
+
+    def _can_match(self, f: IssueFilter) -> bool:
+        # A department, category or status never indexed matches nothing
+        if f.department_id and f.department_id not in self._codes["department"]:
+            return False
+        if f.category_id and f.category_id not in self._codes["category"]:
+            return False
+        if f.status_in and not any(s in self._codes["status"] for s in f.status_in):
+            return False
+        return True
+
+    def _matching(self, docs, f: IssueFilter) -> list:
+        """Positions in `docs` of the documents that pass `f`.
+
+        One tight comprehension per condition; each pass only sees what the
+        previous one kept.
+        """
+        keep = range(len(docs))
+        if f.department_id:
+            code, column = self._codes["department"].get(f.department_id, -1), self._dept
+            keep = [i for i in keep if column[docs[i]] == code]
+        if f.category_id:
+            code, column = self._codes["category"].get(f.category_id, -1), self._category
+            keep = [i for i in keep if column[docs[i]] == code]
+        if f.status_in:
+            codes, column = {self._codes["status"].get(s, -1) for s in f.status_in}, self._status
+            keep = [i for i in keep if column[docs[i]] in codes]
+        if f.created_from:
+            since, column = _epoch(f.created_from), self._created
+            keep = [i for i in keep if column[docs[i]] >= since]
+        if f.created_to:
+            until, column = _epoch(f.created_to), self._created
+            keep = [i for i in keep if column[docs[i]] < until]
+        return keep
+
+    # ── persistence ──
+    def save(self):
+        skip  = ("path", "max_postings", "max_scan", "ready", "_lock", "_pending_status", "_bulk")
+        with self._lock:
+            state = {k: v for k, v in vars(self).items() if k not in skip}
+        state["saved_at"] = datetime.now(timezone.utc).isoformat()
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump({"version": FORMAT_VERSION, "state": state}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.path)
+        self.saved_at = state["saved_at"]
+        log.info("search index saved", extra={"documents": len(self), "path": self.path})
+
+    def _read_snapshot(self):
+        if not self.path or not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, "rb") as f:
+                snapshot = pickle.load(f)
+        except Exception:
+            log.exception("search index snapshot unreadable; rebuilding", extra={"path": self.path})
+            return None
+        return snapshot["state"] if snapshot.get("version") == FORMAT_VERSION else None
+
+    # ── startup ──
+    async def start(self):
+        """Load the snapshot and catch up, or build from the issue table."""
+        started = time.perf_counter()
+        # Issues written while the file loads go into the old structures and
+        # are lost on the swap below, but `_catch_up` re-reads them
+        state = await asyncio.to_thread(self._read_snapshot)
+        if state:
+            vars(self).update(state)
+            added, moved = await self._catch_up()
+            log.info("search index loaded", extra={
+                "documents": len(self), "caught_up": added, "status_changes": moved,
+                "secs": round(time.perf_counter() - started, 2),
+            })
+        else:
+            await self._build()
+            log.info("search index built", extra={
+                "documents": len(self), "secs": round(time.perf_counter() - started, 2),
+            })
+            if self.path:
+                self.save()
+        self._pending_status.clear()
+        self.ready = True
+
+    async def _build(self):
+        self._bulk = True
+        try:
+            async for issue in repo.iter_issues(IssueFilter(), INDEX_COLUMNS, batch=config.SEARCH_SCAN_BATCH):
+                self.add(issue)
+        finally:
+            self._bulk = False
+            self._reweight()
+
+    async def _catch_up(self) -> tuple:
+        # Issues created after the snapshot, with some overlap for rows that
+        # committed late; ones we already have are skipped by `add`
+        since, added = None, 0
+        if self.indexed_until:
+            overlap = timedelta(seconds=config.SEARCH_CATCHUP_OVERLAP)
+            since   = (datetime.fromisoformat(self.indexed_until) - overlap).isoformat()
+        before = len(self)
+        async for issue in repo.iter_issues(IssueFilter(created_from=since), INDEX_COLUMNS, batch=config.SEARCH_SCAN_BATCH):
+            self.add(issue)
+        added = len(self) - before
+
+        # Status changes since the snapshot, replayed in order
+        moved = 0
+        async for row in repo.iter_history("history_id, issue_id, status_id, created_at", created_from=self.saved_at):
+            self.set_status(row["issue_id"], row["status_id"])
+            moved += 1
+        return added, moved
+
+    async def run(self):
+        try:
+            await self.start()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            log.exception("search index startup failed")
+
+    def close(self):
+        if self.ready and self.path:
+            self.save()
+
+
+index = SearchIndex()
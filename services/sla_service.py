@@ -0,0 +1,282 @@
+import asyncio
+import bisect
+import math
+import time
+from datetime import datetime, timezone
+
+import config
+from models import IssueFilter, RESOLVED_STATUS_ID, CLOSED_STATUS_IDS
+from services.dashboard_service import apply_missed
+from services.log_service import get_logger
+from services.supabase_service import repo
+
+log = get_logger("sla")
+
+SCAN_COLUMNS = "issue_id, created_at, department_id, category_id, current_status_id"
+
+
+def _epoch(ts: str) -> float:
+    return datetime.fromisoformat(ts.replace("Z", "+00:00")).timestamp() if ts else time.time()
+
+
+class QuantileSketch:
+    """Streaming quantiles with bounded relative error (DDSketch-style).
+
+    Values are counted in logarithmic buckets of ratio `(1 + accuracy) /
+    (1 - accuracy)`, so any quantile is within `accuracy` of the true value
+    and memory depends on the range of values, not how many there are:
+    one second to ten years at 1% is under 1000 buckets.
+    """
+
+    __slots__ = ("gamma", "_log_gamma", "buckets", "zeros", "count", "total")
+
+    def __init__(self, accuracy: float = config.SLA_SKETCH_ACCURACY):
+        self.gamma      = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets    = {}    # bucket index -> count
+        self.zeros      = 0     # values under one second
+        self.count      = 0
+        self.total      = 0.0
+
+    def add(self, value: float):
+        self.count += 1
+        self.total += value
+        if value < 1:
+            self.zeros += 1
+            return
+        i = math.ceil(math.log(value) / self._log_gamma)
+        self.buckets[i] = self.buckets.get(i, 0) + 1
+
+    def merge(self, other: "QuantileSketch"):
+        for i, n in other.buckets.items():
+            self.buckets[i] = self.buckets.get(i, 0) + n
+        self.zeros += other.zeros
+        self.count += other.count
+        self.total += other.total
+
+    def quantile(self, q: float):
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for i in sorted(self.buckets):
+            seen += self.buckets[i]
+            if rank < seen:
+                return 2 * self.gamma ** i / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    def summary(self) -> dict:
+        hours = lambda secs: None if secs is None else round(secs / 3600, 2)
+        return {
+            "count":      self.count,
+            "p50_hours":  hours(self.quantile(0.5)),
+            "p90_hours":  hours(self.quantile(0.9)),
+            "mean_hours": hours(self.total / self.count) if self.count else None,
+        }
+
+
+def sla_hours(category_id: str) -> float:
+    return config.SLA_CATEGORY_HOURS.get(category_id, config.SLA_DEFAULT_HOURS)
+
+
+class SLATracker:
+    """Resolution-time and time-in-status statistics, kept as issues move.
+
+    Per (department, category) there is one sketch of submit-to-resolve
+    times and one per status of how long issues stayed in it. Only open
+    issues are remembered individually: their current status, when they
+    entered it and their SLA deadline. Each department's open issues are
+    also kept sorted by deadline, so the ones breaching their SLA are a
+    prefix of that list.
+
+    `start()` replays `issue_history` once; after that `create_issue` and
+    the status endpoints keep everything current, and requests never read
+    history.
+    """
+
+    def __init__(self):
+        self._resolution = {}    # (department, category) -> QuantileSketch
+        self._in_status  = {}    # (department, category, status) -> QuantileSketch
+        self._open       = {}    # issue_id -> [department, category, status, entered_at, deadline]
+        self._deadlines  = {}    # department -> sorted [(deadline, issue_id)]
+        self._replay     = None  # events seen while the startup replay runs
+        self._touched    = set()
+        self.built_at    = None
+
+    # ── bookkeeping ──
+    def _sketch(self, table: dict, key: tuple) -> QuantileSketch:
+        sketch = table.get(key)
+        if sketch is None:
+            sketch = table[key] = QuantileSketch()
+        return sketch
+
+    def _open_issue(self, issue_id: str, department: str, category: str, status: str, entered_at: float, created: float):
+        deadline = created + sla_hours(category) * 3600
+        self._open[issue_id] = [department, category, status, entered_at, deadline]
+        bisect.insort(self._deadlines.setdefault(department, []), (deadline, issue_id))
+
+    def _close_issue(self, issue_id: str):
+        entry = self._open.pop(issue_id, None)
+        if entry is None:
+            return
+        deadlines = self._deadlines.get(entry[0], [])
+        i = bisect.bisect_left(deadlines, (entry[4], issue_id))
+        if i < len(deadlines) and deadlines[i] == (entry[4], issue_id):
+            del deadlines[i]
+
+    def _transition(self, issue: dict, status: str, at: float, created: float):
+        issue_id   = issue["issue_id"]
+        department = issue.get("department_id")
+        category   = issue.get("category_id")
+        entry      = self._open.get(issue_id)
+        if entry is not None:
+            if entry[2] == status:
+                return
+            self._sketch(self._in_status, (department, category, entry[2])).add(at - entry[3])
+
+        if status == RESOLVED_STATUS_ID:
+            self._sketch(self._resolution, (department, category)).add(at - created)
+        if status in CLOSED_STATUS_IDS:
+            self._close_issue(issue_id)
+        elif entry is not None:
+            entry[2], entry[3] = status, at
+        else:
+            # Reopened, or first seen
+            self._open_issue(issue_id, department, category, status, at, created)
+
+    # ── events from the write path ──
+    def on_created(self, issue: dict):
+        created = _epoch(issue.get("created_at"))
+        if issue.get("current_status_id") not in CLOSED_STATUS_IDS:
+            self._open_issue(
+                issue["issue_id"], issue.get("department_id"), issue.get("category_id"),
+                issue.get("current_status_id"), created, created,
+            )
+        if self._replay is not None:
+            self._replay.append(("created", issue, None))
+            self._touched.add(issue["issue_id"])
+
+    def on_status_changed(self, issue: dict, old_status: str):
+        if old_status == issue.get("current_status_id"):
+            return
+        self._transition(issue, issue["current_status_id"], time.time(), _epoch(issue.get("created_at")))
+        if self._replay is not None:
+            self._replay.append(("moved", {**issue, "_at": time.time()}, old_status))
+            self._touched.add(issue["issue_id"])
+
+    # ── reads ──
+    def ready(self) -> bool:
+        return self.built_at is not None
+
+    def report(self, department_id: str, limit: int) -> dict:
+        by_category = {}
+        overall     = QuantileSketch()
+        for (department, category), sketch in self._resolution.items():
+            if department == department_id:
+                by_category.setdefault(category, {"resolution": sketch, "in_status": {}})
+                overall.merge(sketch)
+        for (department, category, status), sketch in self._in_status.items():
+            if department == department_id:
+                by_category.setdefault(category, {"resolution": None, "in_status": {}})["in_status"][status] = sketch
+
+        now       = time.time()
+        deadlines = self._deadlines.get(department_id, [])
+        breaching = bisect.bisect_left(deadlines, (now, ""))
+        issues    = []
+        for deadline, issue_id in deadlines[:min(breaching, limit)]:
+            _, category, status, entered_at, _ = self._open[issue_id]
+            hours = sla_hours(category)
+            issues.append({
+                "issue_id":          issue_id,
+                "category_id":       category,
+                "current_status_id": status,
+                "sla_hours":         hours,
+                "age_hours":         round((now - deadline) / 3600 + hours, 2),
+                "overdue_hours":     round((now - deadline) / 3600, 2),
+                "in_status_hours":   round((now - entered_at) / 3600, 2),
+            })
+
+        return {
+            "department_id": department_id,
+            "resolution":    overall.summary(),
+            "by_category": [
+                {
+                    "category_id":    category,
+                    "sla_hours":      sla_hours(category),
+                    "resolution":     (stats["resolution"] or QuantileSketch()).summary(),
+                    "time_in_status": [{"status_id": s, **sk.summary()} for s, sk in stats["in_status"].items()],
+                }
+                for category, stats in by_category.items()
+            ],
+            "open":      len(deadlines),
+            "breaching": {"count": breaching, "issues": issues},
+            "built_at":  self.built_at,
+        }
+
+    # ── startup ──
+    async def start(self):
+        """Rebuild everything from one scan of the issues and one of their history."""
+        started       = time.perf_counter()
+        self._replay  = []
+        self._touched = set()
+        try:
+            issues = {}    # issue_id -> row; only held while replaying
+            async for issue in repo.iter_issues(IssueFilter(), SCAN_COLUMNS, batch=config.SLA_SCAN_BATCH):
+                issues[issue["issue_id"]] = issue
+
+            fresh    = SLATracker()
+            replayed = {}    # issue_id -> status its history ends at
+            async for row in repo.iter_history("history_id, issue_id, status_id, created_at", batch=config.SLA_SCAN_BATCH):
+                issue = issues.get(row["issue_id"])
+                if issue is None:
+                    continue
+                created = _epoch(issue["created_at"])
+                if row["issue_id"] not in replayed:
+                    # The first history row is the submission itself
+                    fresh._open_issue(
+                        row["issue_id"], issue["department_id"], issue["category_id"], row["status_id"], created, created,
+                    )
+                elif row["status_id"] != replayed[row["issue_id"]]:
+                    # Notes are written at the current status; only changes count
+                    fresh._transition(issue, row["status_id"], _epoch(row["created_at"]), created)
+                replayed[row["issue_id"]] = row["status_id"]
+
+            # Issues without history still count as open
+            for issue_id, issue in issues.items():
+                if issue_id not in replayed and issue["current_status_id"] not in CLOSED_STATUS_IDS:
+                    created = _epoch(issue["created_at"])
+                    fresh._open_issue(
+                        issue_id, issue["department_id"], issue["category_id"], issue["current_status_id"], created, created,
+                    )
+        except BaseException:
+            self._replay = None
+            raise
+
+        events, self._replay = self._replay, None
+        seen_status = {i: replayed.get(i, issues[i]["current_status_id"]) for i in self._touched if i in issues}
+        self._resolution, self._in_status = fresh._resolution, fresh._in_status
+        self._open, self._deadlines       = fresh._open, fresh._deadlines
+        apply_missed(
+            events, seen_status,
+            add=lambda issue: self.on_created(issue),
+            move=lambda issue, old_status: self._transition(
+                issue, issue["current_status_id"], issue["_at"], _epoch(issue.get("created_at")),
+            ),
+        )
+        self.built_at = datetime.now(timezone.utc).isoformat()
+        log.info("sla stats built", extra={
+            "issues": len(issues), "open": len(self._open), "secs": round(time.perf_counter() - started, 2),
+        })
+
+    async def run(self):
+        try:
+            await self.start()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            log.exception("sla stats startup failed")
+
+
+sla = SLATracker()
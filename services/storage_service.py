@@ -0,0 +1,245 @@
+import asyncio
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+
+import config
+from database import supabase
+from services.log_service import get_logger
+from services.process_pool import process_pool
+
+log = get_logger("uploads")
+
+MULTIPART_OVERHEAD = 64 * 1024    # boundaries and part headers around the image
+
+# Accepted image types: declared content type -> (file extension, magic matched at offset 0)
+IMAGE_TYPES = {
+    "image/jpeg": (".jpg",  re.compile(rb"\xff\xd8\xff")),
+    "image/png":  (".png",  re.compile(rb"\x89PNG\r\n\x1a\n")),
+    "image/webp": (".webp", re.compile(rb"RIFF.{4}WEBP", re.DOTALL)),    # RIFF, chunk size, form type
+}
+
+
+# ─── STORAGE BACKENDS ──────────────────────────────────────
+class StorageBackend:
+    """Where uploaded images end up. Objects are addressed by key."""
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def put(self, key: str, path: str, content_type: str):
+        raise NotImplementedError
+
+    def public_url(self, key: str) -> str:
+        raise NotImplementedError
+
+
+class SupabaseStorage(StorageBackend):
+    def __init__(self, bucket: str = config.STORAGE_BUCKET):
+        self.bucket = bucket
+
+    def exists(self, key: str) -> bool:
+        folder, _, name = key.rpartition("/")
+        found = supabase.storage.from_(self.bucket).list(folder or None, {"search": name})
+        return any(obj.get("name") == name for obj in found or [])
+
+    def put(self, key: str, path: str, content_type: str):
+        supabase.storage.from_(self.bucket).upload(key, path, {"content-type": content_type})
+
+    def public_url(self, key: str) -> str:
+        return supabase.storage.from_(self.bucket).get_public_url(key)
+
+
+class LocalStorage(StorageBackend):
+    """Plain directory on disk; stands in for Supabase Storage locally and in tests."""
+
+    def __init__(self, root: str = config.LOCAL_STORAGE_DIR, base_url: str = config.LOCAL_STORAGE_URL):
+        self.root     = root
+        self.base_url = base_url.rstrip("/")
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split("/"))
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def put(self, key: str, path: str, content_type: str):
+        target = self._path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(path, target)
+
+    def public_url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+
+def make_storage(kind: str = config.STORAGE_BACKEND) -> StorageBackend:
+    if kind == "local":
+        return LocalStorage()
+    if kind == "supabase":
+        return SupabaseStorage()
+    raise ValueError(f"Unknown STORAGE_BACKEND '{kind}'")
+
+
+# ─── THUMBNAILS ────────────────────────────────────────────
+# Runs in the worker processes, so it must stay a module-level function
+def _make_thumbnail(src: str, dest: str, size: int):
+    from PIL import Image
+
+    with Image.open(src) as img:
+        img.thumbnail((size, size))
+        img.convert("RGB").save(dest, "JPEG", quality=80, optimize=True)
+
+
+# ─── UPLOAD PIPELINE ───────────────────────────────────────
+class ImageUploader:
+    """Streams an upload to a temp file while hashing and size-checking it.
+
+    Objects are stored under their SHA-256, so a photo that was uploaded
+    before is recognised after reading and its existing URL is returned
+    without storing it again. Thumbnails are rendered in a small process pool
+    so Pillow never runs on the event loop.
+    """
+
+    def __init__(
+        self,
+        storage:       StorageBackend,
+        max_bytes:     int = config.UPLOAD_MAX_BYTES,
+        chunk_size:    int = config.UPLOAD_CHUNK_SIZE,
+        thumb_size:    int = config.THUMBNAIL_SIZE,
+        thumb_workers: int = config.THUMBNAIL_WORKERS,
+    ):
+        self.storage       = storage
+        self.max_bytes     = max_bytes
+        self.chunk_size    = chunk_size
+        self.thumb_size    = thumb_size
+        self.thumb_workers = thumb_workers
+
+        self._pool = None
+
+    def start(self):
+        if self._pool is None:
+            self._pool = process_pool(self.thumb_workers)
+
+    def stop(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def _spool(self, file: UploadFile, ext: str, magic: re.Pattern) -> tuple:
+        digest = hashlib.sha256()
+        size   = 0
+        fd, path = tempfile.mkstemp(suffix=ext)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                while chunk := await file.read(self.chunk_size):
+                    if size == 0 and not magic.match(chunk):
+                        raise HTTPException(status_code=415, detail="File content is not a supported image.")
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise HTTPException(status_code=413, detail="Image is too large.")
+                    digest.update(chunk)
+                    out.write(chunk)
+        except BaseException:
+            os.unlink(path)
+            raise
+        if size == 0:
+            os.unlink(path)
+            raise HTTPException(status_code=400, detail="Empty file.")
+        return path, digest.hexdigest()
+
+    async def spool(self, file: UploadFile) -> tuple:
+        """(temp path, sha256) of a checked upload; the caller removes the file."""
+        if file.content_type not in IMAGE_TYPES:
+            raise HTTPException(status_code=415, detail=f"Unsupported image type '{file.content_type}'.")
+        ext, magic = IMAGE_TYPES[file.content_type]
+        return await self._spool(file, ext, magic)
+
+    async def store(self, path: str, sha: str, content_type: str) -> dict:
+        """Store a spooled upload under its hash, unless it is already there."""
+        key       = f"{sha}{IMAGE_TYPES[content_type][0]}"
+        thumb_key = f"thumbs/{sha}.jpg"
+        if await run_in_threadpool(self.storage.exists, key):
+            thumbnail_url = self.storage.public_url(thumb_key)
+            if not await run_in_threadpool(self.storage.exists, thumb_key):
+                # The first upload's thumbnail failed; the spooled copy can fill the gap
+                thumbnail_url = await self._thumbnail(path, thumb_key)
+            return {
+                "url":           self.storage.public_url(key),
+                "thumbnail_url": thumbnail_url,
+                "deduplicated":  True,
+            }
+
+        await run_in_threadpool(self.storage.put, key, path, content_type)
+        thumbnail_url = await self._thumbnail(path, thumb_key)
+        return {
+            "url":           self.storage.public_url(key),
+            "thumbnail_url": thumbnail_url,
+            "deduplicated":  False,
+        }
+
+    async def _thumbnail(self, path: str, key: str):
+        self.start()
+        thumb_path = path + ".thumb.jpg"
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                self._pool, _make_thumbnail, path, thumb_path, self.thumb_size
+            )
+            await run_in_threadpool(self.storage.put, key, thumb_path, "image/jpeg")
+            return self.storage.public_url(key)
+        except Exception:
+            # The original is already stored; list views fall back to it
+            log.exception("thumbnail failed", extra={"key": key})
+            return None
+        finally:
+            if os.path.exists(thumb_path):
+                os.unlink(thumb_path)
+
+
+storage  = make_storage()
+uploader = ImageUploader(storage)
+
+
+# ─── BODY SIZE GUARD ───────────────────────────────────────
+class UploadSizeGuard:
+    """Caps the request body of upload routes before anything parses it.
+
+    FastAPI reads and spools the whole multipart body before the endpoint
+    runs, so the endpoint itself can't refuse an oversized upload in time. A
+    declared Content-Length over the limit is answered with 413 straight
+    away; otherwise the body is counted as it is received and reading stops
+    with 413 as soon as it passes the limit, which also covers chunked
+    uploads.
+    """
+
+    def __init__(self, app, paths: tuple = ("/upload-image",), max_bytes: int = None):
+        self.app       = app
+        self.paths     = frozenset(paths)
+        self.max_bytes = (max_bytes or uploader.max_bytes) + MULTIPART_OVERHEAD
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            return await self.app(scope, receive, send)
+
+        for name, value in scope.get("headers", ()):
+            if name == b"content-length" and value.isdigit() and int(value) > self.max_bytes:
+                response = JSONResponse({"detail": "Image is too large."}, status_code=413)
+                return await response(scope, receive, send)
+
+        received = 0
+
+        async def counted():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise HTTPException(status_code=413, detail="Image is too large.")
+            return message
+
+        await self.app(scope, counted, send)
@@ -0,0 +1,674 @@
+import asyncio
+import bisect
+import json
+import uuid
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import httpx
+
+import config
+from services.metrics import record_upstream
+from models import (
+    Department, Issue, IssueFilter, IssueHistory, Location, User,
+    SUBMITTED_STATUS_ID, IN_PROGRESS_STATUS_ID, RESOLVED_STATUS_ID, REJECTED_STATUS_ID,
+)
+
+
+class RepositoryError(Exception):
+    pass
+
+
+def utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class Repository:
+    """Async data access for every table the API touches.
+
+    Endpoints talk to this interface only. `PostgrestRepository` is the real
+    backend; `MemoryRepository` keeps everything in dicts so the API can run
+    and be load-tested without a network.
+
+    `round_trips` counts upstream calls, for benchmarks and metrics.
+    """
+
+    round_trips = 0
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    # ── lookups ──
+    async def list_table(self, table: str, columns: str) -> List[dict]:
+        raise NotImplementedError
+
+    async def get_department(self, department_id: str) -> Optional[Department]:
+        raise NotImplementedError
+
+    async def get_location(self, location_id: str) -> Optional[Location]:
+        raise NotImplementedError
+
+    async def get_locations(self, location_ids: List[str]) -> List[Location]:
+        """Several locations in one round-trip; unknown ids are left out."""
+        raise NotImplementedError
+
+    # ── users ──
+    async def email_exists(self, email: str) -> bool:
+        raise NotImplementedError
+
+    async def get_user_by_email(self, email: str) -> Optional[User]:
+        """User row with its role embedded as `role.role_name`."""
+        raise NotImplementedError
+
+    async def get_user(self, user_id: str) -> Optional[User]:
+        raise NotImplementedError
+
+    async def get_users(self, user_ids: List[str]) -> List[User]:
+        """Several users in one round-trip; unknown ids are left out."""
+        raise NotImplementedError
+
+    async def insert_user(self, row: User) -> User:
+        raise NotImplementedError
+
+    async def update_user(self, user_id: str, fields: dict) -> Optional[User]:
+        """Returns `user_id` and `department_id` of the updated row, if any."""
+        raise NotImplementedError
+
+    async def delete_user(self, user_id: str) -> Optional[User]:
+        """Returns `user_id` and `department_id` of the deleted row, if any."""
+        raise NotImplementedError
+
+    async def pending_users(self) -> List[User]:
+        raise NotImplementedError
+
+    async def department_staff_emails(self, department_id: str) -> List[str]:
+        raise NotImplementedError
+
+    # ── issues ──
+    async def list_issues(self, filter: IssueFilter, columns: str, cursor: tuple = None, limit: int = 50) -> List[Issue]:
+        """Newest first by (created_at, issue_id), strictly after `cursor`."""
+        raise NotImplementedError
+
+    async def get_issues(self, issue_ids: List[str], columns: str) -> List[Issue]:
+        """Several issues in one round-trip, in no particular order."""
+        raise NotImplementedError
+
+    async def create_issue(self, issue: Issue, images: List[str], remarks: str) -> Issue:
+        """Insert the issue, its first history row and its images atomically."""
+        raise NotImplementedError
+
+    async def change_issue_status(
+        self, issue_id: str, status_id: str, updated_by: Optional[str], remarks: str, department_id: Optional[str] = None,
+    ) -> Optional[Issue]:
+        """Set the status and write the history row atomically.
+
+        Returns the updated issue with an extra `previous_status_id`, or None
+        if it doesn't exist or, with `department_id`, belongs to another
+        department.
+        """
+        raise NotImplementedError
+
+    async def add_issue_note(self, issue_id: str, remarks: str, images: List[str] = (), updated_by: Optional[str] = None) -> Optional[Issue]:
+        """History row at the issue's current status, plus images, atomically."""
+        raise NotImplementedError
+
+    async def change_issue_statuses(
+        self, issue_ids: List[str], status_id: str, department_id: str, updated_by: Optional[str], remarks: str,
+    ) -> List[Issue]:
+        """Bulk `change_issue_status` for issues of one department, in one transaction.
+
+        Ids that are unknown or belong to another department are skipped.
+        """
+        raise NotImplementedError
+
+    async def iter_issues(self, filter: IssueFilter, columns: str, batch: int = 1000):
+        """Yield every matching issue, newest first, one keyset page at a time."""
+        cursor = None
+        while True:
+            rows = await self.list_issues(filter, columns, cursor, batch)
+            for row in rows:
+                yield row
+            if len(rows) < batch:
+                return
+            cursor = (rows[-1]["created_at"], rows[-1]["issue_id"])
+
+    # ── history ──
+    async def list_history(
+        self, columns: str, created_from: str = None, created_to: str = None, cursor: tuple = None, limit: int = 1000,
+    ) -> List[IssueHistory]:
+        """Oldest first by (created_at, history_id), strictly after `cursor`."""
+        raise NotImplementedError
+
+    async def iter_history(self, columns: str, created_from: str = None, created_to: str = None, batch: int = 1000):
+        """Yield every history row in the range, oldest first, one keyset page at a time."""
+        cursor = None
+        while True:
+            rows = await self.list_history(columns, created_from, created_to, cursor, batch)
+            for row in rows:
+                yield row
+            if len(rows) < batch:
+                return
+            cursor = (rows[-1]["created_at"], rows[-1]["history_id"])
+
+
+# ─── POSTGREST (SUPABASE) ──────────────────────────────────
+def _in(values) -> str:
+    return "in.(" + ",".join(f'"{v}"' for v in values) + ")"
+
+
+def _issue_params(f: IssueFilter) -> list:
+    params = []
+    if f.department_id:
+        params.append(("department_id", f"eq.{f.department_id}"))
+    if f.user_id:
+        params.append(("user_id", f"eq.{f.user_id}"))
+    if f.category_id:
+        params.append(("category_id", f"eq.{f.category_id}"))
+    if f.status_in:
+        params.append(("current_status_id", _in(f.status_in)))
+    if f.status_not_in:
+        params.append(("current_status_id", "not." + _in(f.status_not_in)))
+    if f.created_from:
+        params.append(("created_at", f"gte.{f.created_from}"))
+    if f.created_to:
+        params.append(("created_at", f"lt.{f.created_to}"))
+    return params
+
+
+class PostgrestRepository(Repository):
+    """Talks to Supabase's PostgREST API over one pooled `httpx.AsyncClient`.
+
+    The client is created in the app lifespan and shared by every request, so
+    connections are reused and concurrency is bounded by `max_connections`
+    rather than by the threadpool size.
+    """
+
+    def __init__(
+        self,
+        url:             str   = config.SUPABASE_URL,
+        key:             str   = config.SUPABASE_KEY,
+        max_connections: int   = config.HTTP_MAX_CONNECTIONS,
+        timeout:         float = config.HTTP_TIMEOUT,
+    ):
+        self.base_url        = f"{(url or '').rstrip('/')}/rest/v1"
+        self.headers         = {"apikey": key or "", "Authorization": f"Bearer {key or ''}"}
+        self.max_connections = max_connections
+        self.timeout         = timeout
+
+        self._client = None
+
+    async def start(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _request(self, method: str, path: str, params=None, json=None, prefer: str = None):
+        if self._client is None:
+            await self.start()
+        headers = {"Prefer": prefer} if prefer else None
+        self.round_trips += 1
+        res = await self._client.request(method, path, params=params, json=json, headers=headers)
+        record_upstream(len(res.content))
+        if res.status_code >= 400:
+            raise RepositoryError(f"{method} {path} failed ({res.status_code}): {res.text}")
+        return res.json() if res.content else None
+
+    async def _select(self, table: str, columns: str, params: list = ()) -> list:
+        columns = "".join(columns.split())
+        return await self._request("GET", f"/{table}", params=[("select", columns), *params])
+
+    # ── lookups ──
+    async def list_table(self, table, columns):
+        return await self._select(table, columns)
+
+    async def get_department(self, department_id):
+        rows = await self._select(
+            "departments", "department_id, department_name, contact_email",
+            [("department_id", f"eq.{department_id}")],
+        )
+        return rows[0] if rows else None
+
+    async def get_location(self, location_id):
+        rows = await self._select("location", "location_id, latitude, longitude", [("location_id", f"eq.{location_id}")])
+        return rows[0] if rows else None
+
+    async def get_locations(self, location_ids):
+        if not location_ids:
+            return []
+        return await self._select("location", "location_id, latitude, longitude", [("location_id", _in(location_ids))])
+
+    # ── users ──
+    async def email_exists(self, email):
+        rows = await self._select("app_user", "user_id", [("email", f"eq.{email}"), ("limit", "1")])
+        return bool(rows)
+
+    async def get_user_by_email(self, email):
+        rows = await self._select("app_user", "*, role(role_name)", [("email", f"eq.{email}")])
+        return rows[0] if rows else None
+
+    async def get_user(self, user_id):
+        rows = await self._select("app_user", "user_id, full_name, email, role_name, department_id", [("user_id", f"eq.{user_id}")])
+        return rows[0] if rows else None
+
+    async def get_users(self, user_ids):
+        if not user_ids:
+            return []
+        return await self._select("app_user", "user_id, full_name, email, role_name, department_id", [("user_id", _in(user_ids))])
+
+    async def insert_user(self, row):
+        rows = await self._request("POST", "/app_user", json=row, prefer="return=representation")
+        return rows[0]
+
+    async def update_user(self, user_id, fields):
+        rows = await self._request(
+            "PATCH", "/app_user", params=[("user_id", f"eq.{user_id}"), ("select", "user_id,department_id")],
+            json=fields, prefer="return=representation",
+        )
+        return rows[0] if rows else None
+
+    async def delete_user(self, user_id):
+        rows = await self._request(
+            "DELETE", "/app_user", params=[("user_id", f"eq.{user_id}"), ("select", "user_id,department_id")],
+            prefer="return=representation",
+        )
+        return rows[0] if rows else None
+
+    async def pending_users(self):
+        return await self._select(
+            "app_user", "user_id, full_name, email, department_id, created_at, role(role_name)",
+            [("is_approved", "eq.false")],
+        )
+
+    async def department_staff_emails(self, department_id):
+        rows = await self._select(
+            "app_user", "email",
+            [("department_id", f"eq.{department_id}"), ("is_approved", "eq.true")],
+        )
+        return [r["email"] for r in rows]
+
+    # ── issues ──
+    async def list_issues(self, filter, columns, cursor=None, limit=50):
+        params = _issue_params(filter)
+        if cursor:
+            created_at, issue_id = cursor
+            params.append((
+                "or",
+                f'(created_at.lt."{created_at}",and(created_at.eq."{created_at}",issue_id.lt."{issue_id}"))',
+            ))
+        params += [("order", "created_at.desc,issue_id.desc"), ("limit", str(limit))]
+        return await self._select("issue", columns, params)
+
+    async def get_issues(self, issue_ids, columns):
+        if not issue_ids:
+            return []
+        return await self._select("issue", columns, [("issue_id", _in(issue_ids))])
+
+    async def create_issue(self, issue, images, remarks):
+        # sql/002_create_issue_with_history.sql
+        return await self._request("POST", "/rpc/create_issue_with_history", json={
+            "p_issue":   issue,
+            "p_images":  images,
+            "p_remarks": remarks,
+        })
+
+    async def change_issue_status(self, issue_id, status_id, updated_by, remarks, department_id=None):
+        # sql/003_update_issue_status.sql
+        return await self._request("POST", "/rpc/update_issue_status", json={
+            "p_issue_id":      issue_id,
+            "p_status_id":     status_id,
+            "p_updated_by":    updated_by,
+            "p_remarks":       remarks,
+            "p_department_id": department_id,
+        })
+
+    async def add_issue_note(self, issue_id, remarks, images=(), updated_by=None):
+        # sql/005_add_issue_note.sql
+        return await self._request("POST", "/rpc/add_issue_note", json={
+            "p_issue_id":   issue_id,
+            "p_remarks":    remarks,
+            "p_images":     list(images),
+            "p_updated_by": updated_by,
+        })
+
+    async def change_issue_statuses(self, issue_ids, status_id, department_id, updated_by, remarks):
+        # sql/004_bulk_update_issue_status.sql
+        return await self._request("POST", "/rpc/bulk_update_issue_status", json={
+            "p_issue_ids":     issue_ids,
+            "p_status_id":     status_id,
+            "p_department_id": department_id,
+            "p_updated_by":    updated_by,
+            "p_remarks":       remarks,
+        })
+
+    # ── history ──
+    async def list_history(self, columns, created_from=None, created_to=None, cursor=None, limit=1000):
+        params = []
+        if created_from:
+            params.append(("created_at", f"gte.{created_from}"))
+        if created_to:
+            params.append(("created_at", f"lt.{created_to}"))
+        if cursor:
+            created_at, history_id = cursor
+            params.append((
+                "or",
+                f'(created_at.gt."{created_at}",and(created_at.eq."{created_at}",history_id.gt."{history_id}"))',
+            ))
+        params += [("order", "created_at.asc,history_id.asc"), ("limit", str(limit))]
+        return await self._select("issue_history", columns, params)
+
+
+# ─── IN-MEMORY ─────────────────────────────────────────────
+def _project(row: dict, columns: str) -> dict:
+    names = [c.strip() for c in columns.split(",")]
+    if "*" in names:
+        return dict(row)
+    return {n: row.get(n) for n in names}
+
+
+class MemoryRepository(Repository):
+    """Dict-backed stand-in for Supabase, for local runs and benchmarks.
+
+    Issues are kept in (created_at, issue_id) order, with per-department and
+    per-user indexes, so keyset pages cost about the same as on Postgres.
+    Every operation counts as one round-trip and can sleep `latency_ms` to
+    mimic the network hop to Supabase.
+    """
+
+    def __init__(self, latency_ms: float = config.MEMORY_LATENCY_MS):
+        self.latency = latency_ms / 1000
+        self.tables = {
+            "role": [
+                {"role_id": "role-citizen",    "role_name": "citizen"},
+                {"role_id": "role-department", "role_name": "department"},
+                {"role_id": "role-admin",      "role_name": "admin"},
+            ],
+            "issue_status": [
+                {"status_id": SUBMITTED_STATUS_ID,   "status_name": "Submitted"},
+                {"status_id": IN_PROGRESS_STATUS_ID, "status_name": "In Progress"},
+                {"status_id": RESOLVED_STATUS_ID,    "status_name": "Resolved"},
+                {"status_id": REJECTED_STATUS_ID,    "status_name": "Rejected"},
+            ],
+            "categories":  [],
+            "departments": [],
+            "location":    [],
+        }
+        self.users         = {}    # user_id -> row
+        self.users_by_mail = {}    # email -> user_id
+        self.issues        = {}    # issue_id -> row
+        self.history       = []    # sorted by (created_at, history_id)
+        self.images        = []
+
+        self._order         = []   # sorted (created_at, issue_id)
+        self._by_department = {}   # department_id -> sorted keys
+        self._by_user       = {}   # user_id -> sorted keys
+        self._history_keys  = []   # (created_at, history_id) of each history row, same order
+
+    async def _round_trip(self):
+        self.round_trips += 1
+        record_upstream()
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    # ── seeding ──
+    def seed(self, data: dict):
+        """Load {"role": [...], "departments": [...], "app_user": [...], "issue": [...], ...}."""
+        for table, rows in data.items():
+            if table == "app_user":
+                for row in rows:
+                    self.add_user(row)
+            elif table == "issue":
+                for row in rows:
+                    self.add_issue(row)
+            else:
+                self.tables[table] = list(rows)
+
+    def add_user(self, row: dict) -> dict:
+        row = {"user_id": str(uuid.uuid4()), "created_at": utc_now(), "is_approved": True, **row}
+        self.users[row["user_id"]]       = row
+        self.users_by_mail[row["email"]] = row["user_id"]
+        return row
+
+    def _add_history(self, row: dict):
+        key = (row["created_at"], row["history_id"])
+        at  = bisect.bisect_right(self._history_keys, key)
+        self._history_keys.insert(at, key)
+        self.history.insert(at, row)
+
+    def add_issue(self, row: dict) -> dict:
+        row = {"issue_id": str(uuid.uuid4()), "created_at": utc_now(), **row}
+        key = (row["created_at"], row["issue_id"])
+        self.issues[row["issue_id"]] = row
+        bisect.insort(self._order, key)
+        bisect.insort(self._by_department.setdefault(row.get("department_id"), []), key)
+        bisect.insort(self._by_user.setdefault(row.get("user_id"), []), key)
+        return row
+
+    # ── lookups ──
+    async def list_table(self, table, columns):
+        await self._round_trip()
+        return [_project(r, columns) for r in self.tables.get(table, [])]
+
+    async def get_department(self, department_id):
+        await self._round_trip()
+        for d in self.tables["departments"]:
+            if d["department_id"] == department_id:
+                return dict(d)
+        return None
+
+    async def get_location(self, location_id):
+        await self._round_trip()
+        for loc in self.tables["location"]:
+            if loc["location_id"] == location_id:
+                return _project(loc, "location_id, latitude, longitude")
+        return None
+
+    async def get_locations(self, location_ids):
+        await self._round_trip()
+        wanted = set(location_ids)
+        return [_project(loc, "location_id, latitude, longitude") for loc in self.tables["location"] if loc["location_id"] in wanted]
+
+    # ── users ──
+    async def email_exists(self, email):
+        await self._round_trip()
+        return email in self.users_by_mail
+
+    def _with_role(self, user: dict) -> dict:
+        role = next((r for r in self.tables["role"] if r["role_id"] == user.get("role_id")), None)
+        return {**user, "role": {"role_name": role["role_name"] if role else user.get("role_name")}}
+
+    async def get_user_by_email(self, email):
+        await self._round_trip()
+        user_id = self.users_by_mail.get(email)
+        return self._with_role(self.users[user_id]) if user_id else None
+
+    async def get_user(self, user_id):
+        await self._round_trip()
+        user = self.users.get(user_id)
+        return dict(user) if user else None
+
+    async def get_users(self, user_ids):
+        await self._round_trip()
+        return [dict(self.users[u]) for u in dict.fromkeys(user_ids) if u in self.users]
+
+    async def insert_user(self, row):
+        await self._round_trip()
+        return dict(self.add_user(row))
+
+    async def update_user(self, user_id, fields):
+        await self._round_trip()
+        user = self.users.get(user_id)
+        if user is None:
+            return None
+        user.update(fields)
+        return _project(user, "user_id, department_id")
+
+    async def delete_user(self, user_id):
+        await self._round_trip()
+        user = self.users.pop(user_id, None)
+        if user is None:
+            return None
+        self.users_by_mail.pop(user["email"], None)
+        return _project(user, "user_id, department_id")
+
+    async def pending_users(self):
+        await self._round_trip()
+        cols = "user_id, full_name, email, department_id, created_at"
+        return [
+            {**_project(u, cols), "role": self._with_role(u)["role"]}
+            for u in self.users.values() if not u.get("is_approved")
+        ]
+
+    async def department_staff_emails(self, department_id):
+        await self._round_trip()
+        return [
+            u["email"] for u in self.users.values()
+            if u.get("department_id") == department_id and u.get("is_approved")
+        ]
+
+    # ── issues ──
+    def _matches(self, issue: dict, f: IssueFilter) -> bool:
+        status = issue.get("current_status_id")
+        return (
+            (not f.department_id or issue.get("department_id") == f.department_id)
+            and (not f.user_id or issue.get("user_id") == f.user_id)
+            and (not f.category_id or issue.get("category_id") == f.category_id)
+            and (not f.status_in or status in f.status_in)
+            and (not f.status_not_in or status not in f.status_not_in)
+            and (not f.created_from or issue["created_at"] >= f.created_from)
+            and (not f.created_to or issue["created_at"] < f.created_to)
+        )
+
+    async def list_issues(self, filter, columns, cursor=None, limit=50):
+        await self._round_trip()
+        if filter.user_id:
+            keys = self._by_user.get(filter.user_id, [])
+        elif filter.department_id:
+            keys = self._by_department.get(filter.department_id, [])
+        else:
+            keys = self._order
+
+        end = bisect.bisect_left(keys, tuple(cursor)) if cursor else len(keys)
+        out = []
+        for i in range(end - 1, -1, -1):
+            issue = self.issues.get(keys[i][1])
+            if issue is not None and self._matches(issue, filter):
+                out.append(_project(issue, columns))
+                if len(out) >= limit:
+                    break
+        return out
+
+    async def get_issues(self, issue_ids, columns):
+        await self._round_trip()
+        return [_project(self.issues[i], columns) for i in dict.fromkeys(issue_ids) if i in self.issues]
+
+    async def create_issue(self, issue, images, remarks):
+        await self._round_trip()
+        row = self.add_issue(issue)
+        self._add_history({
+            "history_id": str(uuid.uuid4()),
+            "issue_id":   row["issue_id"],
+            "status_id":  row["current_status_id"],
+            "updated_by": None,
+            "remarks":    remarks,
+            "created_at": row["created_at"],
+        })
+        self.images += [{"issue_id": row["issue_id"], "image_url": url} for url in images]
+        return dict(row)
+
+    async def change_issue_status(self, issue_id, status_id, updated_by, remarks, department_id=None):
+        await self._round_trip()
+        issue = self.issues.get(issue_id)
+        if issue is None or (department_id is not None and issue.get("department_id") != department_id):
+            return None
+        previous = issue.get("current_status_id")
+        issue["current_status_id"] = status_id
+        self._add_history({
+            "history_id": str(uuid.uuid4()),
+            "issue_id":   issue_id,
+            "status_id":  status_id,
+            "updated_by": updated_by,
+            "remarks":    remarks,
+            "created_at": utc_now(),
+        })
+        return {**issue, "previous_status_id": previous}
+
+    async def add_issue_note(self, issue_id, remarks, images=(), updated_by=None):
+        await self._round_trip()
+        issue = self.issues.get(issue_id)
+        if issue is None:
+            return None
+        self._add_history({
+            "history_id": str(uuid.uuid4()),
+            "issue_id":   issue_id,
+            "status_id":  issue.get("current_status_id"),
+            "updated_by": updated_by,
+            "remarks":    remarks,
+            "created_at": utc_now(),
+        })
+        self.images += [{"issue_id": issue_id, "image_url": url} for url in images]
+        return dict(issue)
+
+    async def change_issue_statuses(self, issue_ids, status_id, department_id, updated_by, remarks):
+        await self._round_trip()
+        now, out = utc_now(), []
+        for issue_id in dict.fromkeys(issue_ids):
+            issue = self.issues.get(issue_id)
+            if issue is None or issue.get("department_id") != department_id:
+                continue
+            previous = issue.get("current_status_id")
+            issue["current_status_id"] = status_id
+            self._add_history({
+                "history_id": str(uuid.uuid4()),
+                "issue_id":   issue_id,
+                "status_id":  status_id,
+                "updated_by": updated_by,
+                "remarks":    remarks,
+                "created_at": now,
+            })
+            out.append({**issue, "previous_status_id": previous})
+        return out
+
+    # ── history ──
+    async def list_history(self, columns, created_from=None, created_to=None, cursor=None, limit=1000):
+        await self._round_trip()
+        start = 0
+        if created_from:
+            start = bisect.bisect_left(self._history_keys, (created_from,))
+        if cursor:
+            start = max(start, bisect.bisect_right(self._history_keys, tuple(cursor)))
+        rows = []
+        for h in self.history[start:start + limit]:
+            if created_to and h["created_at"] >= created_to:
+                break
+            rows.append(_project(h, columns))
+        return rows
+
+
+def make_repository(kind: str = config.DATA_BACKEND) -> Repository:
+    if kind == "memory":
+        memory = MemoryRepository()
+        if config.MEMORY_SEED_FILE:
+            with open(config.MEMORY_SEED_FILE) as f:
+                memory.seed(json.load(f))
+        return memory
+    if kind == "supabase":
+        return PostgrestRepository()
+    raise ValueError(f"Unknown DATA_BACKEND '{kind}'")
+
+
+repo = make_repository()
@@ -0,0 +1,11 @@
+-- Keyset pagination on issue listings orders by (created_at desc, issue_id desc).
+-- These indexes let every page, however deep, start with an index seek.
+
+create index if not exists issue_keyset_idx
+    on issue (created_at desc, issue_id desc);
+
+create index if not exists issue_user_keyset_idx
+    on issue (user_id, created_at desc, issue_id desc);
+
+create index if not exists issue_department_keyset_idx
+    on issue (department_id, created_at desc, issue_id desc);
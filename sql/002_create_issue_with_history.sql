@@ -0,0 +1,30 @@
+-- Creates an issue, its initial history row and all of its images in one
+-- transaction. Called from POST /create-issue as a single RPC round-trip, so
+-- the cost no longer grows with the number of images and a failure part way
+-- through leaves nothing behind.
+
+create or replace function create_issue_with_history(
+    p_issue   jsonb,
+    p_images  text[] default '{}',
+    p_remarks text   default 'Issue submitted by citizen'
+) returns jsonb
+language plpgsql
+as $$
+declare
+    new_issue issue;
+begin
+    insert into issue (title, description, category_id, department_id, location_id, user_id, current_status_id)
+    select title, description, category_id, department_id, location_id, user_id, current_status_id
+    from jsonb_populate_record(null::issue, p_issue)
+    returning * into new_issue;
+
+    insert into issue_history (issue_id, status_id, updated_by, remarks)
+    values (new_issue.issue_id, new_issue.current_status_id, null, p_remarks);
+
+    insert into issue_image (issue_id, image_url)
+    select new_issue.issue_id, url
+    from unnest(coalesce(p_images, '{}')) as url;
+
+    return to_jsonb(new_issue);
+end;
+$$;
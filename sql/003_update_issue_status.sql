@@ -0,0 +1,47 @@
+-- Moves an issue to a new status and records the history row in one
+-- transaction. Returns the updated issue plus `previous_status_id`, which the
+-- API needs to keep its in-memory dashboard counters exact.
+--
+-- With `p_department_id` set (department staff), an issue of another
+-- department is treated as missing and left alone; admins pass null.
+-- Returns null when nothing was updated.
+
+-- Earlier versions had no department parameter; drop them so PostgREST
+-- does not see two candidates for the same call
+drop function if exists update_issue_status(
+    issue.issue_id%type, issue.current_status_id%type, issue_history.updated_by%type, text
+);
+
+create or replace function update_issue_status(
+    p_issue_id      issue.issue_id%type,
+    p_status_id     issue.current_status_id%type,
+    p_updated_by    issue_history.updated_by%type default null,
+    p_remarks       text default 'Status updated by department',
+    p_department_id issue.department_id%type default null
+) returns jsonb
+language plpgsql
+as $$
+declare
+    old_status issue.current_status_id%type;
+    updated    issue;
+begin
+    select current_status_id into old_status
+    from issue
+    where issue_id = p_issue_id
+      and (p_department_id is null or department_id = p_department_id)
+    for update;
+
+    if not found then
+        return null;
+    end if;
+
+    update issue set current_status_id = p_status_id
+    where issue_id = p_issue_id
+    returning * into updated;
+
+    insert into issue_history (issue_id, status_id, updated_by, remarks)
+    values (p_issue_id, p_status_id, p_updated_by, p_remarks);
+
+    return to_jsonb(updated) || jsonb_build_object('previous_status_id', old_status);
+end;
+$$;
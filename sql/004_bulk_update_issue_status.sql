@@ -0,0 +1,44 @@
+-- Moves many issues of one department to a new status and writes one history
+-- row each, in a single transaction. Called from POST /dept/bulk-update-status
+-- with a chunk of ids per round-trip. Ids that do not exist or belong to another
+-- department are skipped; the caller reports them as failures.
+--
+-- Returns a jsonb array of the updated issues, each with `previous_status_id`.
+
+create or replace function bulk_update_issue_status(
+    p_issue_ids     text[],
+    p_status_id     issue.current_status_id%type,
+    p_department_id issue.department_id%type,
+    p_updated_by    issue_history.updated_by%type default null,
+    p_remarks       text default 'Status updated by department'
+) returns jsonb
+language plpgsql
+as $$
+declare
+    result jsonb;
+begin
+    with locked as (
+        select issue_id, current_status_id as previous_status_id
+        from issue
+        where issue_id::text = any(p_issue_ids)
+          and department_id = p_department_id
+        for update
+    ),
+    updated as (
+        update issue i
+        set current_status_id = p_status_id
+        from locked
+        where i.issue_id = locked.issue_id
+        returning i.*, locked.previous_status_id
+    ),
+    history as (
+        insert into issue_history (issue_id, status_id, updated_by, remarks)
+        select issue_id, p_status_id, p_updated_by, p_remarks
+        from updated
+    )
+    select coalesce(jsonb_agg(to_jsonb(updated)), '[]'::jsonb) into result
+    from updated;
+
+    return result;
+end;
+$$;
@@ -0,0 +1,34 @@
+-- Appends a history row to an issue at its current status, plus optional
+-- images, in one transaction. Used to link duplicate reports to the original
+-- issue: the status stays as it is, the history records who reported it again.
+--
+-- Returns the issue, or null if it does not exist.
+
+create or replace function add_issue_note(
+    p_issue_id   issue.issue_id%type,
+    p_remarks    text,
+    p_images     text[] default '{}',
+    p_updated_by issue_history.updated_by%type default null
+) returns jsonb
+language plpgsql
+as $$
+declare
+    target issue;
+begin
+    select * into target
+    from issue where issue_id = p_issue_id;
+
+    if not found then
+        return null;
+    end if;
+
+    insert into issue_history (issue_id, status_id, updated_by, remarks)
+    values (p_issue_id, target.current_status_id, p_updated_by, p_remarks);
+
+    insert into issue_image (issue_id, image_url)
+    select p_issue_id, url
+    from unnest(coalesce(p_images, '{}')) as url;
+
+    return to_jsonb(target);
+end;
+$$;
@@ -0,0 +1,30 @@
+import os
+import sys
+import tempfile
+
+# Settings are read when `config` is imported, so they go in first: the
+# in-memory backend, no mail workers, no persisted search index
+os.environ.update(
+    DATA_BACKEND="memory",
+    MEMORY_LATENCY_MS="0",
+    STORAGE_BACKEND="local",
+    LOCAL_STORAGE_DIR=tempfile.mkdtemp(prefix="r2r-test-media-"),
+    NOTIFY_WORKERS="0",
+    SEARCH_INDEX_FILE="",
+    DUPLICATE_MODE="off",
+    RATE_LIMIT_ENABLED="false",
+    AUTH_SECRET="test-secret-" + "x" * 32,
+    LOG_LEVEL="WARNING",
+)
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def client():
+    # No lifespan: the background scans would add round-trips of their own
+    import main
+
+    return TestClient(main.app)
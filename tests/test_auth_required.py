@@ -0,0 +1,51 @@
+import pytest
+
+from auth import issue_tokens
+from models import IN_PROGRESS_STATUS_ID, SUBMITTED_STATUS_ID
+from services.supabase_service import repo
+
+
+def bearer(role: str, department_id: str = None) -> dict:
+    token = issue_tokens({"user_id": f"{role}-{department_id}", "role": role, "department_id": department_id})
+    return {"Authorization": f"Bearer {token['access_token']}"}
+
+
+@pytest.mark.parametrize("method, path", [
+    ("GET", "/admin/all-issues"),
+    ("GET", "/admin/export/issues"),
+    ("GET", "/dept/issues/dept-roads"),
+    ("GET", "/dept/summary/dept-roads"),
+    ("GET", "/search/issues"),
+    ("POST", "/dept/update-status/issue-1"),
+    ("GET", "/dept/events/dept-roads"),
+])
+def test_staff_routes_need_a_token_even_when_auth_is_optional(client, method, path):
+    r = client.request(method, path, json={"status_id": IN_PROGRESS_STATUS_ID} if method == "POST" else None)
+    assert r.status_code == 401
+
+
+def test_citizen_reads_still_work_without_a_token(client):
+    r = client.get("/my-issues/user-1")
+    assert r.status_code == 200
+
+
+def test_bulk_update_records_the_caller_not_the_body(client):
+    issue_id = repo.add_issue({
+        "title":             "Pothole",
+        "description":       "Deep one",
+        "department_id":     "dept-roads",
+        "category_id":       "cat-roads",
+        "location_id":       "loc-1",
+        "user_id":           None,
+        "current_status_id": SUBMITTED_STATUS_ID,
+    })["issue_id"]
+
+    r = client.post("/dept/bulk-update-status", headers=bearer("department", "dept-roads"), json={
+        "department_id": "dept-roads",
+        "status_id":     IN_PROGRESS_STATUS_ID,
+        "issue_ids":     [issue_id],
+        "updated_by":    "someone-else",
+    })
+    assert r.status_code == 200, r.text
+    history = [h for h in repo.history if h["issue_id"] == issue_id]
+    assert history[-1]["updated_by"] == "department-dept-roads"
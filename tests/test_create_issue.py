@@ -0,0 +1,146 @@
+import asyncio
+import json
+import os
+from pathlib import Path
+
+import httpx
+import pytest
+
+from models import SUBMITTED_STATUS_ID
+from services.supabase_service import MemoryRepository, PostgrestRepository, repo
+
+ROOT = Path(__file__).resolve().parent.parent
+
+DEPARTMENT = {"department_id": "dept-roads", "department_name": "Roads", "contact_email": "roads@example.org"}
+
+
+def issue_body(images: list) -> dict:
+    return {
+        "title":             "Pothole",
+        "description":       "Deep pothole on the main road",
+        "category_id":       "cat-roads",
+        "department_id":     DEPARTMENT["department_id"],
+        "location_id":       "loc-1",
+        "current_status_id": SUBMITTED_STATUS_ID,
+        "remarks":           "",
+        "images":            images,
+    }
+
+
+def images(n: int) -> list:
+    return [f"https://cdn.example.org/{i}.jpg" for i in range(n)]
+
+
+@pytest.mark.parametrize("n", [0, 1, 25])
+def test_repository_writes_issue_history_and_images_in_one_round_trip(n):
+    memory = MemoryRepository(latency_ms=0)
+    issue  = {k: v for k, v in issue_body([]).items() if k not in ("remarks", "images")}
+
+    created = asyncio.run(memory.create_issue(issue, images=images(n), remarks="Issue submitted by citizen"))
+
+    assert memory.round_trips == 1
+    assert [h["issue_id"] for h in memory.history] == [created["issue_id"]]
+    assert len([i for i in memory.images if i["issue_id"] == created["issue_id"]]) == n
+
+
+def test_create_issue_round_trips_do_not_grow_with_images(client):
+    if DEPARTMENT not in repo.tables["departments"]:
+        repo.tables["departments"].append(DEPARTMENT)
+    # The first request fills the recipient cache and looks up the location
+    assert client.post("/create-issue", json=issue_body([])).json()["ok"]
+
+    trips = {}
+    for n in (0, 1, 25):
+        before = repo.round_trips
+        result = client.post("/create-issue", json=issue_body(images(n))).json()
+        trips[n] = repo.round_trips - before
+
+        assert result["ok"]
+        assert len([i for i in repo.images if i["issue_id"] == result["issue_id"]]) == n
+
+    assert trips[0] == trips[1] == trips[25] == 1
+
+
+def test_postgrest_repository_creates_issue_with_one_rpc():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, json={"issue_id": "issue-1", **json.loads(request.content)["p_issue"]})
+
+    postgrest = PostgrestRepository(url="https://db.example.org", key="service-key")
+    postgrest._client = httpx.AsyncClient(base_url=postgrest.base_url, transport=httpx.MockTransport(handler))
+    issue = {k: v for k, v in issue_body([]).items() if k not in ("remarks", "images")}
+
+    created = asyncio.run(postgrest.create_issue(issue, images=images(2), remarks="Issue submitted by citizen"))
+
+    assert created["issue_id"] == "issue-1"
+    assert postgrest.round_trips == 1
+    [call] = calls
+    assert (call.method, call.url.path) == ("POST", "/rest/v1/rpc/create_issue_with_history")
+    assert json.loads(call.content) == {"p_issue": issue, "p_images": images(2), "p_remarks": "Issue submitted by citizen"}
+
+
+# sql/002 against a real database, only where one is available
+SCHEMA = """
+create table issue (
+    issue_id          uuid primary key default gen_random_uuid(),
+    title             text, description text, category_id text, department_id text,
+    location_id       text, user_id text, current_status_id text,
+    created_at        timestamptz not null default now()
+);
+create table issue_history (
+    history_id uuid primary key default gen_random_uuid(),
+    issue_id   uuid references issue, status_id text, updated_by text, remarks text,
+    created_at timestamptz not null default now()
+);
+create table issue_image (
+    image_id  uuid primary key default gen_random_uuid(),
+    issue_id  uuid references issue, image_url text
+);
+"""
+
+
+@pytest.mark.skipif(not os.getenv("TEST_DATABASE_URL"), reason="TEST_DATABASE_URL not set")
+def test_create_issue_with_history_sql():
+    psycopg = pytest.importorskip("psycopg")
+    sql     = (ROOT / "sql" / "002_create_issue_with_history.sql").read_text()
+    issue   = {k: v for k, v in issue_body([]).items() if k not in ("remarks", "images")}
+
+    with psycopg.connect(os.environ["TEST_DATABASE_URL"]) as conn:
+        # Everything happens in a scratch schema inside one transaction that is rolled back
+        conn.execute("create schema r2r_test")
+        conn.execute("set local search_path to r2r_test, public")
+        conn.execute(SCHEMA)
+        conn.execute(sql)
+
+        created = conn.execute(
+            "select create_issue_with_history(%s::jsonb, %s, %s)",
+            (json.dumps(issue), images(3), "Issue submitted by citizen"),
+        ).fetchone()[0]
+        counts = conn.execute(
+            "select (select count(*) from issue_history where issue_id = %(id)s),"
+            "       (select count(*) from issue_image where issue_id = %(id)s)",
+            {"id": created["issue_id"]},
+        ).fetchone()
+        conn.rollback()
+
+    assert created["title"] == issue["title"]
+    assert counts == (1, 3)
+
+
+def test_history_pages_follow_created_at_order():
+    memory = MemoryRepository(latency_ms=0)
+    issue  = {k: v for k, v in issue_body([]).items() if k not in ("remarks", "images")}
+    for _ in range(5):
+        asyncio.run(memory.create_issue(issue, images=[], remarks=""))
+    # A row stamped earlier than the rest still lands in order
+    memory._add_history({"history_id": "h-early", "issue_id": None, "created_at": "2000-01-01T00:00:00+00:00"})
+
+    async def read_all():
+        return [row async for row in memory.iter_history("history_id, created_at", batch=2)]
+
+    rows = asyncio.run(read_all())
+    assert rows[0]["history_id"] == "h-early"
+    assert [(r["created_at"], r["history_id"]) for r in rows] == sorted((h["created_at"], h["history_id"]) for h in memory.history)
+    assert len(rows) == 6
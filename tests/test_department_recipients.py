@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from auth import issue_tokens
+from services.lookup_cache import DepartmentRecipients, department_recipients
+from services.supabase_service import repo
+
+DEPARTMENT = {"department_id": "dept-parks", "department_name": "Parks", "contact_email": "parks@example.org"}
+
+
+def add_staff(email: str, approved: bool = True) -> str:
+    return repo.add_user({
+        "full_name":     email.split("@")[0],
+        "email":         email,
+        "password":      "x",
+        "role_id":       "role-department",
+        "role_name":     "department",
+        "department_id": DEPARTMENT["department_id"],
+        "is_approved":   approved,
+    })["user_id"]
+
+
+@pytest.fixture
+def department():
+    if DEPARTMENT not in repo.tables["departments"]:
+        repo.tables["departments"].append(DEPARTMENT)
+    department_recipients.invalidate()
+    return DEPARTMENT["department_id"]
+
+
+ADMIN = {"Authorization": f"Bearer {issue_tokens({'user_id': 'admin-1', 'role': 'admin'})['access_token']}"}
+
+
+def recipients(department_id: str) -> list:
+    return asyncio.run(department_recipients.get(department_id))["recipients"]
+
+
+def test_approve_and_reject_update_cached_recipients(client, department):
+    alice = add_staff("alice@example.org")
+    bob   = add_staff("bob@example.org", approved=False)
+    assert recipients(department) == ["parks@example.org", "alice@example.org"]
+
+    # Served from the cache until staff change
+    before = repo.round_trips
+    assert recipients(department) == ["parks@example.org", "alice@example.org"]
+    assert repo.round_trips == before
+
+    assert client.post(f"/admin/approve/{bob}", headers=ADMIN).json()["ok"]
+    assert recipients(department) == ["parks@example.org", "alice@example.org", "bob@example.org"]
+
+    assert client.delete(f"/admin/reject/{alice}", headers=ADMIN).json()["ok"]
+    assert recipients(department) == ["parks@example.org", "bob@example.org"]
+
+
+@pytest.mark.parametrize("everything", [False, True])
+def test_load_overlapping_an_invalidation_is_not_cached(monkeypatch, department, everything):
+    cache = DepartmentRecipients(ttl=300)
+    staff = ["old@example.org"]
+
+    async def run():
+        loading, release = asyncio.Event(), asyncio.Event()
+
+        async def staff_emails(department_id):
+            # Reads the staff as they are now, but answers only once released
+            emails = list(staff)
+            loading.set()
+            await release.wait()
+            return emails
+
+        monkeypatch.setattr(repo, "department_staff_emails", staff_emails)
+        release.set()
+        assert (await cache.get(department))["recipients"] == ["parks@example.org", "old@example.org"]
+
+        cache.invalidate(department)
+        loading.clear()
+        release.clear()
+        load = asyncio.create_task(cache.get(department))
+        await loading.wait()
+
+        # Staff change, and the cache is told, while that load is in flight
+        staff[:] = ["new@example.org"]
+        cache.invalidate(None if everything else department)
+        release.set()
+        stale = await load
+        return stale, await cache.get(department)
+
+    stale, fresh = asyncio.run(run())
+    assert stale["recipients"] == ["parks@example.org", "old@example.org"]
+    assert fresh["recipients"] == ["parks@example.org", "new@example.org"]
@@ -0,0 +1,33 @@
+import asyncio
+
+import pytest
+
+from auth import issue_tokens
+from dependencies import department_stream_access, self_stream_access, stream_user
+
+
+def token(role: str, user_id: str = "user-1", department_id: str = None) -> str:
+    return issue_tokens({"user_id": user_id, "role": role, "department_id": department_id})["access_token"]
+
+
+@pytest.mark.parametrize("path, role, department_id, status", [
+    ("/dept/events/dept-roads", "department", "dept-water", 403),
+    ("/dept/events/dept-roads", "citizen", None, 403),
+    ("/my-events/user-2", "citizen", None, 403),
+])
+def test_stream_token_in_query_is_checked(client, path, role, department_id, status):
+    r = client.get(path, params={"access_token": token(role, department_id=department_id)})
+    assert r.status_code == status
+
+
+def test_stream_rejects_invalid_query_token(client):
+    assert client.get("/my-events/user-1", params={"access_token": "junk"}).status_code == 401
+
+
+def test_stream_accepts_token_in_query():
+    # The streams themselves never end, so the dependency is called directly
+    claims = asyncio.run(stream_user(None, token("department", department_id="dept-roads")))
+    assert (claims["sub"], claims["department_id"]) == ("user-1", "dept-roads")
+
+    assert asyncio.run(department_stream_access("dept-roads", claims)) is claims
+    assert asyncio.run(self_stream_access("user-1", claims)) is claims
@@ -0,0 +1,36 @@
+from auth import issue_tokens
+from test_create_issue import DEPARTMENT, issue_body
+from test_upload_image import image
+from services.supabase_service import repo
+
+
+def bearer(user_id: str) -> dict:
+    return {"Authorization": f"Bearer {issue_tokens({'user_id': user_id, 'role': 'citizen'})['access_token']}"}
+
+
+def test_same_key_from_two_callers_creates_two_issues(client):
+    if DEPARTMENT not in repo.tables["departments"]:
+        repo.tables["departments"].append(DEPARTMENT)
+    headers = {"Idempotency-Key": "shared-key"}
+
+    first  = client.post("/create-issue", json=issue_body([]), headers={**headers, **bearer("alice")})
+    retry  = client.post("/create-issue", json=issue_body([]), headers={**headers, **bearer("alice")})
+    other  = client.post("/create-issue", json=issue_body([]), headers={**headers, **bearer("bob")})
+
+    assert retry.headers.get("Idempotent-Replayed") == "true"
+    assert retry.json()["issue_id"] == first.json()["issue_id"]
+    assert "Idempotent-Replayed" not in other.headers
+    assert other.json()["issue_id"] != first.json()["issue_id"]
+
+
+def test_upload_key_reused_for_other_content_is_rejected(client):
+    headers = {"Idempotency-Key": "upload-key", **bearer("carol")}
+
+    def upload(color: str):
+        return client.post("/upload-image", headers=headers, files={"file": ("photo.png", image("PNG", color), "image/png")})
+
+    first = upload("red")
+    assert first.status_code == 200
+    assert upload("red").headers.get("Idempotent-Replayed") == "true"
+    # Same filename, type and even size, different pixels
+    assert upload("blue").status_code == 422
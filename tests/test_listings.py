@@ -0,0 +1,55 @@
+import base64
+import json
+
+import pytest
+
+from auth import issue_tokens
+from models import SUBMITTED_STATUS_ID
+from services.supabase_service import repo
+
+USER = "listing-citizen"
+
+
+def bearer(role: str, user_id: str) -> dict:
+    return {"Authorization": f"Bearer {issue_tokens({'user_id': user_id, 'role': role})['access_token']}"}
+
+
+def add_issues(n: int):
+    for i in range(n):
+        repo.add_issue({
+            "title":             f"Issue {i}",
+            "description":       "Listed",
+            "department_id":     "dept-listing",
+            "category_id":       "cat-roads",
+            "location_id":       "loc-1",
+            "user_id":           USER,
+            "current_status_id": SUBMITTED_STATUS_ID,
+        })
+
+
+def test_listings_stay_bare_arrays_unless_paged(client):
+    add_issues(5)
+
+    everything = client.get(f"/my-issues/{USER}").json()
+    assert isinstance(everything, list) and len(everything) == 5
+
+    first = client.get(f"/my-issues/{USER}", params={"limit": 3}).json()
+    assert len(first["issues"]) == 3 and first["next_cursor"]
+
+    rest = client.get(f"/my-issues/{USER}", params={"cursor": first["next_cursor"], "limit": 3}).json()
+    assert rest["next_cursor"] is None
+    assert [i["issue_id"] for i in first["issues"] + rest["issues"]] == [i["issue_id"] for i in everything]
+
+    dept = client.get("/dept/issues/dept-listing", headers=bearer("admin", "admin-1")).json()
+    assert isinstance(dept, list) and len(dept) == 5
+
+
+@pytest.mark.parametrize("values", [
+    ["2024-01-01T00:00:00+00:00", 'x")&or=(user_id.neq.null'],
+    ['2024-01-01",and(issue_id.neq.', "0b6f2c1e-5a7d-4a8e-9c41-1f2e3d4c5b6a"],
+    ["2024-01-01T00:00:00+00:00"],
+])
+def test_tampered_cursor_is_rejected(client, values):
+    cursor = base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+    r = client.get(f"/my-issues/{USER}", params={"cursor": cursor})
+    assert r.status_code == 400
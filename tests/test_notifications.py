@@ -0,0 +1,88 @@
+import smtplib
+import time
+
+import pytest
+
+from services import notification_service
+from services.notification_service import NotificationService
+
+
+class FakeSMTP:
+    """Stands in for smtplib.SMTP; fails the first `failures` sends."""
+
+    failures = 0
+    sent     = []
+
+    def __init__(self, host, port, timeout=None):
+        self.host = host
+
+    def login(self, username, password):
+        pass
+
+    def sendmail(self, sender, to, payload):
+        if FakeSMTP.failures > 0:
+            FakeSMTP.failures -= 1
+            raise smtplib.SMTPDataError(451, b"try again later")
+        FakeSMTP.sent.append((sender, to, time.monotonic()))
+
+    def quit(self):
+        pass
+
+
+@pytest.fixture
+def smtp(monkeypatch):
+    FakeSMTP.failures = 0
+    FakeSMTP.sent     = []
+    monkeypatch.setattr(notification_service.smtplib, "SMTP", FakeSMTP)
+    return FakeSMTP
+
+
+@pytest.fixture
+def notifier(smtp):
+    service = NotificationService(
+        host="smtp.test", port=25, use_ssl=False, username="", password="", sender="r2r@example.org",
+        workers=2, max_retries=2, backoff_secs=0.05, backoff_max=1,
+    )
+    service.start()
+    yield service
+    service.stop(timeout=1)
+
+
+def wait_for(condition, timeout: float = 3):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_queued_email_is_sent(smtp, notifier):
+    assert notifier.enqueue(["a@example.org", "a@example.org", ""], "Hello", "<p>Hi</p>")
+
+    wait_for(lambda: notifier.stats["sent"] == 1)
+    assert [(sender, to) for sender, to, _ in smtp.sent] == [("r2r@example.org", ["a@example.org"])]
+
+
+def test_failed_send_is_retried_with_backoff(smtp, notifier):
+    smtp.failures = 2
+    started = time.monotonic()
+    notifier.enqueue(["b@example.org"], "Retry", "<p>Again</p>")
+
+    wait_for(lambda: notifier.stats["sent"] == 1)
+    # Two failures wait 0.05s then 0.1s before the third attempt goes through
+    assert smtp.sent[0][2] - started >= 0.15
+    assert notifier.stats["retried"] == 2
+    assert notifier.dead_letters() == []
+
+
+def test_email_is_dead_lettered_after_max_retries(smtp, notifier):
+    smtp.failures = 10
+    notifier.enqueue(["c@example.org"], "Doomed", "<p>No</p>")
+
+    wait_for(lambda: notifier.stats["dead"] == 1)
+    [dead] = notifier.dead_letters()
+    assert (dead["to"], dead["attempts"]) == (["c@example.org"], 3)
+    assert "try again later" in dead["last_error"]
+
+    smtp.failures = 0
+    assert notifier.requeue_dead_letters() == 1
+    wait_for(lambda: notifier.stats["sent"] == 1)
@@ -0,0 +1,64 @@
+import pickle
+
+from models import IssueFilter
+from services.search_service import SearchIndex
+
+DEPARTMENTS = ["dept-roads", "dept-water", "dept-parks"]
+
+
+def build(n: int = 600, **kwargs) -> SearchIndex:
+    index = SearchIndex(path="", **kwargs)
+    for i in range(n):
+        index.add({
+            "issue_id":          f"issue-{i}",
+            "title":             "pothole" if i % 2 else "streetlight",
+            "description":       "pothole " * (1 + i % 5) + "near the school",
+            "department_id":     DEPARTMENTS[i % 3],
+            "category_id":       f"cat-{i % 4}",
+            "current_status_id": "submitted",
+            "created_at":        f"2026-01-01T00:{i // 60:02d}:{i % 60:02d}+00:00",
+        })
+    return index
+
+
+def exact(index: SearchIndex, query: str, f: IssueFilter, limit: int) -> list:
+    unbounded = SearchIndex(path="", max_postings=10**9, max_scan=10**9)
+    vars(unbounded).update({k: v for k, v in vars(index).items() if k not in ("max_postings", "max_scan")})
+    return unbounded.search(query, f, limit)
+
+
+def test_filtered_search_keeps_recall_under_a_small_budget():
+    index = build(max_postings=40, max_scan=10_000)
+    for f in [
+        IssueFilter(department_id="dept-water"),
+        IssueFilter(department_id="dept-water", category_id="cat-1"),
+        IssueFilter(category_id="cat-2", created_to="2026-01-01T00:05:00+00:00"),
+    ]:
+        hits = index.search("pothole", f, 20)
+        assert len(hits) == 20
+        assert [s for _, s in hits] == [s for _, s in exact(index, "pothole", f, 20)]
+        docs = [index._docs[issue_id] for issue_id, _ in hits]
+        assert index._matching(docs, f) == list(range(len(docs)))
+
+
+def test_unfiltered_search_reads_the_best_postings_across_departments():
+    index = build(max_postings=30)
+    assert [s for _, s in index.search("pothole", IssueFilter(), 10)] == [
+        s for _, s in exact(index, "pothole", IssueFilter(), 10)
+    ]
+
+
+def test_unknown_filter_values_match_nothing():
+    index = build()
+    assert index.search("pothole", IssueFilter(department_id="dept-none"), 10) == []
+    assert index.search("pothole", IssueFilter(category_id="cat-none"), 10) == []
+
+
+def test_snapshot_does_not_carry_read_limits(tmp_path):
+    index = build(n=30, max_postings=123, max_scan=456)
+    index.path = str(tmp_path / "index.pkl")
+    index.save()
+
+    with open(index.path, "rb") as f:
+        state = pickle.load(f)["state"]
+    assert "max_postings" not in state and "max_scan" not in state
@@ -0,0 +1,79 @@
+from auth import issue_tokens
+from models import IN_PROGRESS_STATUS_ID, SUBMITTED_STATUS_ID
+from services.supabase_service import repo
+
+
+def bearer(role: str, department_id: str = None) -> dict:
+    token = issue_tokens({"user_id": f"{role}-{department_id}", "role": role, "department_id": department_id})
+    return {"Authorization": f"Bearer {token['access_token']}"}
+
+
+def new_issue(department_id: str) -> str:
+    return repo.add_issue({
+        "title":             "Broken streetlight",
+        "description":       "Out since Monday",
+        "department_id":     department_id,
+        "category_id":       "cat-lights",
+        "location_id":       "loc-2",
+        "user_id":           None,
+        "current_status_id": SUBMITTED_STATUS_ID,
+    })["issue_id"]
+
+
+def test_staff_cannot_update_another_departments_issue(client):
+    issue_id = new_issue("dept-lights")
+
+    r = client.post(
+        f"/dept/update-status/{issue_id}", json={"status_id": IN_PROGRESS_STATUS_ID}, headers=bearer("department", "dept-water"),
+    )
+    assert r.status_code == 404
+    assert repo.issues[issue_id]["current_status_id"] == SUBMITTED_STATUS_ID
+
+
+def test_staff_and_admins_update_status(client):
+    own, other = new_issue("dept-lights"), new_issue("dept-water")
+
+    r = client.post(
+        f"/dept/update-status/{own}", json={"status_id": IN_PROGRESS_STATUS_ID}, headers=bearer("department", "dept-lights"),
+    )
+    assert r.json() == {"ok": True}
+    assert repo.issues[own]["current_status_id"] == IN_PROGRESS_STATUS_ID
+
+    r = client.post(f"/dept/update-status/{other}", json={"status_id": IN_PROGRESS_STATUS_ID}, headers=bearer("admin"))
+    assert r.json() == {"ok": True}
+    assert repo.issues[other]["current_status_id"] == IN_PROGRESS_STATUS_ID
+
+
+def test_citizens_cannot_update_status(client):
+    issue_id = new_issue("dept-lights")
+
+    r = client.post(f"/dept/update-status/{issue_id}", json={"status_id": IN_PROGRESS_STATUS_ID}, headers=bearer("citizen"))
+    assert r.status_code == 403
+
+
+def test_bulk_update_looks_citizens_up_in_chunks(client, monkeypatch):
+    import config
+
+    citizens = [
+        repo.add_user({"full_name": f"Citizen {i}", "email": f"bulk{i}@example.org", "role_name": "citizen"})["user_id"]
+        for i in range(5)
+    ]
+    issue_ids = [new_issue("dept-bulk") for _ in citizens]
+    for issue_id, user_id in zip(issue_ids, citizens):
+        repo.issues[issue_id]["user_id"] = user_id
+
+    lookups = []
+    get_users = repo.get_users
+
+    async def counted(user_ids):
+        lookups.append(len(user_ids))
+        return await get_users(user_ids)
+
+    monkeypatch.setattr(config, "BULK_CHUNK_SIZE", 2)
+    monkeypatch.setattr(repo, "get_users", counted)
+
+    r = client.post("/dept/bulk-update-status", headers=bearer("department", "dept-bulk"), json={
+        "department_id": "dept-bulk", "status_id": IN_PROGRESS_STATUS_ID, "issue_ids": issue_ids,
+    })
+    assert all(result["ok"] for result in r.json()["results"])
+    assert lookups == [2, 2, 1]
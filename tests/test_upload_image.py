@@ -0,0 +1,36 @@
+import io
+import os
+
+from PIL import Image
+
+from services.storage_service import uploader
+
+
+def image(fmt: str, color: str) -> bytes:
+    out = io.BytesIO()
+    Image.new("RGB", (64, 48), color).save(out, fmt)
+    return out.getvalue()
+
+
+def upload(client, content: bytes, content_type: str):
+    return client.post("/upload-image", files={"file": ("photo", content, content_type)})
+
+
+def test_webp_needs_the_webp_form_type(client):
+    assert upload(client, image("WEBP", "green"), "image/webp").status_code == 200
+
+    wav = b"RIFF" + (36).to_bytes(4, "little") + b"WAVEfmt " + bytes(28)
+    assert upload(client, wav, "image/webp").status_code == 415
+
+
+def test_duplicate_upload_restores_a_missing_thumbnail(client):
+    first = upload(client, image("PNG", "navy"), "image/png").json()
+    assert not first["deduplicated"]
+
+    thumb = uploader.storage._path("thumbs/" + first["thumbnail_url"].rsplit("/thumbs/", 1)[1])
+    os.unlink(thumb)
+
+    again = upload(client, image("PNG", "navy"), "image/png").json()
+    assert again["deduplicated"]
+    assert again["thumbnail_url"] == first["thumbnail_url"]
+    assert os.path.exists(thumb)